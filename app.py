@@ -10,12 +10,18 @@ import config
 from ingestionPipeline.ingest_pipeline import ingest_pipeline
 from reponsePipeline.llm_rag_response import llm_rag_response, get_context_from_ids, get_chunk_details
 from reponsePipeline.rrf import fuse_responses
+from model_registry import preload_response_models
 
 # Set page configuration
 st.set_page_config(page_title="HybridRAG Search", layout="wide")
 
 st.title("HybridRAG: Intelligent Search System")
 
+# Query models load in a background thread while the page (and ingestion) starts; once per server process.
+# Ingestion's process pools do not fork (see process_pool), so they are safe to start alongside this thread.
+if config.PRELOAD_RESPONSE_MODELS:
+    preload_response_models()
+
 # Function to run ingestion
 def run_ingestion():
     if "ingestion_done" not in st.session_state:
@@ -40,6 +46,15 @@ with st.sidebar:
     if st.button("Run Ingestion Pipeline"):
         run_ingestion()
 
+    if config.VECTOR_STORE == "pinecone":
+        with st.expander("Pinecone Connection"):
+            if st.button("Check Health"):
+                from pinecone_connection import get_connection_manager
+                manager = get_connection_manager()
+                st.json(manager.health())
+                # Open pools, in-flight requests and per-operation latency histograms
+                st.json(manager.metrics())
+
 # Main Search Interface
 # For testing, we allow UI to show even if ingestion isn't strictly "done" in this session,
 # assuming data persists in ChromaDB.
@@ -57,7 +72,7 @@ if  st.session_state.get("ingestion_done"):
                 try:
                     fused_results = fuse_responses(query, top_n=config.TOP_K_RESULTS)
                     
-                    # 2. Get Context
+                    # 2. Get Context (carried by the retrieval result, no further fetches)
                     context = get_context_from_ids(fused_results)
                     chunk_details = get_chunk_details(fused_results)
                     
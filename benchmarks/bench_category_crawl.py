@@ -0,0 +1,139 @@
+"""
+Benchmark: dynamic URL discovery, depth-first per-page crawl vs the breadth-first CategoryCrawler.
+
+The depth-first baseline follows the old fetch_from_category: one listing request
+per category, then the full extract (for the word count) and the page info (for
+the URL) of every candidate page, serially, recursing into subcategories until
+the per-category quota is met. get_dynamic_urls lists categories with
+generator=categorymembers + prop=info and filters on page length, with each
+level of the crawl listed concurrently. Reports wall time, API requests and how
+many collected pages really have >= min_words.
+
+The category tree is synthetic (--seeds categories, --branching subcategories per
+level down to --depth, --pages per category with random sizes, some pages filed
+under several categories) and served by the local MediaWiki stand-in with
+--latency seconds per response.
+
+Usage: python benchmarks/bench_category_crawl.py [--target 300] [--pages 40] [--latency 0.05]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+from ingestionPipeline.fetch_dynamicUrls import get_dynamic_urls
+from ingestionPipeline.wiki_fetch import WikiClient
+from wiki_stub import start_wiki_stub
+
+NS_CATEGORY = 14
+
+
+def build_tree(seeds, branching, depth, pages, rng):
+    """({title: text}, {category: [members]}); words are 8 bytes like config.WIKITEXT_BYTES_PER_WORD."""
+    articles, categories = {}, {}
+    level = [f"Category:Topic {i}" for i in range(seeds)]
+    seed_categories = list(level)
+    for d in range(depth + 1):
+        next_level = []
+        for cat in level:
+            members = []
+            for p in range(pages):
+                if articles and rng.random() < 0.1:
+                    members.append(rng.choice(list(articles)))  # filed under several categories
+                    continue
+                title = f"{cat[len('Category:'):]} page {p}"
+                articles[title] = " ".join(f"word{i % 100:03d}" for i in range(rng.randint(20, 800)))
+                members.append(title)
+            if d < depth:
+                subcats = [f"{cat} {b}" for b in range(branching)]
+                next_level.extend(subcats)
+                members.extend(subcats)
+            categories[cat] = members
+        level = next_level
+    return articles, categories, seed_categories
+
+
+def legacy_crawl(client, category, quota, collected, min_words, depth=0, max_depth=5):
+    # fetch_from_category before the crawler: depth-first, every candidate page downloaded
+    if depth > max_depth:
+        return
+    members = client.get({"action": "query", "format": "json", "list": "categorymembers",
+                          "cmtitle": category, "cmlimit": "max"})["query"]["categorymembers"]
+    random.shuffle(members)
+    pages = [m["title"] for m in members if m["ns"] == 0]
+    subcats = [m["title"] for m in members if m["ns"] == NS_CATEGORY]
+    for title in pages:
+        if len(collected) >= quota:
+            return
+        if title in collected:
+            continue
+        data = client.get({"action": "query", "format": "json", "titles": title,
+                           "prop": "extracts", "explaintext": 1})
+        text = next(iter(data["query"]["pages"].values())).get("extract", "")
+        data = client.get({"action": "query", "format": "json", "titles": title, "prop": "info", "inprop": "url"})
+        url = next(iter(data["query"]["pages"].values()))["fullurl"]
+        if len(text.split()) >= min_words:
+            collected[title] = url
+    for sub in subcats:
+        if len(collected) >= quota:
+            return
+        legacy_crawl(client, sub, quota, collected, min_words, depth + 1, max_depth)
+
+
+def run(label, server, collect, articles, min_words):
+    start_requests = server.requests
+    start = time.perf_counter()
+    urls = collect()
+    elapsed = time.perf_counter() - start
+    titles = {url.rsplit("/", 1)[-1].replace("_", " ") for url in urls.values()}
+    real = sum(1 for title in titles if len(articles[title].split()) >= min_words)
+    print(f"  {label:<34} {elapsed:7.2f} s   {server.requests - start_requests:6d} requests"
+          f"   {len(urls):4d} URLs ({real} with >= {min_words} words)")
+    return elapsed, server.requests - start_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", type=int, default=300)
+    parser.add_argument("--min-words", type=int, default=200)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--branching", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=config.FETCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    articles, categories, seeds = build_tree(args.seeds, args.branching, args.depth, args.pages, random.Random(0))
+    server = start_wiki_stub(articles, latency=args.latency, categories=categories)
+    print(f"{len(categories)} categories, {len(articles)} pages, target {args.target}, latency {args.latency}s")
+
+    def legacy():
+        random.seed(0)
+        client = WikiClient(api_url=server.api_url, concurrency=1, rate_limit=None)
+        urls = {}
+        for cat in seeds:
+            per_cat = {}
+            legacy_crawl(client, cat, args.target // len(seeds), per_cat, args.min_words)
+            urls.update(per_cat)
+        return urls
+
+    def crawler():
+        client = WikiClient(api_url=server.api_url, concurrency=args.concurrency, rate_limit=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return get_dynamic_urls(seeds, target=args.target, min_words=args.min_words, client=client)
+
+    legacy_s, legacy_requests = run("depth-first, per-page text", server, legacy, articles, args.min_words)
+    crawl_s, crawl_requests = run("breadth-first CategoryCrawler", server, crawler, articles, args.min_words)
+    print(f"\n{legacy_s / crawl_s:.1f}x faster, {legacy_requests / max(crawl_requests, 1):.1f}x fewer requests")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
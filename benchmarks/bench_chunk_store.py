@@ -0,0 +1,84 @@
+"""
+Benchmark: chunk lookups from metadata.json vs the SQLite chunk store.
+
+The JSON path mirrors the old evaluation loop: parse the whole metadata file
+and build a chunk_id map, then look up the retrieved ids. The store path opens
+chunks.db and does one batch lookup. Also reports full-corpus streaming speed.
+Uses a synthetic corpus of chunk-sized texts.
+
+Usage: python benchmarks/bench_chunk_store.py [--sizes 10000 100000] [--lookups 10]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chunk_store import ChunkStore
+
+WORDS_PER_CHUNK = 180
+
+
+def synthetic_chunks(n, rng):
+    vocab = [f"word{i}" for i in range(20000)]
+    return [
+        {
+            "chunk_id": f"chunk_{i:08x}",
+            "title": f"Article {i // 20}",
+            "url": f"https://en.wikipedia.org/wiki/Article_{i // 20}",
+            "chunk_index": i % 20,
+            "content": " ".join(rng.choices(vocab, k=WORDS_PER_CHUNK)),
+            "metadata": {"token_length": WORDS_PER_CHUNK, "chunk_index": i % 20},
+        }
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lookups", type=int, default=10)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    for size in args.sizes:
+        chunks = synthetic_chunks(size, rng)
+        wanted = [chunk["chunk_id"] for chunk in rng.sample(chunks, args.lookups)]
+        print(f"\n{size:,} chunks, {args.lookups} ids per lookup")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "metadata.json")
+            with open(json_path, 'w') as f:
+                json.dump(chunks, f, indent=4)
+
+            start = time.perf_counter()
+            with open(json_path, 'r') as f:
+                chunk_map = {m['chunk_id']: m['content'] for m in json.load(f)}
+            [chunk_map[chunk_id] for chunk_id in wanted]
+            json_ms = (time.perf_counter() - start) * 1000
+
+            store = ChunkStore(os.path.join(tmp, "chunks.db"))
+            start = time.perf_counter()
+            store.migrate_from_json(json_path)
+            migrate_s = time.perf_counter() - start
+
+            # A fresh store object per lookup, as a new process would open it
+            start = time.perf_counter()
+            found = ChunkStore(store.path).get_many(wanted)
+            store_ms = (time.perf_counter() - start) * 1000
+            assert len(found) == len(wanted)
+
+            start = time.perf_counter()
+            streamed = sum(1 for _ in store.iter_chunks())
+            stream_s = time.perf_counter() - start
+
+            print(f"  metadata.json parse + lookup   {json_ms:9.2f} ms")
+            print(f"  chunk store open + get_many    {store_ms:9.2f} ms   ({json_ms / store_ms:,.0f}x)")
+            print(f"  migration {migrate_s:.1f}s, streaming {streamed / stream_s:,.0f} chunks/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: chunking throughput (docs/sec), LangChain recursive splitter vs split_document.
+
+The recursive path is the old chunk_text + prepareMetaData: RecursiveCharacterTextSplitter
+with the tokenizer as length function, then one more tokenization per chunk for
+token_length. split_document tokenizes each document once and slices chunks on
+the offset arrays. Also checks that every chunk re-tokenizes to at most
+CHUNK_SIZE tokens and compares chunk counts and sizes.
+
+Documents are built from the contexts in files/questionanswers.json, joined into
+article-sized texts with paragraph breaks. Needs the TOKENIZER_MODEL tokenizer
+(or a local one via --tokenizer).
+
+Usage: python benchmarks/bench_chunking.py [--docs 100] [--paragraphs 40] [--tokenizer bert-base-uncased]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+def load_documents(n_docs, paragraphs, rng):
+    with open(os.path.join(config.DATA_FILES_PATH, "questionanswers.json"), "r", encoding="utf-8") as f:
+        contexts = [qa["context"] for qa in json.load(f) if qa.get("context")]
+    return ["\n\n".join(rng.choices(contexts, k=paragraphs)) for _ in range(n_docs)]
+
+
+def timed(label, fn, docs):
+    start = time.perf_counter()
+    results = [fn(doc) for doc in docs]
+    elapsed = time.perf_counter() - start
+    chunks = [chunk for doc_chunks, _ in results for chunk in doc_chunks]
+    lengths = [length for _, doc_lengths in results for length in doc_lengths]
+    print(f"  {label:<34} {len(docs) / elapsed:9.1f} docs/sec   {len(chunks):6d} chunks"
+          f"   mean {sum(lengths) / len(lengths):6.1f} / max {max(lengths)} tokens")
+    return elapsed, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--tokenizer", default=config.TOKENIZER_MODEL)
+    args = parser.parse_args()
+
+    # fetch_text_chunking loads its tokenizer (TOKENIZER_MODEL) on first use
+    config.TOKENIZER_MODEL = args.tokenizer
+    from ingestionPipeline import fetch_text_chunking as chunking
+
+    docs = load_documents(args.docs, args.paragraphs, random.Random(0))
+    print(f"{len(docs)} documents, {sum(map(len, docs)) / len(docs):,.0f} chars each, "
+          f"CHUNK_SIZE={config.CHUNK_SIZE}, CHUNK_OVERLAP={config.CHUNK_OVERLAP}")
+
+    def recursive(doc):
+        chunks = chunking.text_splitter.split_text(doc)
+        return chunks, [chunking.get_token_length(chunk) for chunk in chunks]
+
+    legacy_s, _ = timed("recursive splitter + token_length", recursive, docs)
+    token_s, chunks = timed("split_document (one tokenization)", chunking.split_document, docs)
+    print(f"\n{legacy_s / token_s:.1f}x faster")
+
+    too_long = sum(1 for chunk in chunks if chunking.get_token_length(chunk) > config.CHUNK_SIZE)
+    print(f"{too_long}/{len(chunks)} split_document chunks exceed CHUNK_SIZE when re-tokenized")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: chunk embedding throughput (chunks/sec) of the embedding engine modes.
+
+The baseline is the old vectorization loop: SentenceTransformer.encode on
+batches of 100 chunks in corpus order. It is compared against EmbeddingService
+(length-bucketed batches) with each --backends entry: "torch", "int8"
+(dynamic quantization) and "onnx" (ONNX Runtime; skipped when optimum or
+onnxruntime is not installed). For every mode the vectors are checked against
+the baseline's: mean and minimum cosine similarity, plus how much of the
+computed token positions were padding.
+
+Chunks are built from the contexts in files/questionanswers.json, cut to random
+lengths (--min-words to --max-words) so their sizes vary like real chunks.
+Needs sentence-transformers (and torch); the model is EMBEDDING_MODEL.
+
+Usage: python benchmarks/bench_embedding.py [--chunks 1000] [--threads 4] [--backends torch,int8,onnx]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from embedding_service import EmbeddingService
+
+LEGACY_BATCH = 100
+
+
+def load_chunks(n_chunks, min_words, max_words, rng):
+    with open(os.path.join(config.DATA_FILES_PATH, "questionanswers.json"), "r", encoding="utf-8") as f:
+        words = " ".join(qa["context"] for qa in json.load(f) if qa.get("context")).split()
+    chunks = []
+    for _ in range(n_chunks):
+        size = rng.randint(min_words, max_words)
+        start = rng.randrange(max(1, len(words) - size))
+        chunks.append(" ".join(words[start:start + size]))
+    return chunks
+
+
+def cosines(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--min-words", type=int, default=20)
+    parser.add_argument("--max-words", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=config.EMBEDDING_THREADS)
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--batch-size", type=int, default=config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--batch-tokens", type=int, default=config.EMBEDDING_BATCH_TOKENS)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunks, args.min_words, args.max_words, random.Random(0))
+    print(f"{len(chunks)} chunks of {args.min_words}-{args.max_words} words, model {config.EMBEDDING_MODEL}, "
+          f"threads {args.threads or 'default'}")
+
+    # The baseline runs on the reference PyTorch model, loaded (and warmed up) outside the timing
+    reference = EmbeddingService(backend="torch", threads=args.threads)
+    model = reference.get_model()
+    model.encode(chunks[:8])
+    start = time.perf_counter()
+    baseline = np.concatenate([model.encode(chunks[i:i + LEGACY_BATCH]) for i in range(0, len(chunks), LEGACY_BATCH)])
+    baseline_s = time.perf_counter() - start
+    print(f"\n  {'mode':<30} {'chunks/s':>9} {'speedup':>8} {'mean cos':>9} {'min cos':>9} {'padding':>8}")
+    print(f"  {'corpus-order batches of 100':<30} {len(chunks) / baseline_s:9.1f} {1.0:7.1f}x")
+
+    for backend in args.backends.split(","):
+        service = reference if backend == "torch" else EmbeddingService(
+            backend=backend, threads=args.threads, batch_size=args.batch_size, batch_tokens=args.batch_tokens)
+        service.batch_size, service.batch_tokens = args.batch_size, args.batch_tokens
+        try:
+            service.encode(chunks[:8])
+        except ImportError as e:
+            print(f"  {backend:<30} skipped: {e}")
+            continue
+        service.tokens = service.padded_tokens = 0
+        start = time.perf_counter()
+        vectors = service.encode(chunks)
+        elapsed = time.perf_counter() - start
+        cos = cosines(vectors, baseline)
+        print(f"  {'bucketed, ' + backend:<30} {len(chunks) / elapsed:9.1f} {baseline_s / elapsed:7.1f}x"
+              f" {cos.mean():9.5f} {cos.min():9.5f} {1 - service.stats()['padding_efficiency']:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: infobox extraction, full-page BeautifulSoup parse vs infobox_parser.
+
+Parsing: per-article CPU time of the old extractor (BeautifulSoup 'html.parser'
+tree of the whole rendered page, then the first table.infobox) against
+infobox_parser.parse_infobox on the same full page and on the lead section
+only, with a check that all three give the same text.
+
+Fetching: fetch_infobox for every title against the local MediaWiki stand-in,
+whole-page action=parse vs INFOBOX_LEAD_SECTION (section=0): wall time and
+response bytes.
+
+Articles are synthetic rendered pages (infobox, linked paragraphs in
+sections, a navbox) of --words words.
+
+Usage: python benchmarks/bench_infobox.py [--titles 300] [--words 6000] [--latency 0.02]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+from ingestionPipeline.infobox_parser import parse_infobox
+from ingestionPipeline.wiki_fetch import WikiClient, fetch_infobox
+from wiki_stub import make_article, make_article_html, start_wiki_stub
+
+
+def legacy_parse_infobox(raw_html):
+    # wiki_fetch.parse_infobox before infobox_parser
+    soup = BeautifulSoup(raw_html, 'html.parser')
+    infobox = soup.find('table', {'class': 'infobox'})
+    if not infobox:
+        return ""
+    extracted_data = []
+    for tr in infobox.find_all('tr'):
+        th = tr.find('th')
+        td = tr.find('td')
+        if th and td:
+            key = th.get_text(" ", strip=True)
+            value = td.get_text(" ", strip=True)
+            value = re.sub(r'\[\d+\]', '', value)
+            extracted_data.append(f"{key}: {value}")
+    if not extracted_data:
+        return ""
+    return "Infobox:\n" + "\n".join(extracted_data) + "\n\n"
+
+
+def timed_parse(label, parse, pages):
+    start = time.perf_counter()
+    results = [parse(html) for html in pages]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {1000 * elapsed / len(pages):8.2f} ms/article   "
+          f"{sum(map(len, pages)) / len(pages) / 1024:7.1f} KiB HTML")
+    return elapsed, results
+
+
+def timed_fetch(label, server, titles, concurrency, lead_section):
+    config.INFOBOX_LEAD_SECTION = lead_section
+    client = WikiClient(api_url=server.api_url, concurrency=concurrency, rate_limit=None)
+    start_bytes = server.bytes_sent
+    start = time.perf_counter()
+    results = list(client.executor.map(lambda title: fetch_infobox(title, client), titles))
+    elapsed = time.perf_counter() - start
+    sent = server.bytes_sent - start_bytes
+    print(f"  {label:<34} {elapsed:8.2f} s   {sent / len(titles) / 1024:8.1f} KiB/article")
+    return elapsed, sent, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=300)
+    parser.add_argument("--words", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=config.FETCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    titles = [f"Article {i}" for i in range(args.titles)]
+    articles = {title: make_article(title, args.words) for title in titles}
+    pages = [make_article_html(title, articles[title]) for title in titles]
+    leads = [html[:html.find('<div class="mw-heading')] + '</div>' for html in pages]
+
+    print(f"Parsing {len(pages)} rendered articles of {args.words} words:")
+    legacy_s, expected = timed_parse("BeautifulSoup, full page", legacy_parse_infobox, pages)
+    fast_s, fast = timed_parse("infobox_parser, full page", parse_infobox, pages)
+    lead_s, lead = timed_parse("infobox_parser, lead section", parse_infobox, leads)
+    print(f"  {legacy_s / fast_s:.0f}x / {legacy_s / lead_s:.0f}x faster; identical text: {fast == expected and lead == expected}")
+
+    server = start_wiki_stub(articles, latency=args.latency)
+    print(f"\nFetching {len(titles)} infoboxes ({args.concurrency} threads, latency {args.latency}s):")
+    full_s, full_bytes, full = timed_fetch("action=parse, whole page", server, titles, args.concurrency, False)
+    lead_s, lead_bytes, lead = timed_fetch("action=parse, section=0", server, titles, args.concurrency, True)
+    print(f"  {full_s / lead_s:.1f}x faster, {full_bytes / lead_bytes:.0f}x fewer bytes; "
+          f"identical text: {full == lead == expected}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
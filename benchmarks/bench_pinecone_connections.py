@@ -0,0 +1,126 @@
+"""
+Benchmark: per-call Pinecone clients vs the shared PineconeConnectionManager.
+
+Runs against a local HTTP stand-in for the Pinecone data plane (query, fetch,
+upsert, describe_index_stats over keep-alive HTTP/1.1), so it needs neither
+network access nor an API key. The stand-in counts the TCP connections it
+accepts, which shows connection reuse directly. The legacy path builds a
+Pinecone client and index handle per call, like dense_response and
+get_context_from_ids used to.
+
+Usage: python benchmarks/bench_pinecone_connections.py [--calls 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from pinecone_connection import PineconeConnectionManager
+
+DIMENSION = 8
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/vectors/fetch":
+            ids = parse_qs(url.query).get("ids", [])
+            self._reply({"vectors": {i: {"id": i, "values": [0.0] * DIMENSION, "metadata": {"text": i}} for i in ids},
+                         "namespace": "", "usage": {"readUnits": 1}})
+        elif url.path == "/describe_index_stats":
+            self._reply({"namespaces": {}, "dimension": DIMENSION, "indexFullness": 0.0, "totalVectorCount": 3})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._body()
+        if path == "/query":
+            matches = [{"id": f"chunk_{i}", "score": 1.0 - i / 10} for i in range(body.get("topK", 5))]
+            self._reply({"matches": matches, "namespace": "", "usage": {"readUnits": 1}})
+        elif path == "/vectors/upsert":
+            self._reply({"upsertedCount": len(body.get("vectors", []))})
+        elif path == "/describe_index_stats":
+            self._reply({"namespaces": {}, "dimension": DIMENSION, "indexFullness": 0.0, "totalVectorCount": 3})
+        else:
+            self.send_error(404)
+
+
+def start_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, server, get_index, calls):
+    before = server.connections
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        index = get_index()
+        index.query(vector=[0.1] * DIMENSION, top_k=5, include_metadata=False, include_values=False)
+        index.fetch(ids=[f"chunk_{i}", f"chunk_{i + 1}"])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"  {label:<22} p50 {statistics.median(timings):7.2f} ms   p95 {timings[int(len(timings) * 0.95)]:7.2f} ms"
+          f"   connections opened {server.connections - before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    from pinecone import Pinecone
+
+    server = start_stand_in()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Stand-in data plane at {host}, {args.calls} x (query + fetch)")
+
+    def per_call_client():
+        return Pinecone(api_key="stand-in").Index(host=host)
+
+    manager = PineconeConnectionManager(api_key="stand-in", index_host=host)
+    run("per-call client", server, per_call_client, args.calls)
+    run("connection manager", server, lambda: manager.index(config.PINECONE_INDEX_NAME), args.calls)
+
+    print(f"\nHealth: {manager.health(config.PINECONE_INDEX_NAME)}")
+    print(json.dumps(manager.metrics(), indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
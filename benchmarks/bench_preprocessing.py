@@ -0,0 +1,76 @@
+"""
+Benchmark: BM25 text preprocessing throughput (tokens/sec).
+
+Compares the legacy per-text path (word_tokenize + uncached PorterStemmer),
+the memoized "nltk" mode, the "fast" regex tokenizer, and preprocess_batch
+over a process pool, and reports how often "fast" agrees with "nltk".
+The corpus is the retrieved contexts in files/questionanswers.json, repeated.
+Needs the NLTK punkt and stopwords data.
+
+Usage: python benchmarks/bench_preprocessing.py [--repeat 50] [--workers 4]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import text_preprocessing
+from text_preprocessing import get_stemmer, get_stopwords, nltk_tokenize, preprocess_batch, preprocess_text
+
+
+def legacy_preprocess(text):
+    # The pre-cache utils.preprocess_text
+    stemmer = get_stemmer()
+    stops = get_stopwords()
+    return [stemmer.stem(t) for t in nltk_tokenize(text) if t.isalnum() and t not in stops]
+
+
+def load_texts(repeat):
+    with open(os.path.join(config.DATA_FILES_PATH, "questionanswers.json"), "r", encoding="utf-8") as f:
+        qa_pairs = json.load(f)
+    texts = [f"{qa['source_title']} {qa['context']}" for qa in qa_pairs if qa.get("context")]
+    return texts * repeat
+
+
+def timed(label, fn, texts):
+    start = time.perf_counter()
+    tokenized = fn(texts)
+    elapsed = time.perf_counter() - start
+    n_tokens = sum(len(tokens) for tokens in tokenized)
+    print(f"  {label:<28} {elapsed:8.2f}s   {n_tokens / elapsed:12,.0f} tokens/sec")
+    return tokenized, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    texts = load_texts(args.repeat)
+    print(f"Corpus: {len(texts)} texts, {sum(len(t) for t in texts) / 1e6:.1f} MB")
+
+    # Warm NLTK resources so the first timed run does not pay for loading them
+    get_stopwords()
+    legacy_preprocess(texts[0])
+
+    _, legacy = timed("legacy (uncached)", lambda ts: [legacy_preprocess(t) for t in ts], texts)
+    text_preprocessing.stem.cache_clear()
+    reference, cached = timed("nltk + stem cache", lambda ts: [preprocess_text(t, mode="nltk") for t in ts], texts)
+    fast, fast_elapsed = timed("fast", lambda ts: [preprocess_text(t, mode="fast") for t in ts], texts)
+    _, batch = timed("fast, preprocess_batch",
+                     lambda ts: preprocess_batch(ts, mode="fast", workers=args.workers), texts)
+
+    info = text_preprocessing.stem.cache_info()
+    print(f"\nStem cache: {info.hits / max(info.hits + info.misses, 1):.1%} hit rate, {info.currsize} entries")
+    print(f"Speedup vs legacy: cached {legacy / cached:.1f}x, fast {legacy / fast_elapsed:.1f}x, batch {legacy / batch:.1f}x")
+
+    agree = sum(a == b for a, b in zip(reference, fast))
+    print(f"fast == nltk on {agree}/{len(texts)} texts ({agree / len(texts):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: dense retrieval of the evaluation questions, asked --passes times
+(metrics, MRR and ablation each re-query the same questions in one run).
+
+* per query, no cache: an encode call and a vector search per question (the old dense_response)
+* per query, LRU cache: dense_response with the query embedding cache
+* batched: dense_response_batch per pass (one encode call for the uncached
+  questions, one matrix product for the search)
+
+Questions come from files/questionanswers.json; the vector store is a local
+exact store of --chunks random unit vectors in a temporary directory. Reports
+queries/sec, cache hit rate and whether every mode ranked the same chunks.
+Needs sentence-transformers (and torch); the model is EMBEDDING_MODEL.
+
+Usage: python benchmarks/bench_query_cache.py [--passes 3] [--chunks 20000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import vector_store
+from embedding_service import get_embedding_service
+from reponsePipeline import dense_response as dense
+from vector_store import LocalVectorStore
+
+
+def ranked_ids(results):
+    return [[chunk_id for chunk_id, _ in result] for result in results]
+
+
+def timed(label, n_queries, run, baseline=None):
+    dense.get_query_cache().clear()
+    start = time.perf_counter()
+    results = run()
+    elapsed = time.perf_counter() - start
+    stats = dense.get_query_cache().stats()
+    # ids only: batched encoding and matrix products round scores slightly differently
+    same = "" if baseline is None else f"  same chunk ids: {ranked_ids(results) == ranked_ids(baseline)}"
+    print(f"  {label:<24} {n_queries / elapsed:9.1f} queries/s  {elapsed:7.2f} s"
+          f"  cache hits {stats['hits']:5}/{stats['hits'] + stats['misses']:<5} ({stats['hit_rate']:.0%}){same}")
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passes", type=int, default=3)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    questions = [entry['question'] for entry in utils.fetch_qa_pairs()]
+    n_queries = len(questions) * args.passes
+    service = get_embedding_service()
+    service.encode(questions[:2])  # model load outside the timing
+
+    directory = tempfile.mkdtemp(prefix="bench_query_cache_")
+    try:
+        store = LocalVectorStore(directory=directory)
+        dimension = service.get_model().get_sentence_embedding_dimension()
+        vectors = np.random.default_rng(0).standard_normal((args.chunks, dimension)).astype(np.float32)
+        store.upsert([f"chunk_{i}" for i in range(args.chunks)], vectors)
+        store.flush()
+        vector_store._vector_store = store
+        print(f"{len(questions)} questions x {args.passes} passes, {args.chunks} vectors, top {args.top_n}")
+
+        def uncached():
+            return [store.query(service.encode(question), top_k=args.top_n)
+                    for _ in range(args.passes) for question in questions]
+
+        def cached():
+            return [dense.dense_response(question, top_n=args.top_n) for _ in range(args.passes) for question in questions]
+
+        def batched():
+            return [result for _ in range(args.passes) for result in dense.dense_response_batch(questions, top_n=args.top_n)]
+
+        base_s, baseline = timed("per query, no cache", n_queries, uncached)
+        cached_s, _ = timed("per query, LRU cache", n_queries, cached, baseline)
+        batch_s, _ = timed("batched", n_queries, batched, baseline)
+        print(f"  {base_s / cached_s:.1f}x (cache), {base_s / batch_s:.1f}x (batched) faster")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: per-query sparse retrieval latency, legacy path vs resident SparseRetriever.
+
+The legacy path mirrors the old reponse_BM25: unpickle a BM25Okapi index and
+parse the metadata JSON on every call. The resident path opens the mmap'd
+index once. Cold load compares unpickling against mapping the index file.
+Uses a synthetic pre-tokenized corpus so it runs without NLTK data or a real ingest.
+
+Usage: python benchmarks/bench_sparse_retriever.py [--sizes 10000 100000] [--queries 20]
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rank_bm25 import BM25Okapi
+from bm25_segments import BM25IndexWriter, SegmentedBM25
+from reponsePipeline.BM25_reponse import SparseRetriever
+
+VOCAB_SIZE = 50000
+DOC_LENGTH = 120
+QUERY_LENGTH = 5
+
+
+def synthetic_corpus(n_docs, seed=13):
+    rng = random.Random(seed)
+    vocab = [f"t{i}" for i in range(VOCAB_SIZE)]
+    # Zipf-like term distribution so postings lengths look like natural text
+    weights = [1.0 / (rank + 1) for rank in range(VOCAB_SIZE)]
+    corpus = [rng.choices(vocab, weights=weights, k=DOC_LENGTH) for _ in range(n_docs)]
+    queries = [rng.choices(vocab[:5000], k=QUERY_LENGTH) for _ in range(200)]
+    return corpus, queries
+
+
+def legacy_query(index_path, metadata_path, tokenized_query, top_n):
+    with open(index_path, 'rb') as f:
+        payload = pickle.load(f)
+    with open(metadata_path, 'r') as f:
+        corpus_data = json.load(f)
+    scores = payload.get_scores(tokenized_query)
+    scored_corpus = [(corpus_data[idx]['chunk_id'], score) for idx, score in enumerate(scores)]
+    return sorted(scored_corpus, key=lambda x: x[1], reverse=True)[:top_n]
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), max(latencies)
+
+
+def time_load(fn, repeats=3):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return min(latencies)
+
+
+def load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def run(sizes, n_queries, top_n):
+    print(f"{'chunks':>10} | {'legacy p50 ms':>14} | {'resident p50 ms':>15} | {'speedup':>8} | "
+          f"{'pickle load ms':>14} | {'mmap load ms':>12}")
+    for n_docs in sizes:
+        corpus, queries = synthetic_corpus(n_docs)
+        queries = queries[:n_queries]
+        chunk_ids = [f"chunk_{i:08x}" for i in range(n_docs)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, "bm25_index.pkl")
+            index_dir = os.path.join(tmp, "bm25_index")
+            metadata_path = os.path.join(tmp, "metadata.json")
+            with open(legacy_path, 'wb') as f:
+                pickle.dump(BM25Okapi(corpus), f)
+            writer = BM25IndexWriter(index_dir, create=True)
+            writer.add(chunk_ids, corpus)
+            writer.commit()
+            with open(metadata_path, 'w') as f:
+                json.dump([{"chunk_id": cid, "content": " ".join(doc)} for cid, doc in zip(chunk_ids, corpus)], f, indent=4)
+
+            legacy_p50, _ = time_queries(lambda q: legacy_query(legacy_path, metadata_path, q, top_n), queries)
+
+            retriever = SparseRetriever(index_dir=index_dir).ensure_loaded()
+            resident_p50, _ = time_queries(lambda q: retriever.search_tokens(q, top_n=top_n), queries)
+
+            pickle_load = time_load(lambda: load_pickle(legacy_path))
+            mmap_load = time_load(lambda: SegmentedBM25.open(index_dir))
+
+        print(f"{n_docs:>10} | {legacy_p50:>14.1f} | {resident_p50:>15.1f} | {legacy_p50 / resident_p50:>7.1f}x | "
+              f"{pickle_load:>14.1f} | {mmap_load:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-n", type=int, default=500)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.top_n)
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: sparse top-k selection over synthetic corpora.
+
+Compares the legacy full Python sort of (chunk_id, score) pairs, vectorized
+partial selection over the score array (BM25_TOPK_MODE = "exact") and MaxScore
+early termination (BM25_TOPK_MODE = "maxscore"), and checks that MaxScore
+returns the same top-k as the exact ranking.
+
+Usage: python benchmarks/bench_sparse_topk.py [--sizes 10000 100000 1000000] [--top-n 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bm25_index import InvertedBM25
+
+VOCAB_SIZE = 100000
+AVG_DOC_LENGTH = 40
+QUERY_LENGTH = 5
+
+
+def synthetic_index(n_docs, seed=13):
+    """Build a Zipf-distributed synthetic index without a Python per-token loop."""
+    rng = np.random.default_rng(seed)
+    doc_len = rng.integers(AVG_DOC_LENGTH // 2, AVG_DOC_LENGTH * 3 // 2, size=n_docs).astype(np.int32)
+    weights = 1.0 / np.arange(1, VOCAB_SIZE + 1)
+    term_ids = rng.choice(VOCAB_SIZE, size=int(doc_len.sum()), p=weights / weights.sum())
+    doc_ids = np.repeat(np.arange(n_docs, dtype=np.int64), doc_len)
+
+    # One (term, doc, tf) entry per term occurring in a document
+    keys, tfs = np.unique(term_ids * n_docs + doc_ids, return_counts=True)
+    posting_terms = keys // n_docs
+    terms = [f"t{term}" for term in range(VOCAB_SIZE)]
+    present = np.flatnonzero(np.bincount(posting_terms, minlength=VOCAB_SIZE))
+    # Drop terms that never occurred so the vocabulary matches a real build
+    remap = np.full(VOCAB_SIZE, -1, dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    index = InvertedBM25.from_postings(
+        [terms[t] for t in present], remap[posting_terms], keys % n_docs, tfs, doc_len
+    )
+    vocab = set(terms[t] for t in present)
+
+    # Mix of frequent and mid-frequency terms, like real stemmed queries
+    queries = [[f"t{t}" for t in np.concatenate([rng.integers(0, 50, 1), rng.integers(50, 5000, QUERY_LENGTH - 1)])]
+               for _ in range(100)]
+    return index, [q for q in queries if all(t in vocab for t in q)]
+
+
+def legacy_top_n(index, chunk_ids, query, top_n):
+    scores = index.get_scores(query)
+    scored_corpus = [(chunk_ids[idx], score) for idx, score in enumerate(scores)]
+    return sorted(scored_corpus, key=lambda x: x[1], reverse=True)[:top_n]
+
+
+def p50_ms(fn, queries):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def run(sizes, n_queries, top_n):
+    print(f"{'chunks':>9} | {'full sort ms':>12} | {'argpartition ms':>15} | {'maxscore ms':>11} | maxscore == exact")
+    for n_docs in sizes:
+        index, queries = synthetic_index(n_docs)
+        queries = queries[:n_queries]
+        chunk_ids = [f"chunk_{i:08x}" for i in range(n_docs)]
+
+        legacy = p50_ms(lambda q: legacy_top_n(index, chunk_ids, q, top_n), queries)
+        exact = p50_ms(lambda q: index.top_k(q, top_n, mode="exact"), queries)
+        maxscore = p50_ms(lambda q: index.top_k(q, top_n, mode="maxscore"), queries)
+
+        agree = True
+        for q in queries:
+            exact_docs, exact_scores = index.top_k(q, top_n, mode="exact")
+            exact_docs = exact_docs[exact_scores > 0]
+            ms_docs, _ = index.top_k(q, top_n, mode="maxscore")
+            agree &= set(exact_docs.tolist()) == set(ms_docs.tolist())
+
+        print(f"{n_docs:>9} | {legacy:>12.1f} | {exact:>15.1f} | {maxscore:>11.1f} | {agree}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-n", type=int, default=500)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.top_n)
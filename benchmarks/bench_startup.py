@@ -0,0 +1,108 @@
+"""
+Benchmark: import and startup time of the pipeline modules.
+
+Imports: each module is imported in a fresh interpreter; reported are the
+import wall time, which of torch / transformers / sentence-transformers it
+pulled in and how many models the model registry had loaded by then (none: models
+are loaded on first use). Before the registry, importing llm_rag_response
+(and so rrf, app.py and the evaluation scripts) loaded Flan-T5.
+
+Startup (--models, needs the models): preload_response_models() in the
+background, as app.py does, timing each model load and the wait a first query
+has at --first-query seconds after start, against loading everything on
+that first query. Also checks that the answer generator, the LLM judge and
+the QA generator got the same Flan-T5 instance.
+
+Usage: python benchmarks/bench_startup.py [--models] [--first-query 2.0]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODULES = [
+    "reponsePipeline.dense_response",
+    "reponsePipeline.rrf",
+    "reponsePipeline.llm_rag_response",
+    "ingestionPipeline.fetch_text_chunking",
+    "evaluationPipeline.ablation_study",
+    "evaluationPipeline.evaluation_llm_judge",
+    "evaluationPipeline.QA_generation",
+]
+HEAVY = ["torch", "transformers", "sentence_transformers"]
+
+_IMPORT_PROBE = """
+import importlib, json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+importlib.import_module({module!r})
+seconds = time.perf_counter() - start
+import model_registry
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules],
+                  "models": len(model_registry.get_model_registry().stats())}}))
+"""
+
+
+def import_time(module):
+    probe = _IMPORT_PROBE.format(root=ROOT, module=module, heavy=HEAVY)
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, cwd=ROOT)
+    if output.returncode != 0:
+        return None, output.stderr.strip().splitlines()[-1]
+    return json.loads(output.stdout.strip().splitlines()[-1]), None
+
+
+def startup(first_query):
+    import config
+    from model_registry import get_model_registry, preload_response_models
+    from evaluationPipeline.QA_generation import init_llm
+    from evaluationPipeline.evaluation_llm_judge import get_judge_model
+    from model_registry import seq2seq_model
+
+    registry = get_model_registry()
+    start = time.perf_counter()
+    thread = preload_response_models()
+    time.sleep(first_query)  # the rest of server startup, the user typing
+    waited = time.perf_counter()
+    thread.join()
+    wait = time.perf_counter() - waited
+    total = time.perf_counter() - start
+
+    loads = registry.stats()
+    for key, seconds in loads.items():
+        print(f"  {key:<60} {seconds:6.2f} s")
+    print(f"  all loaded {total:.2f} s after start; a first query at {first_query:.1f} s waits {wait:.2f} s "
+          f"(loading on the first query: {sum(loads.values()):.2f} s)")
+
+    generator = seq2seq_model(config.LLM_RAG_MODEL_NAME)[1]
+    shared = generator is get_judge_model()[1] is init_llm()[1]
+    print(f"  generator, judge and QA generator share one {config.LLM_RAG_MODEL_NAME}: {shared} "
+          f"({len(registry.stats())} models loaded)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", action="store_true", help="also load the models (startup timing)")
+    parser.add_argument("--first-query", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("Imports (fresh interpreter each):")
+    print(f"  {'module':<42} {'seconds':>8}  {'models':>6}  heavy libraries imported")
+    for module in MODULES:
+        result, error = import_time(module)
+        if result is None:
+            print(f"  {module:<42} failed: {error}")
+            continue
+        print(f"  {module:<42} {result['seconds']:8.2f}  {result['models']:>6}  {', '.join(result['heavy']) or '-'}")
+
+    if args.models:
+        print("\nStartup (background preload):")
+        startup(args.first_query)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: serial upserts of 100-vector batches vs the concurrent UpsertEngine.
+
+Runs the Pinecone client against a local stand-in of the data plane (the one in
+bench_pinecone_connections) whose upsert takes --latency seconds plus
+--ms-per-mb per megabyte of request body, and fails a --fail-rate share of
+requests with HTTP 503. Vectors are random --dimension floats with the same
+metadata vectorize_chunks stores (chunk text of --words words included).
+Embedding is simulated with --embed-ms of sleep per 100 chunks, so the
+legacy loop (embed, upsert, embed, ...) can be compared with the engine, where
+embedding overlaps the uploads.
+
+Reports vectors/sec, requests, retries, the largest request, the most requests
+the stand-in served at once, and whether it received every vector.
+
+Usage: python benchmarks/bench_upserts.py [--vectors 3000] [--latency 0.05] [--fail-rate 0.05]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+from bench_pinecone_connections import StandInHandler, start_stand_in
+from pinecone_connection import PineconeConnectionManager
+from upsert_engine import UpsertEngine
+from vector_store import PineconeVectorStore
+
+LEGACY_BATCH = 100
+
+
+class UpsertStandInHandler(StandInHandler):
+
+    def do_POST(self):
+        if not self.path.startswith("/vectors/upsert"):
+            return super().do_POST()
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.max_request = max(server.max_request, length)
+            fail = server.rng.random() < server.fail_rate
+        time.sleep(server.latency + server.ms_per_mb * length / 1e6 / 1000)
+        with server.lock:
+            server.active -= 1
+            server.requests += 1
+        if fail:
+            self.send_error(503)
+            return
+        vectors = json.loads(body)["vectors"]
+        with server.lock:
+            server.received.update(vector["id"] for vector in vectors)
+        self._reply({"upsertedCount": len(vectors)})
+
+
+def start_upsert_stand_in(latency, ms_per_mb, fail_rate):
+    server = start_stand_in()
+    server.RequestHandlerClass = UpsertStandInHandler
+    server.latency, server.ms_per_mb, server.fail_rate = latency, ms_per_mb, fail_rate
+    server.rng = random.Random(0)
+    server.active = server.max_active = server.max_request = server.requests = 0
+    server.received = set()
+    return server
+
+
+def make_batches(n_vectors, dimension, words, rng):
+    vocabulary = [f"word{i}" for i in range(5000)]
+    batches = []
+    for start in range(0, n_vectors, LEGACY_BATCH):
+        ids = [f"chunk_{i}" for i in range(start, min(start + LEGACY_BATCH, n_vectors))]
+        vectors = np.random.default_rng(start).standard_normal((len(ids), dimension)).astype(np.float32)
+        metadata = [{"title": f"Article {i // 20}", "url": f"https://en.wikipedia.org/wiki/Article_{i // 20}",
+                     "chunk_index": float(i % 20), "text": " ".join(rng.choices(vocabulary, k=words))}
+                    for i in range(start, start + len(ids))]
+        batches.append((ids, vectors, metadata))
+    return batches
+
+
+def legacy_upserts(store, batches, embed_s):
+    # vectorize_chunks before the upsert engine: embed, then one blocking upsert per batch
+    failed = 0
+    for ids, vectors, metadata in batches:
+        time.sleep(embed_s)
+        try:
+            store.upsert(ids, vectors, metadata)
+        except Exception:
+            failed += len(ids)
+    return failed
+
+
+def engine_upserts(store, batches, embed_s, retry_delay):
+    engine = UpsertEngine(store, retry_delay=retry_delay)
+    for ids, vectors, metadata in batches:
+        time.sleep(embed_s)
+        engine.submit(ids, vectors, metadata)
+    engine.close()
+    return len(engine.failed_ids), engine
+
+
+def run(label, server, work):
+    server.received.clear()
+    server.max_active = server.max_request = server.requests = 0
+    start = time.perf_counter()
+    failed, *rest = work()
+    elapsed = time.perf_counter() - start
+    total = server.n_vectors
+    print(f"  {label:<22} {total / elapsed:9.0f} vectors/s  {elapsed:6.2f} s  {server.requests:5} requests"
+          f"  max {server.max_request / 1e6:5.2f} MB  {server.max_active} at once  failed {failed:5}"
+          f"  received {len(server.received)}/{total}")
+    return elapsed, rest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=3000)
+    parser.add_argument("--dimension", type=int, default=config.EMBEDDING_DIMENSION)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--ms-per-mb", type=float, default=50.0)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--embed-ms", type=float, default=30.0)
+    parser.add_argument("--retry-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    batches = make_batches(args.vectors, args.dimension, args.words, random.Random(0))
+    server = start_upsert_stand_in(args.latency, args.ms_per_mb, args.fail_rate)
+    server.n_vectors = args.vectors
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    store = PineconeVectorStore()
+    store.connections = PineconeConnectionManager(api_key="stand-in", index_host=host)
+    print(f"{args.vectors} vectors of {args.dimension} dims + {args.words}-word text; upsert latency "
+          f"{args.latency}s + {args.ms_per_mb} ms/MB, {args.fail_rate:.0%} of requests fail, "
+          f"embedding {args.embed_ms} ms per {LEGACY_BATCH} chunks")
+
+    embed_s = args.embed_ms / 1000
+    legacy_s, _ = run("serial batches of 100", server, lambda: (legacy_upserts(store, batches, embed_s),))
+    engine_s, (engine,) = run(f"engine, {config.UPSERT_MAX_IN_FLIGHT} in flight", server,
+                              lambda: engine_upserts(store, batches, embed_s, args.retry_delay))
+    stats = engine.stats()
+    print(f"  {legacy_s / engine_s:.1f}x faster; engine: {stats['batches']} batches, {stats['retries']} retries, "
+          f"embedding blocked {stats['blocked_seconds']:.2f}s waiting for a free slot")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
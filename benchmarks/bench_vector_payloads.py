@@ -0,0 +1,184 @@
+"""
+Benchmark: vector metadata with the chunk text (the old payload) vs slim
+metadata (title, url, chunk_index; VECTOR_METADATA_TEXT = False).
+
+Pinecone: the chunks are upserted with the UpsertEngine into a local stand-in
+of the data plane that keeps what it receives and serves it back on fetch,
+with --ms-per-mb of simulated transfer time. Reported: upsert request bytes,
+index record bytes per million vectors (4 bytes per dimension plus id and
+metadata, what storage is billed on) with the monthly cost at --price-per-gb,
+and the latency and response size of fetching the top 10 ids, as
+get_chunk_details used to.
+
+Local store: files on disk after a flush, and the time to load the store and
+fetch from it in a fresh instance.
+
+Chunks are synthetic texts of --words words with --dimension random vectors.
+
+Usage: python benchmarks/bench_vector_payloads.py [--chunks 5000] [--fetches 200]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+from bench_pinecone_connections import StandInHandler, start_stand_in
+from ingestionPipeline.vectorize_chunks import embedding_texts, vector_metadata
+from pinecone_connection import PineconeConnectionManager
+from upsert_engine import UpsertEngine
+from vector_store import LocalVectorStore, PineconeVectorStore
+
+FETCH_TOP_N = 10
+
+
+class StoringStandInHandler(StandInHandler):
+    """Stand-in data plane that stores upserted vectors and returns them on fetch."""
+
+    def _transfer(self, size):
+        time.sleep(self.server.ms_per_mb * size / 1e6 / 1000)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/vectors/fetch":
+            return super().do_GET()
+        ids = parse_qs(url.query).get("ids", [])
+        body = json.dumps({"vectors": {i: self.server.vectors[i] for i in ids if i in self.server.vectors},
+                           "namespace": "", "usage": {"readUnits": 1}}).encode("utf-8")
+        self._transfer(len(body))
+        with self.server.lock:
+            self.server.fetch_bytes += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.startswith("/vectors/upsert"):
+            return super().do_POST()
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        self._transfer(length)
+        vectors = json.loads(body)["vectors"]
+        with self.server.lock:
+            self.server.upsert_bytes += length
+            for vector in vectors:
+                self.server.vectors[vector["id"]] = vector
+        self._reply({"upsertedCount": len(vectors)})
+
+
+def make_chunks(n_chunks, words, rng):
+    vocabulary = [f"word{i}" for i in range(5000)]
+    return [{"chunk_id": f"chunk_{i:06d}", "title": f"Article {i // 20}",
+             "url": f"https://en.wikipedia.org/wiki/Article_{i // 20}",
+             "content": " ".join(rng.choices(vocabulary, k=words)), "metadata": {"chunk_index": i % 20}}
+            for i in range(n_chunks)]
+
+
+def record_bytes(chunk_id, metadata, dimension):
+    return 4 * dimension + len(chunk_id) + len(json.dumps(metadata))
+
+
+def pinecone_mode(label, chunks, vectors, metadata, args, queries):
+    server = start_stand_in()
+    server.RequestHandlerClass = StoringStandInHandler
+    server.ms_per_mb = args.ms_per_mb
+    server.vectors, server.upsert_bytes, server.fetch_bytes = {}, 0, 0
+    store = PineconeVectorStore()
+    store.connections = PineconeConnectionManager(api_key="stand-in",
+                                                  index_host=f"http://127.0.0.1:{server.server_address[1]}")
+    ids = [chunk["chunk_id"] for chunk in chunks]
+
+    start = time.perf_counter()
+    engine = UpsertEngine(store)
+    engine.submit(ids, vectors, metadata)
+    engine.close()
+    upsert_s = time.perf_counter() - start
+
+    store.fetch(queries[0])  # connection set up outside the timing
+    server.fetch_bytes = 0
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        store.fetch(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    storage = sum(record_bytes(chunk_id, meta, args.dimension) for chunk_id, meta in zip(ids, metadata))
+    server.shutdown()
+    return {"label": label, "upsert_mb": server.upsert_bytes / 1e6, "upsert_s": upsert_s,
+            "fetch_p50": statistics.median(timings), "fetch_p95": timings[int(len(timings) * 0.95)],
+            "fetch_kb": server.fetch_bytes / len(queries) / 1024, "storage_gb": storage / 1e9 * 1e6 / len(ids)}
+
+
+def local_mode(label, chunks, vectors, metadata, queries):
+    directory = tempfile.mkdtemp(prefix="bench_vector_payloads_")
+    try:
+        store = LocalVectorStore(directory=directory)
+        store.upsert([chunk["chunk_id"] for chunk in chunks], vectors, metadata)
+        store.flush()
+        disk = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        start = time.perf_counter()
+        fresh = LocalVectorStore(directory=directory)
+        for query in queries:
+            fresh.ensure_loaded().fetch(query)
+        load_s = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+    return {"label": label, "disk_mb": disk / 1e6, "load_s": load_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=config.EMBEDDING_DIMENSION)
+    parser.add_argument("--fetches", type=int, default=200)
+    parser.add_argument("--ms-per-mb", type=float, default=50.0)
+    parser.add_argument("--price-per-gb", type=float, default=0.33, help="storage price per GB-month")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    chunks = make_chunks(args.chunks, args.words, rng)
+    vectors = np.random.default_rng(0).standard_normal((len(chunks), args.dimension)).astype(np.float32)
+    queries = [[chunk["chunk_id"] for chunk in rng.sample(chunks, FETCH_TOP_N)] for _ in range(args.fetches)]
+    texts = embedding_texts(chunks)
+    modes = []
+    for label, with_text in (("text in metadata", True), ("slim metadata", False)):
+        config.VECTOR_METADATA_TEXT = with_text
+        modes.append((label, vector_metadata(chunks, texts)))
+    print(f"{len(chunks)} chunks of {args.words} words, {args.dimension} dims; "
+          f"{args.fetches} fetches of {FETCH_TOP_N} ids; transfer {args.ms_per_mb} ms/MB")
+
+    print(f"\nPinecone (stand-in):")
+    print(f"  {'mode':<18} {'upsert MB':>10} {'upsert s':>9} {'fetch p50':>10} {'fetch p95':>10} {'KiB/fetch':>10}"
+          f" {'GB/1M vec':>10} {'$/month':>8}")
+    results = [pinecone_mode(label, chunks, vectors, metadata, args, queries) for label, metadata in modes]
+    for r in results:
+        print(f"  {r['label']:<18} {r['upsert_mb']:10.1f} {r['upsert_s']:9.2f} {r['fetch_p50']:8.2f}ms"
+              f" {r['fetch_p95']:8.2f}ms {r['fetch_kb']:10.1f} {r['storage_gb']:10.2f}"
+              f" {r['storage_gb'] * args.price_per_gb:8.2f}")
+    full, slim = results
+    print(f"  slim: {1 - slim['upsert_mb'] / full['upsert_mb']:.0%} fewer upsert bytes, "
+          f"fetch p50 {full['fetch_p50'] / slim['fetch_p50']:.1f}x faster, "
+          f"{1 - slim['storage_gb'] / full['storage_gb']:.0%} less index storage")
+
+    print(f"\nLocal store:")
+    print(f"  {'mode':<18} {'disk MB':>10} {'load+fetch s':>13}")
+    results = [local_mode(label, chunks, vectors, metadata, queries) for label, metadata in modes]
+    for r in results:
+        print(f"  {r['label']:<18} {r['disk_mb']:10.1f} {r['load_s']:13.3f}")
+
+
+if __name__ == "__main__":
+    main()
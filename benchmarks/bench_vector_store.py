@@ -0,0 +1,96 @@
+"""
+Benchmark: dense top-k query latency per vector store backend.
+
+Fills LocalVectorStore with clustered random vectors at the all-mpnet-base-v2
+dimension (sentence embeddings cluster by topic; isotropic noise is a
+degenerate case for any ANN index) and reports p50/p95 query latency for
+exact float32, exact float16 and HNSW (if hnswlib is installed), plus
+recall@k against exact float32 search.
+With --pinecone the same queries are also sent to the configured
+Pinecone index (needs network access and the API key in config.py).
+
+Usage: python benchmarks/bench_vector_store.py [--sizes 10000 100000] [--queries 200] [--pinecone]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from vector_store import LocalVectorStore, PineconeVectorStore
+
+TOP_K = 10
+WRITE_BATCH = 10000
+N_TOPICS = 200
+
+
+def clustered(rng, centers, n, noise=0.5):
+    return (centers[rng.integers(0, len(centers), n)] + noise * rng.standard_normal((n, centers.shape[1]))).astype(np.float32)
+
+
+def latency(store, queries):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([chunk_id for chunk_id, _ in store.query(query, TOP_K)])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)], results
+
+
+def fill(directory, dtype, index_type, vectors):
+    store = LocalVectorStore(directory, dtype=dtype, index_type=index_type)
+    for start in range(0, len(vectors), WRITE_BATCH):
+        block = vectors[start:start + WRITE_BATCH]
+        store.upsert([f"chunk_{i}" for i in range(start, start + len(block))], block)
+    started = time.perf_counter()
+    store.flush()
+    return store, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pinecone", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        import hnswlib  # noqa: F401
+        backends = [("float32", "exact"), ("float16", "exact"), ("float32", "hnsw")]
+    except ImportError:
+        print("hnswlib not installed, skipping HNSW")
+        backends = [("float32", "exact"), ("float16", "exact")]
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((N_TOPICS, config.EMBEDDING_DIMENSION))
+    queries = clustered(rng, centers, args.queries)
+
+    for size in args.sizes:
+        vectors = clustered(rng, centers, size)
+        print(f"\n{size:,} vectors x {config.EMBEDDING_DIMENSION} dims, top-{TOP_K}, {args.queries} queries")
+        exact = None
+        with tempfile.TemporaryDirectory() as tmp:
+            for dtype, index_type in backends:
+                store, build = fill(os.path.join(tmp, f"{dtype}_{index_type}"), dtype, index_type, vectors)
+                p50, p95, results = latency(store, queries)
+                line = f"  local {index_type:<5} {dtype:<7}  p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   flush {build:6.1f}s"
+                if exact is None:
+                    exact = results
+                else:
+                    recall = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(results, exact)])
+                    line += f"   recall@{TOP_K} {recall:.3f}"
+                print(line)
+
+    if args.pinecone:
+        p50, p95, _ = latency(PineconeVectorStore(), queries)
+        print(f"\n  pinecone ({config.PINECONE_INDEX_NAME})  p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
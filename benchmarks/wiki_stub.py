@@ -0,0 +1,192 @@
+"""
+Local stand-in for the MediaWiki action API, serving canned JSON.
+
+Supports what the ingestion fetchers use:
+  action=parse&page=T&prop=text[&section=0]     rendered HTML with an infobox (lead section only)
+  action=query&titles=A|B&prop=extracts|info     plain-text extracts, lastrevid, length
+  redirects=1                                    redirect resolution ("redirects" list)
+  list=categorymembers&cmtitle=C                 category members (titles and namespaces)
+  generator=categorymembers&gcmtitle=C&prop=info members with length and fullurl
+with TextExtracts' limits (up to 20 extracts per response with exintro, 1 for
+whole articles) and "continue" tokens for the rest, also for category listings
+(up to 500 members per response). Each response is delayed by `latency`
+seconds, and every `fail_every`-th request gets a 503 so client retries are
+exercised.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_TITLES = 50
+MAX_MEMBERS = 500
+NS_CATEGORY = 14
+
+
+def make_article(title, words=2000):
+    return " ".join(f"{title.split()[0].lower()}{i % 97}" for i in range(words))
+
+
+def make_article_html(title, text, sections=8):
+    """Rendered-page-like HTML: infobox and lead paragraph, then the text in sections and a navbox."""
+    infobox = (
+        '<table class="infobox vcard"><tbody><tr><th colspan="2" class="infobox-above">' + title + '</th></tr>'
+        '<tr><th scope="row" class="infobox-label">Name</th><td class="infobox-data">' + title + '</td></tr>'
+        '<tr><th scope="row" class="infobox-label">Type</th><td class="infobox-data">Article'
+        '<sup id="cite_ref-1" class="reference"><a href="#cite_note-1">[1]</a></sup></td></tr></tbody></table>'
+    )
+    words = text.split()
+    size = max(1, len(words) // (sections + 1))
+    paragraphs = [
+        "<p>" + " ".join(f'<a href="/wiki/{w}" title="{w}">{w}</a>' if i % 7 == 0 else w
+                         for i, w in enumerate(words[start:start + size])) + "</p>"
+        for start in range(0, len(words), size)
+    ]
+    body = [infobox, paragraphs[0]]
+    for i, paragraph in enumerate(paragraphs[1:], start=1):
+        body.append(f'<div class="mw-heading mw-heading2"><h2 id="Section_{i}">Section {i}</h2></div>{paragraph}')
+    body.append('<table class="navbox"><tbody>' + "".join(
+        f'<tr><th class="navbox-group">Group {i}</th><td class="navbox-list">{" ".join(words[:30])}</td></tr>'
+        for i in range(10)) + '</tbody></table>')
+    return '<div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">' + "".join(body) + '</div>'
+
+
+class WikiStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            failing = server.fail_every and server.requests % server.fail_every == 0
+        time.sleep(server.latency)
+        if failing:
+            self._reply({"error": {"code": "unavailable"}}, status=503)
+            return
+
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if params.get("action") == "parse":
+            self._reply(self._parse(params["page"], params.get("section")))
+        elif params.get("action") == "query":
+            self._reply(self._query(params))
+        else:
+            self._reply({"error": {"code": "badvalue"}})
+
+    def _resolve(self, title):
+        return self.server.redirects.get(title, title)
+
+    def _parse(self, page, section=None):
+        title = self._resolve(page)
+        if title not in self.server.articles:
+            return {"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}
+        html = self.server.rendered.get(title)
+        if html is None:
+            html = self.server.rendered[title] = make_article_html(title, self.server.articles[title])
+        heading = html.find('<div class="mw-heading')
+        if section == "0" and heading != -1:
+            # the lead: everything before the first heading
+            html = html[:heading] + '</div>'
+        return {"parse": {"title": title, "pageid": self.server.page_ids[title], "text": {"*": html}}}
+
+    def _members(self, category, limit, offset):
+        members = self.server.categories.get(category, [])
+        limit = MAX_MEMBERS if limit in (None, "max") else min(int(limit), MAX_MEMBERS)
+        offset = int(offset or 0)
+        more = offset + limit < len(members)
+        return members[offset:offset + limit], (offset + limit if more else None)
+
+    def _info(self, title, props, params):
+        page = {"pageid": self.server.page_ids[title], "ns": NS_CATEGORY if title.startswith("Category:") else 0, "title": title}
+        if "info" in props and title in self.server.articles:
+            page["lastrevid"] = self.server.revisions[title]
+            page["length"] = len(self.server.articles[title])
+        if "info" in props and "url" in params.get("inprop", ""):
+            page["fullurl"] = "https://en.wikipedia.org/wiki/" + title.replace(" ", "_")
+        return page
+
+    def _query(self, params):
+        props = params.get("prop", "").split("|")
+        if params.get("list") == "categorymembers":
+            members, more = self._members(params.get("cmtitle"), params.get("cmlimit"), params.get("cmcontinue"))
+            response = {"continue": {"cmcontinue": more, "continue": "-||"}} if more else {"batchcomplete": ""}
+            response["query"] = {"categorymembers": [
+                {"pageid": self.server.page_ids[t], "ns": NS_CATEGORY if t.startswith("Category:") else 0, "title": t}
+                for t in members]}
+            return response
+        if params.get("generator") == "categorymembers":
+            members, more = self._members(params.get("gcmtitle"), params.get("gcmlimit"), params.get("gcmcontinue"))
+            response = {"continue": {"gcmcontinue": more, "continue": "gcmcontinue||"}} if more else {"batchcomplete": ""}
+            response["query"] = {"pages": {str(self.server.page_ids[t]): self._info(t, props, params) for t in members}}
+            return response
+
+        titles = params.get("titles", "").split("|")[:MAX_TITLES]
+        query, pages = {}, {}
+
+        if params.get("redirects"):
+            redirects = [{"from": t, "to": self.server.redirects[t]} for t in titles if t in self.server.redirects]
+            if redirects:
+                query["redirects"] = redirects
+        resolved = list(dict.fromkeys(self._resolve(t) if params.get("redirects") else t for t in titles))
+
+        # TextExtracts returns whole-article extracts one page at a time
+        limit = 20 if params.get("exintro") else 1
+        offset = int(params.get("excontinue", 0))
+        served = 0
+        for i, title in enumerate(resolved):
+            if title not in self.server.articles:
+                pages[str(-1 - i)] = {"ns": 0, "title": title, "missing": ""}
+                continue
+            page_id = self.server.page_ids[title]
+            page = self._info(title, props, params)
+            if "extracts" in props and i >= offset and served < limit:
+                page["extract"] = self.server.articles[title]
+                served += 1
+            pages[str(page_id)] = page
+
+        response = {"batchcomplete": ""}
+        if "extracts" in props and offset + served < len(resolved) and served == limit:
+            response = {"continue": {"excontinue": offset + served, "continue": "||"}}
+        query["pages"] = pages
+        response["query"] = query
+        return response
+
+
+def start_wiki_stub(articles, redirects=None, latency=0.0, fail_every=0, categories=None):
+    """
+    Serve {title: text} (and {category: [member titles]}) on a free local port;
+    returns the server (api url in server.api_url).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WikiStubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.bytes_sent = 0
+    server.rendered = {}
+    server.connections = set()
+    server.latency = latency
+    server.fail_every = fail_every
+    server.articles = dict(articles)
+    server.redirects = dict(redirects or {})
+    server.categories = dict(categories or {})
+    names = list(server.articles) + [cat for cat in server.categories if cat not in server.articles]
+    server.page_ids = {title: 1000 + i for i, title in enumerate(names)}
+    server.revisions = {title: 500000 + i for i, title in enumerate(server.articles)}
+    server.api_url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
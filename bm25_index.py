@@ -0,0 +1,436 @@
+"""
+Inverted-index BM25 engine used by the sparse retrieval path.
+
+Scores are identical to rank_bm25.BM25Okapi, but postings (doc ids and term
+frequencies per term) are stored in CSR-style NumPy arrays so a query only
+touches the documents that contain its terms.
+
+On disk the index is a single little-endian file that is opened with mmap,
+so every process shares one page-cached copy and loading does not depend on
+corpus size:
+
+    MAGIC (8 bytes) | header length (uint64) | JSON header | aligned sections
+
+The JSON header carries the format version, BM25 parameters, corpus hash,
+collection statistics and the offset/dtype/count of every section
+(vocabulary table, CSR postings, doc lengths, per-term bounds, chunk ids).
+"""
+import json
+import mmap
+import os
+from collections import Counter
+
+import numpy as np
+
+import config
+
+MAGIC = b"HRBM25\x00\x00"
+FORMAT_VERSION = 1
+_ALIGN = 8
+
+# Section name -> on-disk dtype (explicit little-endian so files are portable)
+_SECTIONS = {
+    "term_offsets": "<i8",
+    "term_blob": "u1",
+    "indptr": "<i8",
+    "doc_ids": "<i4",
+    "tfs": "<i4",
+    "doc_len": "<i4",
+    "max_tf": "<i4",
+    "min_doc_len": "<i4",
+    "chunk_offsets": "<i8",
+    "chunk_blob": "u1",
+}
+
+
+def _padding(size):
+    return -size % _ALIGN
+
+
+class StringTable:
+    """Read-only list of strings stored as a utf-8 blob plus offsets (works directly on mmap'd arrays)."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def find(self, s):
+        """Index of s in a sorted table, or -1 (binary search, no dict has to be built at load time)."""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid] < s:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self[lo] == s:
+            return lo
+        return -1
+
+
+class InvertedBM25:
+    def __init__(self, terms, indptr, doc_ids, tfs, doc_len, chunk_ids=None,
+                 k1=config.BM25_K1, b=config.BM25_B, epsilon=config.BM25_EPSILON,
+                 corpus_hash="", bounds=None, average_idf=None, total_doc_len=None):
+        """
+        terms: StringTable of the vocabulary, sorted; term id = position in the table
+        indptr: int64[n_terms + 1], postings of term t are doc_ids/tfs[indptr[t]:indptr[t + 1]]
+        doc_ids: int32[n_postings], sorted ascending within each term
+        tfs: int32[n_postings]
+        doc_len: int32[n_docs], number of tokens per document
+        chunk_ids: StringTable (or list) mapping doc index -> chunk_id
+        """
+        self.terms = terms
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        if chunk_ids is not None and not isinstance(chunk_ids, StringTable):
+            chunk_ids = StringTable.from_strings(chunk_ids)
+        self.chunk_ids = chunk_ids
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.corpus_hash = corpus_hash
+
+        self.corpus_size = len(doc_len)
+        self.total_doc_len = total_doc_len if total_doc_len is not None else int(doc_len.sum())
+        self.avgdl = self.total_doc_len / self.corpus_size
+        self.max_tf, self.min_doc_len = bounds if bounds is not None else self._posting_bounds()
+        self.average_idf = average_idf if average_idf is not None else self._average_idf()
+        # Optional bool[n_docs] tombstones, set when the index is a segment of a SegmentedBM25
+        self.deleted = None
+
+    def _posting_bounds(self):
+        # Per-term max tf and min doc length; together they bound any posting's BM25 contribution
+        starts = self.indptr[:-1]
+        if not len(starts):
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        max_tf = np.maximum.reduceat(self.tfs, starts)
+        min_doc_len = np.minimum.reduceat(self.doc_len[self.doc_ids], starts)
+        return max_tf, min_doc_len
+
+    def _average_idf(self):
+        if len(self.terms) == 0:
+            return 0.0
+        return float(raw_idf(self.corpus_size, np.diff(self.indptr)).sum() / len(self.terms))
+
+    @classmethod
+    def build(cls, tokenized_corpus, chunk_ids=None,
+              k1=config.BM25_K1, b=config.BM25_B, epsilon=config.BM25_EPSILON, corpus_hash=""):
+        vocab = {}
+        term_ids, doc_ids, tfs, doc_len = [], [], [], []
+
+        for doc_id, tokens in enumerate(tokenized_corpus):
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        return cls.from_postings(
+            list(vocab), term_ids, doc_ids, tfs, doc_len, chunk_ids=chunk_ids,
+            k1=k1, b=b, epsilon=epsilon, corpus_hash=corpus_hash
+        )
+
+    @classmethod
+    def from_postings(cls, terms, term_ids, doc_ids, tfs, doc_len, chunk_ids=None, **params):
+        """
+        Build the CSR index from one (term id, doc id, tf) entry per term occurring in a document.
+        terms[term_id] is the term string; term ids are re-assigned in sorted term order.
+        """
+        term_order = sorted(range(len(terms)), key=terms.__getitem__)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[term_order] = np.arange(len(terms))
+
+        term_ids = rank[np.asarray(term_ids, dtype=np.int64)]
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        # By term, then ascending doc id inside each posting list
+        order = np.lexsort((doc_ids, term_ids))
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=indptr[1:])
+
+        return cls(
+            StringTable.from_strings([terms[i] for i in term_order]),
+            indptr,
+            doc_ids[order],
+            np.asarray(tfs, dtype=np.int32)[order],
+            np.asarray(doc_len, dtype=np.int32),
+            chunk_ids=chunk_ids,
+            **params
+        )
+
+    def save(self, path):
+        """Write the index atomically so processes with the old file mapped keep a consistent view."""
+        if self.chunk_ids is None:
+            raise ValueError("chunk_ids are required to save a BM25 index")
+        arrays = {
+            "term_offsets": self.terms.offsets,
+            "term_blob": self.terms.blob,
+            "indptr": self.indptr,
+            "doc_ids": self.doc_ids,
+            "tfs": self.tfs,
+            "doc_len": self.doc_len,
+            "max_tf": self.max_tf,
+            "min_doc_len": self.min_doc_len,
+            "chunk_offsets": self.chunk_ids.offsets,
+            "chunk_blob": self.chunk_ids.blob,
+        }
+
+        sections = {}
+        offset = 0
+        for name, dtype in _SECTIONS.items():
+            count = len(arrays[name])
+            sections[name] = {"offset": offset, "dtype": dtype, "count": count}
+            offset += count * np.dtype(dtype).itemsize
+            offset += _padding(offset)
+
+        header = json.dumps({
+            "format_version": FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "corpus_hash": self.corpus_hash,
+            "n_docs": self.corpus_size,
+            "n_terms": len(self.terms),
+            "n_postings": len(self.doc_ids),
+            "total_doc_len": self.total_doc_len,
+            "average_idf": self.average_idf,
+            "sections": sections,
+        }).encode('utf-8')
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header + b"\x00" * _padding(len(header)))
+            for name, dtype in _SECTIONS.items():
+                data = np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()
+                f.write(data + b"\x00" * _padding(len(data)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Open an index file via mmap; arrays are read-only views into the shared page cache."""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a BM25 index file (rebuild it with build_bm25_index)")
+        header_len = int.from_bytes(mm[8:16], 'little')
+        header = json.loads(mm[16:16 + header_len].decode('utf-8'))
+        if header["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has BM25 index format {header['format_version']}, expected {FORMAT_VERSION}"
+            )
+
+        data_start = 16 + header_len + _padding(header_len)
+        arrays = {}
+        for name, section in header["sections"].items():
+            dtype = np.dtype(section["dtype"])
+            if section["count"] == 0:
+                arrays[name] = np.zeros(0, dtype=dtype)
+            else:
+                arrays[name] = np.frombuffer(mm, dtype=dtype, count=section["count"],
+                                             offset=data_start + section["offset"])
+
+        return cls(
+            StringTable(arrays["term_offsets"], arrays["term_blob"]),
+            arrays["indptr"],
+            arrays["doc_ids"],
+            arrays["tfs"],
+            arrays["doc_len"],
+            chunk_ids=StringTable(arrays["chunk_offsets"], arrays["chunk_blob"]),
+            k1=header["k1"],
+            b=header["b"],
+            epsilon=header["epsilon"],
+            corpus_hash=header["corpus_hash"],
+            bounds=(arrays["max_tf"], arrays["min_doc_len"]),
+            average_idf=header["average_idf"],
+            total_doc_len=header["total_doc_len"],
+        )
+
+    def term_id(self, term):
+        """Term id for a token, or None if it is not in the vocabulary."""
+        term_id = self.terms.find(term)
+        return term_id if term_id >= 0 else None
+
+    def postings(self, term_id):
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def live_postings(self, term_id):
+        docs, tf = self.postings(term_id)
+        if self.deleted is None:
+            return docs, tf
+        live = ~self.deleted[docs]
+        return docs[live], tf[live]
+
+    def df(self, term_id):
+        """Number of live documents containing the term."""
+        if self.deleted is None:
+            return int(self.indptr[term_id + 1] - self.indptr[term_id])
+        return len(self.live_postings(term_id)[0])
+
+    def idf_for_df(self, df):
+        return bm25_idf(self.corpus_size, df, self.epsilon, self.average_idf)
+
+    def query_terms(self, query):
+        """(term id, idf) for every query token in the vocabulary, using this index's own statistics."""
+        weights = []
+        for q in query:
+            term_id = self.term_id(q)
+            if term_id is not None:
+                weights.append((term_id, self.idf_for_df(self.df(term_id))))
+        return weights
+
+    def term_upper_bound(self, term_id, idf, avgdl):
+        """Upper bound of a single term's contribution to any document's score."""
+        tf = float(self.max_tf[term_id])
+        norm = self.k1 * (1 - self.b + self.b * float(self.min_doc_len[term_id]) / avgdl)
+        return max(idf * (tf * (self.k1 + 1) / (tf + norm)), 0.0)
+
+    def _term_scores(self, idf, docs, tf, avgdl):
+        tf = tf.astype(np.float64)
+        # Length normalisation computed only for the documents this term touches
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / avgdl)
+        return idf * (tf * (self.k1 + 1) / (tf + norm))
+
+    def get_scores(self, query):
+        """BM25 score of every document for a tokenized query (drop-in for BM25Okapi.get_scores)."""
+        return self.score_terms(self.query_terms(query))
+
+    def top_k(self, query, k, mode="exact"):
+        """
+        Top-k (doc indices, scores) for a tokenized query, best first.
+
+        mode="exact" ranks every document exactly like sorting get_scores (ties by doc index).
+        mode="maxscore" uses MaxScore early termination and only returns matching documents.
+        """
+        return self.top_k_terms(self.query_terms(query), k, mode=mode)
+
+    def score_terms(self, weights, avgdl=None):
+        """Scores of every document for (term id, idf) pairs; avgdl defaults to this index's own."""
+        avgdl = avgdl or self.avgdl
+        scores = np.zeros(self.corpus_size)
+        for term_id, idf in weights:
+            docs, tf = self.postings(term_id)
+            scores[docs] += self._term_scores(idf, docs, tf, avgdl)
+        return scores
+
+    def top_k_terms(self, weights, k, mode="exact", avgdl=None):
+        """top_k for (term id, idf) pairs, so collection-wide statistics can be supplied by the caller."""
+        avgdl = avgdl or self.avgdl
+        if mode == "maxscore":
+            return self._top_k_maxscore(weights, k, avgdl)
+
+        scores = self.score_terms(weights, avgdl)
+        if self.deleted is None:
+            return select_top_k(scores, k)
+        scores[self.deleted] = -np.inf
+        top, top_scores = select_top_k(scores, k)
+        live = np.isfinite(top_scores)
+        return top[live], top_scores[live]
+
+    def _top_k_maxscore(self, weights, k, avgdl):
+        # Repeated query tokens add their contribution once per occurrence
+        qtfs = Counter(term_id for term_id, _ in weights)
+        idfs = dict(weights)
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if not qtfs or k <= 0:
+            return empty
+
+        # Visit terms by decreasing impact; rest_bound[i] bounds what terms i.. can still add
+        bound = {term_id: qtf * self.term_upper_bound(term_id, idfs[term_id], avgdl) for term_id, qtf in qtfs.items()}
+        terms = sorted(qtfs, key=lambda term_id: -bound[term_id])
+        rest_bound = np.concatenate([np.cumsum([bound[t] for t in terms][::-1])[::-1], [0.0]])
+
+        scores = np.zeros(self.corpus_size)
+        candidates = np.zeros(0, dtype=np.int64)
+        threshold = -np.inf
+        i = 0
+
+        # Essential terms: score every live posting until the remaining terms alone can no
+        # longer lift an unseen document above the current k-th best score
+        while i < len(terms):
+            term_id = terms[i]
+            docs, tf = self.live_postings(term_id)
+            scores[docs] += qtfs[term_id] * self._term_scores(idfs[term_id], docs, tf, avgdl)
+            candidates = np.union1d(candidates, docs)
+            i += 1
+            if len(candidates) >= k:
+                threshold = _kth_largest(scores[candidates], k)
+                if rest_bound[i] < threshold:
+                    break
+
+        # Non-essential terms: only look up postings of surviving candidates, skipping the rest
+        while i < len(terms) and len(candidates):
+            candidates = candidates[scores[candidates] + rest_bound[i] >= threshold]
+            term_id = terms[i]
+            docs, tf = self.postings(term_id)
+            if len(candidates) <= len(docs):
+                pos = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+                hit = docs[pos] == candidates
+                hit_docs, hit_tf = candidates[hit], tf[pos[hit]]
+            else:
+                pos = np.minimum(np.searchsorted(candidates, docs), len(candidates) - 1)
+                hit = candidates[pos] == docs
+                hit_docs, hit_tf = docs[hit], tf[hit]
+            scores[hit_docs] += qtfs[term_id] * self._term_scores(idfs[term_id], hit_docs, hit_tf, avgdl)
+            threshold = max(threshold, _kth_largest(scores[candidates], k))
+            i += 1
+
+        top = select_top_k(scores[candidates], k)[0]
+        top = candidates[top]
+        return top, scores[top]
+
+
+def bm25_idf(n_docs, df, epsilon, average_idf):
+    # Same formula as BM25Okapi: negative idfs are floored to epsilon * average idf
+    idf = raw_idf(n_docs, np.float64(df))
+    return epsilon * average_idf if idf < 0 else float(idf)
+
+
+def raw_idf(n_docs, doc_freqs):
+    return np.log(n_docs - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+
+
+def _kth_largest(values, k):
+    if len(values) < k:
+        return -np.inf
+    return np.partition(values, len(values) - k)[len(values) - k]
+
+
+def select_top_k(scores, k):
+    """
+    Indices and values of the k highest scores, best first, without a full sort.
+    Ties are broken by lower index, matching a stable descending sort.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+
+    top = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return top, scores[top]
@@ -0,0 +1,338 @@
+"""
+Segmented BM25 index with incremental updates (Lucene-style).
+
+The index directory holds immutable segment files in the bm25_index format,
+tombstone files and a manifest:
+
+    segments.json              generation, segment list, collection statistics
+    seg_00000003.bin           InvertedBM25 file with the chunks added by one update
+    seg_00000003.del.7.npy     deleted flags of that segment as of generation 7
+
+Adding or replacing chunks writes a new segment and tombstones older copies of
+the same chunk ids; deleting only writes tombstones. Collection statistics
+(live doc count, total doc length, average idf) are recomputed on commit, so
+scores stay identical to a BM25Okapi built over the live chunks. Segments are
+merged from their postings, without re-tokenizing, once there are too many of
+them or too many deleted documents.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+import config
+from bm25_index import InvertedBM25, bm25_idf, raw_idf
+
+MANIFEST_FILE = "segments.json"
+MANIFEST_VERSION = 1
+_SEGMENT_FILE = re.compile(r"^seg_\d{8}(\.bin|\.del\.\d+\.npy)$")
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _open_segment(directory, entry):
+    segment = InvertedBM25.load(os.path.join(directory, entry["name"]))
+    if entry["deleted"]:
+        segment.deleted = np.load(os.path.join(directory, entry["deleted"]), mmap_mode='r')
+    return segment
+
+
+def _live_doc_freqs(segment, deleted):
+    """Live document frequency of every term of a segment."""
+    if not deleted.any():
+        return np.diff(segment.indptr)
+    live = (~deleted[segment.doc_ids]).astype(np.int64)
+    return np.add.reduceat(live, segment.indptr[:-1]) if len(segment.terms) else np.zeros(0, dtype=np.int64)
+
+
+class SegmentedBM25:
+    """Read-only view of one generation of the segmented index."""
+
+    def __init__(self, directory, manifest, segments):
+        self.directory = directory
+        self.generation = manifest["generation"]
+        self.segments = segments
+        self.epsilon = manifest["epsilon"]
+        # Queries must be tokenized the way the index was built
+        self.tokenizer = manifest.get("tokenizer", "nltk")
+
+        stats = manifest["stats"]
+        self.corpus_size = stats["n_docs"]
+        self.avgdl = stats["total_doc_len"] / self.corpus_size if self.corpus_size else 0.0
+        self.average_idf = stats["average_idf"]
+
+    @classmethod
+    def open(cls, directory=config.BM25_INDEX_DIR, retries=3):
+        for attempt in range(retries):
+            manifest = read_manifest(directory)
+            if manifest is None:
+                raise FileNotFoundError(f"No BM25 index in {directory} (run build_bm25_index first)")
+            try:
+                segments = [_open_segment(directory, entry) for entry in manifest["segments"]]
+                return cls(directory, manifest, segments)
+            except FileNotFoundError:
+                # A concurrent commit replaced the manifest and removed its old segments; re-read it
+                if attempt == retries - 1:
+                    raise
+
+    def __len__(self):
+        return self.corpus_size
+
+    def _query_weights(self, query):
+        # Per segment (term id, idf) pairs; idf comes from the live document frequency over all segments
+        per_segment = [[] for _ in self.segments]
+        resolved = {}
+        for q in query:
+            if q not in resolved:
+                term_ids = [segment.term_id(q) for segment in self.segments]
+                df = sum(segment.df(t) for segment, t in zip(self.segments, term_ids) if t is not None)
+                idf = bm25_idf(self.corpus_size, df, self.epsilon, self.average_idf) if df else None
+                resolved[q] = (term_ids, idf)
+            term_ids, idf = resolved[q]
+            if idf is None:
+                continue
+            for weights, term_id in zip(per_segment, term_ids):
+                if term_id is not None:
+                    weights.append((term_id, idf))
+        return per_segment
+
+    def search(self, query, k, mode="exact"):
+        """Top-k (chunk_id, score) pairs for a tokenized query over all live chunks, best first."""
+        doc_idx, scores, owners = [], [], []
+        base = 0
+        for seg_no, (segment, weights) in enumerate(zip(self.segments, self._query_weights(query))):
+            top, top_scores = segment.top_k_terms(weights, k, mode=mode, avgdl=self.avgdl)
+            doc_idx.append(top + base)
+            scores.append(top_scores)
+            owners.append(np.full(len(top), seg_no))
+            base += segment.corpus_size
+        if not doc_idx:
+            return []
+
+        doc_idx, scores, owners = np.concatenate(doc_idx), np.concatenate(scores), np.concatenate(owners)
+        # Merge per-segment winners; ties go to the lower doc index, as in a single index
+        order = np.lexsort((doc_idx, -scores))[:k]
+        bases = np.cumsum([0] + [segment.corpus_size for segment in self.segments])
+        return [
+            (self.segments[owners[i]].chunk_ids[doc_idx[i] - bases[owners[i]]], float(scores[i]))
+            for i in order
+        ]
+
+
+class BM25IndexWriter:
+    """
+    Applies adds, replaces and deletes by chunk_id to the segmented index.
+    Nothing is visible to readers until commit() writes the new manifest.
+    """
+
+    def __init__(self, directory=config.BM25_INDEX_DIR, create=False,
+                 k1=config.BM25_K1, b=config.BM25_B, epsilon=config.BM25_EPSILON, tokenizer=config.BM25_TOKENIZER,
+                 max_segments=config.BM25_MAX_SEGMENTS, merge_deleted_ratio=config.BM25_MERGE_DELETED_RATIO):
+        """create=True starts an empty index (full rebuild) instead of updating the existing one."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.tokenizer = tokenizer
+        self.max_segments = max_segments
+        self.merge_deleted_ratio = merge_deleted_ratio
+
+        manifest = read_manifest(directory)
+        self.generation = manifest["generation"] if manifest else 0
+        self.next_segment = manifest["next_segment"] if manifest else 1
+        self.entries, self.segments, self.deleted = [], [], []
+        # Segments written with other BM25 parameters are rewritten on the next commit
+        self.params_changed = not create and bool(manifest) and (manifest["k1"], manifest["b"], manifest["epsilon"]) != (k1, b, epsilon)
+
+        if manifest and not create:
+            if manifest.get("tokenizer", "nltk") != tokenizer:
+                raise ValueError(
+                    f"BM25 index in {directory} was built with the '{manifest.get('tokenizer', 'nltk')}' tokenizer; "
+                    f"rebuild it to switch to '{tokenizer}'"
+                )
+            for entry in manifest["segments"]:
+                segment = _open_segment(directory, entry)
+                deleted = np.zeros(segment.corpus_size, dtype=bool) if segment.deleted is None else np.array(segment.deleted)
+                self.entries.append(dict(entry))
+                self.segments.append(segment)
+                self.deleted.append(deleted)
+
+        self.dirty = set()
+        self.locations = {}
+        for seg_no, (segment, deleted) in enumerate(zip(self.segments, self.deleted)):
+            for local in np.flatnonzero(~deleted):
+                self.locations[segment.chunk_ids[local]] = (seg_no, local)
+
+    def delete(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            location = self.locations.pop(chunk_id, None)
+            if location is not None:
+                seg_no, local = location
+                self.deleted[seg_no][local] = True
+                self.dirty.add(seg_no)
+
+    def add(self, chunk_ids, tokenized_corpus, corpus_hash=""):
+        """Add or replace chunks; older copies of the same chunk ids are tombstoned."""
+        chunk_ids = list(chunk_ids)
+        self.delete(chunk_ids)
+        if not chunk_ids:
+            return
+
+        name = f"seg_{self.next_segment:08d}.bin"
+        self.next_segment += 1
+        segment = InvertedBM25.build(tokenized_corpus, chunk_ids=chunk_ids,
+                                     k1=self.k1, b=self.b, epsilon=self.epsilon, corpus_hash=corpus_hash)
+        segment.save(os.path.join(self.directory, name))
+
+        self.entries.append({"name": name, "deleted": None})
+        self.segments.append(segment)
+        self.deleted.append(np.zeros(len(chunk_ids), dtype=bool))
+        seg_no = len(self.segments) - 1
+        for local, chunk_id in enumerate(chunk_ids):
+            # Duplicates inside one batch: the last occurrence wins
+            previous = self.locations.get(chunk_id)
+            if previous is not None:
+                self.deleted[seg_no][previous[1]] = True
+                self.dirty.add(seg_no)
+            self.locations[chunk_id] = (seg_no, local)
+
+    def _needs_merge(self):
+        if not self.segments:
+            return False
+        total = sum(segment.corpus_size for segment in self.segments)
+        n_deleted = sum(int(deleted.sum()) for deleted in self.deleted)
+        return (
+            self.params_changed
+            or len(self.segments) > self.max_segments
+            or (total > 0 and n_deleted / total > self.merge_deleted_ratio)
+        )
+
+    def _merge(self):
+        print(f"Merging {len(self.segments)} BM25 segments...")
+        name = f"seg_{self.next_segment:08d}.bin"
+        self.next_segment += 1
+        merged = merge_segments(self.segments, self.deleted, k1=self.k1, b=self.b, epsilon=self.epsilon)
+        merged.save(os.path.join(self.directory, name))
+
+        self.entries = [{"name": name, "deleted": None}]
+        self.segments = [merged]
+        self.deleted = [np.zeros(merged.corpus_size, dtype=bool)]
+        self.dirty = set()
+        self.params_changed = False
+
+    def commit(self):
+        """Write tombstones and the new manifest atomically, then drop files no longer referenced."""
+        self.generation += 1
+
+        # Fully deleted segments are dropped; their files are removed below
+        live = [i for i, deleted in enumerate(self.deleted) if not deleted.all()]
+        self.dirty = {live.index(i) for i in self.dirty if i in live}
+        self.entries = [self.entries[i] for i in live]
+        self.segments = [self.segments[i] for i in live]
+        self.deleted = [self.deleted[i] for i in live]
+
+        if self._needs_merge():
+            self._merge()
+
+        for seg_no in sorted(self.dirty):
+            entry = self.entries[seg_no]
+            name = f"{entry['name'][:-len('.bin')]}.del.{self.generation}.npy"
+            np.save(os.path.join(self.directory, name), self.deleted[seg_no])
+            entry["deleted"] = name
+        self.dirty = set()
+
+        n_docs = sum(int((~deleted).sum()) for deleted in self.deleted)
+        manifest = {
+            "format_version": MANIFEST_VERSION,
+            "generation": self.generation,
+            "next_segment": self.next_segment,
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "tokenizer": self.tokenizer,
+            "segments": self.entries,
+            "stats": {
+                "n_docs": n_docs,
+                "total_doc_len": sum(int(segment.doc_len[~deleted].sum())
+                                     for segment, deleted in zip(self.segments, self.deleted)),
+                "average_idf": self._average_idf(n_docs),
+            },
+        }
+
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        self._remove_unreferenced(manifest)
+        print(f"BM25 index generation {self.generation}: {len(self.segments)} segment(s), {n_docs} live chunks")
+
+    def _average_idf(self, n_docs):
+        # Mean raw idf over the live vocabulary of all segments, as BM25Okapi computes it
+        doc_freqs = Counter()
+        for segment, deleted in zip(self.segments, self.deleted):
+            live_df = _live_doc_freqs(segment, deleted)
+            for term_id in np.flatnonzero(live_df):
+                doc_freqs[segment.terms[term_id]] += int(live_df[term_id])
+        if not doc_freqs:
+            return 0.0
+        dfs = np.fromiter(doc_freqs.values(), dtype=np.float64, count=len(doc_freqs))
+        return float(raw_idf(n_docs, dfs).sum() / len(dfs))
+
+    def _remove_unreferenced(self, manifest):
+        referenced = set()
+        for entry in manifest["segments"]:
+            referenced.add(entry["name"])
+            if entry["deleted"]:
+                referenced.add(entry["deleted"])
+        for name in os.listdir(self.directory):
+            if _SEGMENT_FILE.match(name) and name not in referenced:
+                # Readers that still map the file keep their view until they reload
+                os.remove(os.path.join(self.directory, name))
+
+
+def merge_segments(segments, deleted, k1=config.BM25_K1, b=config.BM25_B, epsilon=config.BM25_EPSILON):
+    """Merge the live documents of several segments into one, straight from their postings."""
+    term_index = {}
+    term_ids, doc_ids, tfs, doc_len, chunk_ids = [], [], [], [], []
+    digest = hashlib.sha256()
+    base = 0
+
+    for segment, dead in zip(segments, deleted):
+        live = ~dead
+        new_doc_ids = np.cumsum(live) - 1 + base
+        keep = live[segment.doc_ids]
+
+        # Segment term id -> merged term id, only for terms that still have live postings
+        term_map = np.full(len(segment.terms), -1, dtype=np.int64)
+        for term_id in np.flatnonzero(_live_doc_freqs(segment, dead)):
+            term_map[term_id] = term_index.setdefault(segment.terms[term_id], len(term_index))
+
+        posting_terms = np.repeat(term_map, np.diff(segment.indptr))
+        term_ids.append(posting_terms[keep])
+        doc_ids.append(new_doc_ids[segment.doc_ids[keep]])
+        tfs.append(segment.tfs[keep])
+        doc_len.append(segment.doc_len[live])
+        chunk_ids.extend(segment.chunk_ids[i] for i in np.flatnonzero(live))
+        digest.update(segment.corpus_hash.encode('utf-8'))
+        base += int(live.sum())
+
+    digest.update("\0".join(chunk_ids).encode('utf-8'))
+    return InvertedBM25.from_postings(
+        list(term_index),
+        np.concatenate([np.zeros(0, dtype=np.int64)] + term_ids),
+        np.concatenate([np.zeros(0, dtype=np.int64)] + doc_ids),
+        np.concatenate([np.zeros(0, dtype=np.int32)] + tfs),
+        np.concatenate([np.zeros(0, dtype=np.int32)] + doc_len),
+        chunk_ids=chunk_ids,
+        k1=k1, b=b, epsilon=epsilon, corpus_hash=digest.hexdigest()
+    )
@@ -0,0 +1,173 @@
+"""
+Local chunk store: chunk text, title, url and metadata by chunk_id.
+
+Chunks live in one SQLite table (CHUNK_STORE_PATH) with chunk_id as its
+unique key, so opening the store costs the same for any corpus size and a
+point or batch lookup is an index probe instead of parsing the whole corpus.
+Ingestion appends/replaces chunks by id, and index builders stream them in
+insertion order in fixed-size batches. WAL mode lets the query path read
+while an ingest is writing.
+
+Chunks are returned as the same dicts ingestion produces:
+{"chunk_id", "title", "url", "chunk_index", "content", "metadata": {...}}.
+An existing files/metadata.json is migrated on first use.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+import config
+
+# The JSON corpus the pipeline used before the chunk store (read by the old utils.fetch_metadata)
+LEGACY_METADATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "files", "metadata.json")
+
+_COLUMNS = "chunk_id, title, url, chunk_index, content, metadata"
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+)
+"""
+_UPSERT = f"""
+INSERT INTO chunks ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(chunk_id) DO UPDATE SET
+    title = excluded.title, url = excluded.url, chunk_index = excluded.chunk_index,
+    content = excluded.content, metadata = excluded.metadata
+"""
+# Stay below SQLite's bound-variable limit in IN (...) lookups
+_MAX_VARIABLES = 900
+
+
+def _to_row(chunk):
+    return (chunk['chunk_id'], chunk['title'], chunk['url'], int(chunk['chunk_index']),
+            chunk['content'], json.dumps(chunk.get('metadata', {})))
+
+
+def _to_chunk(row):
+    chunk_id, title, url, chunk_index, content, metadata = row
+    return {
+        "chunk_id": chunk_id,
+        "title": title,
+        "url": url,
+        "chunk_index": chunk_index,
+        "content": content,
+        "metadata": json.loads(metadata),
+    }
+
+
+class ChunkStore:
+
+    def __init__(self, path=config.CHUNK_STORE_PATH):
+        self.path = path
+        # sqlite3 connections are per thread
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_title ON chunks (title)")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def get(self, chunk_id):
+        row = self.conn.execute(f"SELECT {_COLUMNS} FROM chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+        return _to_chunk(row) if row else None
+
+    def get_many(self, chunk_ids):
+        """{chunk_id: chunk} for the ids that exist (one lookup per query)."""
+        chunk_ids = list(dict.fromkeys(chunk_ids))
+        found = {}
+        for start in range(0, len(chunk_ids), _MAX_VARIABLES):
+            batch = chunk_ids[start:start + _MAX_VARIABLES]
+            rows = self.conn.execute(
+                f"SELECT {_COLUMNS} FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+            )
+            for row in rows:
+                found[row[0]] = _to_chunk(row)
+        return found
+
+    def get_by_title(self, title):
+        """All chunks of one article, in chunk order."""
+        rows = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM chunks WHERE title = ? ORDER BY chunk_index, rowid", (title,)
+        )
+        return [_to_chunk(row) for row in rows]
+
+    def iter_batches(self, batch_size=1000):
+        """Stream all chunks in insertion order, batch_size at a time."""
+        cursor = self.conn.execute(f"SELECT {_COLUMNS} FROM chunks ORDER BY rowid")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [_to_chunk(row) for row in rows]
+
+    def iter_chunks(self, batch_size=1000):
+        for batch in self.iter_batches(batch_size):
+            yield from batch
+
+    def ids(self):
+        return [row[0] for row in self.conn.execute("SELECT chunk_id FROM chunks ORDER BY rowid")]
+
+    def upsert(self, chunks):
+        """Append new chunks and replace existing ones by chunk_id (keeps their position)."""
+        with self.conn:
+            self.conn.executemany(_UPSERT, (_to_row(chunk) for chunk in chunks))
+
+    def delete(self, chunk_ids):
+        chunk_ids = list(chunk_ids)
+        with self.conn:
+            for start in range(0, len(chunk_ids), _MAX_VARIABLES):
+                batch = chunk_ids[start:start + _MAX_VARIABLES]
+                self.conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+
+    def apply(self, upserted, deleted_ids):
+        """Upsert and delete in one transaction, so readers never see half of an ingestion delta."""
+        deleted_ids = list(deleted_ids)
+        with self.conn:
+            for start in range(0, len(deleted_ids), _MAX_VARIABLES):
+                batch = deleted_ids[start:start + _MAX_VARIABLES]
+                self.conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+            self.conn.executemany(_UPSERT, (_to_row(chunk) for chunk in upserted))
+
+    def replace_all(self, chunks):
+        """Swap the whole corpus in one transaction; readers see the old or the new corpus, never a mix."""
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.executemany(_UPSERT, (_to_row(chunk) for chunk in chunks))
+
+    def migrate_from_json(self, json_path=LEGACY_METADATA_PATH):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        self.replace_all(chunks)
+        print(f"Migrated {len(chunks)} chunks from {json_path} to {self.path}")
+
+
+# Process-wide chunk store (lazy load)
+_chunk_store = None
+_chunk_store_lock = threading.Lock()
+
+def get_chunk_store():
+    global _chunk_store
+    if _chunk_store is None:
+        with _chunk_store_lock:
+            if _chunk_store is None:
+                store = ChunkStore()
+                if len(store) == 0 and os.path.exists(LEGACY_METADATA_PATH):
+                    store.migrate_from_json()
+                _chunk_store = store
+    return _chunk_store
@@ -11,14 +11,23 @@ EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
 TOKENIZER_MODEL = "bert-base-uncased"
 LLM_RAG_MODEL_NAME = "google/flan-t5-base"
 
+# Embedding engine (embedding_service.py)
+EMBEDDING_BACKEND = "torch"    # "torch", "int8" (dynamic int8 quantization, CPU) or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+EMBEDDING_THREADS = None       # intra-op threads of the embedding runtime (None = library default)
+EMBEDDING_BATCH_SIZE = 64      # max texts per forward pass; inputs are batched by token length
+EMBEDDING_BATCH_TOKENS = 8192  # max padded tokens (texts x longest) per forward pass
+
 # Re-ranking Configuration
 RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-12-v2"
+PRELOAD_RESPONSE_MODELS = True  # app.py loads the query models (embedding, re-ranker, LLM) in a background thread at start
 
 
 # Text Chunking Configuration
 # Text Chunking Configuration
 CHUNK_SIZE = 256
 CHUNK_OVERLAP = 50
+CHUNK_MAX_CHARS = 2048  # also cap chunks in characters: BERT maps any word over 100 characters to one [UNK] token
+CHUNKER = "token"  # "token": tokenize each document once and slice on offsets; "recursive": LangChain splitter
 MAX_NEW_TOKENS_LONG = 512
 
 # Data Processing Configuration
@@ -29,12 +38,37 @@ BATCH_SIZE = 32
 PINECONE_API_KEY = 
 PINECONE_INDEX_NAME = "hybrid-rag"
 PINECONE_HOST = "https://hybrid-rag-md4312k.svc.aped-4627-b74a.pinecone.io" # Optional, can be derived or left out if not using host directly usually
+PINECONE_CONTROL_HOST = None  # Control-plane override, e.g. a local stand-in such as Pinecone Local
+PINECONE_POOL_THREADS = 8     # Connection pool size of the shared index handle
+UPSERT_MAX_IN_FLIGHT = 4          # upsert requests sent concurrently; submitting more blocks (backpressure)
+UPSERT_MAX_BATCH_BYTES = 1_800_000  # estimated JSON payload per upsert request (Pinecone rejects requests over 2 MB)
+UPSERT_MAX_BATCH_VECTORS = 1000     # Pinecone's per-request vector limit
+
+# Vector store backend: "pinecone" (hosted) or "local" (embedded, memory-mapped, works offline)
+VECTOR_STORE = "pinecone"
+EMBEDDING_DIMENSION = 768  # all-mpnet-base-v2
+VECTOR_METADATA_TEXT = False  # also store chunk text in vector metadata (off: title/url/chunk_index only, text comes from the chunk store)
+LOCAL_VECTOR_DIR = "./vector_store"
+LOCAL_VECTOR_DTYPE = "float32"  # "float16" halves memory, exact scoring is slower (converted per block)
+LOCAL_VECTOR_INDEX = "exact"    # "exact" (brute-force cosine) or "hnsw" (approximate, needs hnswlib)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
 
 
 # Paths
 DATA_FILES_PATH = "./files"
 DYNAMIC_URLS_FILE = "dynamic_urls.json"
 FIXED_URLS_FILE = "fixed_urls.json"
+CHUNK_STORE_PATH = "./files/chunks.db"  # SQLite chunk store (text, title, url, metadata by chunk_id)
+INDEX_MANIFEST_PATH = "./files/index_manifest.json"  # chunks the indexes hold, for incremental ingestion
+INCREMENTAL_INGEST = True  # only embed/index added or changed chunks and delete removed ones
+STREAMING_INGEST = True    # run fetch/chunk/embed/upsert as overlapping stages with bounded queues
+CHUNK_WORKERS = 4          # chunking processes in the streaming pipeline
+EMBED_BATCH_SIZE = 256     # chunks encoded per embedding call in the streaming pipeline
+EMBEDDING_CACHE = True      # reuse vectors of texts embedded before (keyed by text hash, per embedding model)
+EMBEDDING_CACHE_DIR = "./files/embedding_cache"
+INGEST_CHECKPOINT_DIR = "./files/ingest_checkpoint"  # progress of an unfinished ingestion run (resumed on re-run)
 
 # BM25 Configuration
 BM25_K1 = 1.5
@@ -48,11 +82,18 @@ RRF_WEIGHTS = {
 # Retrieval Configuration
 TOP_K_RESULTS = 10
 SIMILARITY_THRESHOLD = 0.5
+QUERY_EMBEDDING_CACHE_SIZE = 10000  # query embeddings kept in memory (LRU, keyed by normalized query text; 0 disables)
 
 # API Request Configuration
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 3
 RETRY_DELAY = 1  # seconds
+FETCH_CONCURRENCY = 8    # articles fetched in parallel during ingestion
+FETCH_RATE_LIMIT = 20    # max API requests per second across all fetch threads (None = unlimited)
+FETCH_BATCH_TITLES = 50      # titles per bulk lastrevid check and per streaming fetch batch (API limit for non-bot clients)
+FETCH_CACHE = True           # reuse fetched pages whose lastrevid is unchanged
+FETCH_CACHE_DIR = "./files/fetch_cache"
+INFOBOX_LEAD_SECTION = True  # render only the lead section for the infobox (action=parse, section=0)
 
 CATEGORIES = [
         "Category:Computer security",
@@ -63,8 +104,26 @@ CATEGORIES = [
     ]
 TARGET_DYNAMIC_URLS = 300
 MIN_WORDS = 200
+FALLBACK_MIN_WORDS = 100        # min_words for topping up when the categories run short
+WIKITEXT_BYTES_PER_WORD = 8     # page length (wikitext bytes) per word, to estimate word counts
+CRAWL_MAX_DEPTH = 10            # category levels crawled below each seed category
+CRAWL_REQUEST_BUDGET = 500      # max API requests per dynamic URL discovery (None = unlimited)
+CRAWL_SEED = 0                  # seeds the member order within each category
+
+# BM25 tokenization: "nltk" (word_tokenize) or "fast" (regex; identical tokens for alphanumeric words).
+# The mode is recorded in the index manifest and queries are tokenized the same way.
+BM25_TOKENIZER = "nltk"
+STEM_CACHE_SIZE = 200000
+PREPROCESS_WORKERS = None  # process pool size for batch preprocessing (None = CPU count)
 
-BM25_INDEX_PATH = "./bm25_index/bm25_index.pkl"
+# Segmented BM25 index: segment files, tombstones and a segments.json manifest
+BM25_INDEX_DIR = "./bm25_index"
+BM25_MAX_SEGMENTS = 8           # merge all segments once there are more than this
+BM25_MERGE_DELETED_RATIO = 0.3  # ...or once this fraction of indexed chunks is deleted
+BM25_BUILD_BATCH = 50000        # chunks streamed from the chunk store per segment on a full build
+# Sparse top-k selection: "exact" ranks every document, "maxscore" skips low-impact postings
+# (MaxScore early termination, only documents matching a query term are returned)
+BM25_TOPK_MODE = "exact"
 
 # Evaluation Configuration
 FORCE_REGENERATE_QA = True
\ No newline at end of file
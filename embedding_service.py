@@ -0,0 +1,163 @@
+"""
+Embedding engine shared by ingestion and queries.
+
+encode() sorts its inputs by token length and cuts them into batches of
+similar length (at most EMBEDDING_BATCH_SIZE texts and EMBEDDING_BATCH_TOKENS
+padded tokens each), so every batch pads to about its own members' length
+instead of to the longest chunk of a corpus-order slice. Vectors come back
+in input order.
+
+Backends (EMBEDDING_BACKEND), all on the same SentenceTransformer pipeline:
+    "torch"   PyTorch, as loaded
+    "int8"    Linear layers dynamically quantized to int8 (CPU)
+    "onnx"    ONNX Runtime (sentence-transformers' onnx backend, needs optimum[onnxruntime])
+EMBEDDING_THREADS sets the intra-op thread count of either runtime.
+benchmarks/bench_embedding.py compares their throughput and cosine agreement.
+
+The model is loaded on the first encode() call (through model_registry for
+"torch", so other users of the same model share it).
+"""
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+from model_registry import sentence_transformer
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def embedding_model_id(model_name=config.EMBEDDING_MODEL, backend=config.EMBEDDING_BACKEND):
+    # int8 and ONNX vectors differ slightly from the PyTorch model's, so they are kept apart
+    return model_name if backend == "torch" else f"{model_name} ({backend})"
+
+
+def length_batches(lengths, batch_size, batch_tokens):
+    """
+    Batches of indices over texts sorted longest first, each with at most batch_size
+    texts and batch_size * longest <= batch_tokens padded tokens (a longer text gets its own batch).
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    batches, batch = [], []
+    for i in order:
+        # the first (longest) member sets the padded length of the batch
+        if batch and (len(batch) >= batch_size or (len(batch) + 1) * lengths[batch[0]] > batch_tokens):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class EmbeddingService:
+
+    def __init__(self, model_name=config.EMBEDDING_MODEL, backend=config.EMBEDDING_BACKEND,
+                 threads=config.EMBEDDING_THREADS, batch_size=config.EMBEDDING_BATCH_SIZE,
+                 batch_tokens=config.EMBEDDING_BATCH_TOKENS):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(BACKENDS)})")
+        self.model_name = model_name
+        self.backend = backend
+        self.threads = threads
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+        self.model = None
+        self._lock = threading.Lock()
+
+        self.texts_encoded = 0
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+
+    @property
+    def model_id(self):
+        return embedding_model_id(self.model_name, self.backend)
+
+    def _load(self):
+        if self.backend == "torch":
+            if self.threads:
+                import torch
+
+                torch.set_num_threads(self.threads)
+            # the registry's instance, shared with the semantic similarity metric
+            return sentence_transformer(self.model_name)
+
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Loading embedding model: {self.model_id}")
+        if self.backend == "onnx":
+            model_kwargs = {}
+            if self.threads:
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = self.threads
+                model_kwargs["session_options"] = options
+            return SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        model = SentenceTransformer(self.model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def get_model(self):
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    self.model = self._load()
+        return self.model
+
+    def token_lengths(self, texts):
+        model = self.get_model()
+        encoded = model.tokenizer(texts, truncation=True, max_length=model.max_seq_length)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def encode(self, texts):
+        """float32 vectors of texts (one vector for a single string)."""
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        texts = list(texts)
+        model = self.get_model()
+        vectors = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+        if not texts:
+            return vectors
+
+        lengths = self.token_lengths(texts)
+        batches = length_batches(lengths, self.batch_size, self.batch_tokens)
+        for batch in batches:
+            vectors[batch] = model.encode([texts[i] for i in batch], batch_size=len(batch),
+                                          convert_to_numpy=True, show_progress_bar=False)
+
+        with self._lock:
+            self.texts_encoded += len(texts)
+            self.batches += len(batches)
+            self.tokens += sum(lengths)
+            self.padded_tokens += sum(len(batch) * lengths[batch[0]] for batch in batches)
+        return vectors
+
+    def stats(self):
+        return {
+            "texts": self.texts_encoded,
+            "batches": self.batches,
+            # share of the computed token positions that were real tokens, not padding
+            "padding_efficiency": self.tokens / self.padded_tokens if self.padded_tokens else 1.0,
+        }
+
+
+# Process-wide service (lazy load)
+_embedding_service = None
+_embedding_service_lock = threading.Lock()
+
+def get_embedding_service():
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+    return _embedding_service
@@ -2,35 +2,29 @@ import json
 import random
 import os
 import sys
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
 from tqdm import tqdm
 
 # Add project root to sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config as CONFIG
 import utils
+from model_registry import seq2seq_model
 
 # Configuration
 OUTPUT_FILE = "files/questionanswers.json"
-METADATA_FILE = "files/metadata.json"
 TOTAL_QA_PAIRS = 100
 
 def load_text_chunks():
-    """Load text chunks from metadata.json."""
+    """Load text chunks from the chunk store."""
     chunks = utils.fetch_metadata()
-    print(f"Loaded {len(chunks)} chunks from {METADATA_FILE}")
+    print(f"Loaded {len(chunks)} chunks from the chunk store")
     return chunks
 
 def init_llm():
-    """Initialize the LLM and tokenizer."""
-    print(f"Loading model: {CONFIG.LLM_RAG_MODEL_NAME}")
-    tokenizer = AutoTokenizer.from_pretrained(CONFIG.LLM_RAG_MODEL_NAME)
-    model = AutoModelForSeq2SeqLM.from_pretrained(CONFIG.LLM_RAG_MODEL_NAME)
-    
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    """The LLM and tokenizer (the registry's instance, shared with answer generation and the judge)."""
+    tokenizer, model = seq2seq_model(CONFIG.LLM_RAG_MODEL_NAME)
+    device = model.device
     print(f"Using device: {device}")
-    model.to(device)
     
     return tokenizer, model, device
 
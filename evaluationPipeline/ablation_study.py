@@ -7,11 +7,14 @@ from tqdm import tqdm
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config as CONFIG
 import utils
+from chunk_store import get_chunk_store
 
 try:
-    from reponsePipeline.rrf import fuse_responses, dense_response, reponse_BM25
+    from reponsePipeline.rrf import fuse_responses, reponse_BM25
+    from reponsePipeline.dense_response import dense_response_batch
 except ImportError:
-    from reponsePipeline.rrf import fuse_responses, dense_response, reponse_BM25
+    from reponsePipeline.rrf import fuse_responses, reponse_BM25
+    from reponsePipeline.dense_response import dense_response_batch
 
 QA_FILE = "files/questionanswers.json"
 ABLATION_FILE = "files/ablation_results.json"
@@ -21,8 +24,8 @@ def run_ablation():
     print("Starting Ablation Study...")
     
     qa_data = utils.fetch_qa_pairs()
-    metadata = utils.fetch_metadata()
-    chunk_to_url = {item['chunk_id']: item['url'] for item in metadata}
+    # chunk_id -> url lookups go to the chunk store (no full corpus load)
+    chunk_store = get_chunk_store()
     
     results = {
         "dense": {"mrr": 0, "hits": 0},
@@ -31,8 +34,12 @@ def run_ablation():
     }
     
     count = 0
+
+    # Dense results for every question in one batch (one encode call for the uncached questions);
+    # the hybrid retrieval below then finds the query embeddings in the cache
+    dense_batch = dense_response_batch((entry['question'] for entry in qa_data), top_n=TOP_N)
     
-    for entry in tqdm(qa_data, desc="Ablation"):
+    for entry, dense_res in tqdm(zip(qa_data, dense_batch), total=len(qa_data), desc="Ablation"):
         question = entry['question']
         ground_truth_url = entry['source_url']
         
@@ -41,8 +48,7 @@ def run_ablation():
         hybrid_res = fuse_responses(question, top_n=TOP_N)
         
         # 2. Dense (Embeddings)
-        # dense_response returns list of (chunk_id, score)
-        dense_res = dense_response(question, top_n=TOP_N)
+        # dense_response_batch gave a list of (chunk_id, score) per question
         
         # 3. Sparse (BM25)
         # reponse_BM25 returns list of (chunk_id, score)
@@ -50,6 +56,8 @@ def run_ablation():
         
         # Helper to calc MRR
         def calc_rank_rr(retrieved_list):
+            chunks = chunk_store.get_many(chunk_id for chunk_id, _ in retrieved_list)
+            chunk_to_url = {chunk_id: chunk['url'] for chunk_id, chunk in chunks.items()}
             for i, (chunk_id, _) in enumerate(retrieved_list, start=1):
                 url = chunk_to_url.get(chunk_id)
                 if url == ground_truth_url:
@@ -1,22 +1,20 @@
-from sentence_transformers import CrossEncoder
+import os
+import sys
+
 import nltk
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import cross_encoder
+
 try:
     nltk.data.find('tokenizers/punkt')
 except LookupError:
     nltk.download('punkt', quiet=True)
 
-_nli_model = None
-
 def get_nli_model():
-    global _nli_model
-    if _nli_model is None:
-        # We use a lightweight Cross-Encoder trained on NLI data
-        # 'cross-encoder/nli-MiniLM2-L6-H768' is fast and good for this
-        model_name = 'cross-encoder/nli-MiniLM2-L6-H768'
-        print(f"Loading Faithfulness Model: {model_name}")
-        _nli_model = CrossEncoder(model_name, max_length=512)
-    return _nli_model
+    # We use a lightweight Cross-Encoder trained on NLI data
+    # 'cross-encoder/nli-MiniLM2-L6-H768' is fast and good for this
+    return cross_encoder('cross-encoder/nli-MiniLM2-L6-H768', max_length=512)
 
 def calculate_faithfulness(context, answer):
     """
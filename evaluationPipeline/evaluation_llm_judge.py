@@ -1,5 +1,3 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
 import sys
 import os
 import re
@@ -7,19 +5,11 @@ import re
 # Add project root to sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config as CONFIG
-
-_tokenizer = None
-_model = None
+from model_registry import seq2seq_model
 
 def get_judge_model():
-    global _tokenizer, _model
-    if _model is None:
-        print(f"Loading Judge Model: {CONFIG.LLM_RAG_MODEL_NAME}")
-        _tokenizer = AutoTokenizer.from_pretrained(CONFIG.LLM_RAG_MODEL_NAME)
-        _model = AutoModelForSeq2SeqLM.from_pretrained(CONFIG.LLM_RAG_MODEL_NAME)
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        _model.to(device)
-    return _tokenizer, _model
+    # The same Flan-T5 instance the answer generator uses (model registry)
+    return seq2seq_model(CONFIG.LLM_RAG_MODEL_NAME)
 
 def evaluate_by_llm(question, ground_truth, candidate):
     """
@@ -42,15 +42,13 @@ def run_evaluation():
         ground_truth = entry['ground_truth_answer']
         
         # 1. Retrieve Context
+        # The RetrievalResult already carries chunk contents (one chunk-store lookup per query)
         fused_results = fuse_responses(question, top_n=5)
-
-        metadata = utils.fetch_metadata()
-        chunk_map = {m['chunk_id']: m['content'] for m in metadata}
         
         context_parts = []
-        for chunk_id, _ in fused_results[:3]: # Top 3 for context
-            if chunk_id in chunk_map:
-                context_parts.append(chunk_map[chunk_id])
+        for chunk in fused_results.chunks[:3]: # Top 3 for context
+            if chunk.found:
+                context_parts.append(chunk.content)
         
         context = "\n\n".join(context_parts)
         
@@ -7,6 +7,7 @@ from tqdm import tqdm
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config as CONFIG
 import utils
+from chunk_store import get_chunk_store
 
 try:
     from reponsePipeline.rrf import fuse_responses
@@ -15,20 +16,18 @@ except ImportError:
     from reponsePipeline.rrf import fuse_responses
 
 QA_FILE = "files/questionanswers.json"
-METADATA_FILE = "files/metadata.json"
 TOP_N = 10  # We check top 10 results for MRR
 
 def load_data():
     qa_data = utils.fetch_qa_pairs()
      
-    metadata = utils.fetch_metadata()
-    # Create lookup chunk_id -> url
-    chunk_to_url = {item['chunk_id']: item['url'] for item in metadata}
+    # chunk_id -> url lookups go to the chunk store (no full corpus load)
+    chunk_store = get_chunk_store()
     
-    return qa_data, chunk_to_url
+    return qa_data, chunk_store
 
 def calculate_mrr():
-    qa_data, chunk_to_url = load_data()
+    qa_data, chunk_store = load_data()
     
     total_rr = 0
     count = 0
@@ -51,6 +50,7 @@ def calculate_mrr():
             
         rank = -1
         rr = 0.0
+        chunk_to_url = {chunk_id: chunk['url'] for chunk_id, chunk in chunk_store.get_many(chunk_id for chunk_id, _ in results).items()}
         
         # Find first matching URL
         # ranks are 1-based
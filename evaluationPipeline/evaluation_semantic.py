@@ -1,19 +1,14 @@
-from sentence_transformers import SentenceTransformer, util
 import sys
 import os
 
 # Add project root to sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config as CONFIG
-
-_model = None
+from model_registry import sentence_transformer
 
 def get_model():
-    global _model
-    if _model is None:
-        print(f"Loading Embedding Model: {CONFIG.EMBEDDING_MODEL}")
-        _model = SentenceTransformer(CONFIG.EMBEDDING_MODEL)
-    return _model
+    # Shared with the embedding service (model registry)
+    return sentence_transformer(CONFIG.EMBEDDING_MODEL)
 
 def calculate_semantic_similarity(reference, candidate):
     """
@@ -22,6 +17,8 @@ def calculate_semantic_similarity(reference, candidate):
     if not reference or not candidate:
         return 0.0
         
+    from sentence_transformers import util
+
     model = get_model()
     
     # Encode sentences to get their embeddings
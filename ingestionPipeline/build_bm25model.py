@@ -2,33 +2,61 @@ import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import utils
 import config
-from rank_bm25 import BM25Okapi
-import pickle
-from nltk.tokenize import word_tokenize
+import hashlib
+from bm25_segments import BM25IndexWriter, read_manifest
+from chunk_store import get_chunk_store
+from text_preprocessing import preprocess_batch
 
 
-def build_bm25_index():
+def corpus_hash(corpus_data):
+    # Fingerprint of the indexed chunks, stored in the segment header
+    digest = hashlib.sha256()
+    for item in corpus_data:
+        digest.update(f"{item['chunk_id']}\0{item['title']}\0{item['content']}\0".encode('utf-8'))
+    return digest.hexdigest()
+
 
-    # fetch documents from metadata json file
-    corpus_data = utils.fetch_metadata()
-    # tokenize documents
-    print("Tokenizing and stemming corpus for BM25...")
-    tokenized_corpus = [utils.preprocess_text(f"{item['title']} {item['content']}") for item in corpus_data]
-    # build BM25 index
-    bm25 = BM25Okapi(tokenized_corpus)
+def tokenize_chunks(corpus_data):
+    # Batched over a process pool; stems are memoized per worker
+    return preprocess_batch(f"{item['title']} {item['content']}" for item in corpus_data)
 
-     # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(config.BM25_INDEX_PATH), exist_ok=True)
 
-    # Save the BM25 index to disk
-    with open(config.BM25_INDEX_PATH, 'wb') as f:
-        pickle.dump(bm25, f)
+def build_bm25_index():
 
-    print(f"BM25 index built and saved to {config.BM25_INDEX_PATH}")
+    # stream documents from the chunk store; each batch becomes one segment
+    # (segments are merged on commit once there are more than BM25_MAX_SEGMENTS)
+    chunk_store = get_chunk_store()
+    print(f"Tokenizing and stemming {len(chunk_store)} chunks for BM25...")
+
+    # build BM25 inverted index from scratch
+    # (same scores as BM25Okapi, sparse postings per term, mmap-able on-disk format)
+    writer = BM25IndexWriter(config.BM25_INDEX_DIR, create=True)
+    for batch in chunk_store.iter_batches(config.BM25_BUILD_BATCH):
+        writer.add([item['chunk_id'] for item in batch], tokenize_chunks(batch), corpus_hash(batch))
+    writer.commit()
+
+    print(f"BM25 index built and saved to {config.BM25_INDEX_DIR}")
+
+
+def update_bm25_index(changed_chunks, removed_chunk_ids=()):
+    """
+    Incrementally apply ingestion changes: only changed/new chunks are tokenized and
+    written as a new segment, removed chunk ids are tombstoned.
+    """
+    manifest = read_manifest(config.BM25_INDEX_DIR)
+    if manifest is None or manifest.get("tokenizer", "nltk") != config.BM25_TOKENIZER:
+        # No index yet, or the tokenizer changed: every chunk has to be re-tokenized anyway
+        build_bm25_index()
+        return
+
+    print(f"Updating BM25 index: {len(changed_chunks)} changed, {len(removed_chunk_ids)} removed chunks...")
+    if not changed_chunks and not removed_chunk_ids:
+        return
+    writer = BM25IndexWriter(config.BM25_INDEX_DIR)
+    writer.delete(removed_chunk_ids)
+    writer.add([item['chunk_id'] for item in changed_chunks], tokenize_chunks(changed_chunks), corpus_hash(changed_chunks))
+    writer.commit()
 
 if __name__ == "__main__":
     build_bm25_index()
-
-
@@ -0,0 +1,168 @@
+"""
+Persistent embedding cache: text hash -> float32 vector, one cache per embedding model.
+
+Vectors are appended as raw float32 rows to a memory-mapped file; index.json
+lists the text hash of every row. Texts already cached are not encoded again,
+whatever chunk id, page or index they belong to, so re-ingesting an unchanged
+corpus (a full rebuild, a new vector store, chunks renumbered by an edit
+earlier in the page) costs no model time.
+
+    embedding_cache/<model>/
+        index.json                  {"model", "dimension", "generation", "keys": [text hash per row]}
+        vectors_00000001.f32        rows, in key order
+
+Rows past the end of the key list (appended by a run that stopped before
+save()) are ignored. evict() keeps only the texts still referenced and
+rewrites them as a new generation file.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from embedding_service import embedding_model_id
+
+INDEX_FILE = "index.json"
+DTYPE = np.float32
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+class EmbeddingCache:
+
+    def __init__(self, path=config.EMBEDDING_CACHE_DIR, model_name=None):
+        # the embedding model and backend (see embedding_service.embedding_model_id)
+        self.model_name = model_name = model_name or embedding_model_id()
+        self.path = os.path.join(path, re.sub(r'[^A-Za-z0-9._-]+', '_', model_name))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.dimension = None
+        self.generation = 1
+        self.keys = []
+        self._vectors = None
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index["model"] == model_name:
+                self.dimension = index["dimension"]
+                self.generation = index["generation"]
+                self.keys = index["keys"]
+        self.row_of = {key: row for row, key in enumerate(self.keys)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _vectors_path(self, generation=None):
+        return os.path.join(self.path, f"vectors_{generation or self.generation:08d}.f32")
+
+    def _mapped(self):
+        # (Re)mapped after appends, so the view always covers every indexed row
+        if self._vectors is None or len(self._vectors) < len(self.keys):
+            self._vectors = np.memmap(self._vectors_path(), dtype=DTYPE, mode='r', shape=(len(self.keys), self.dimension))
+        return self._vectors
+
+    def encode(self, texts, encode_fn):
+        """Vectors for texts: cached rows, plus encode_fn(misses) for the rest (then cached)."""
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            rows = [self.row_of.get(key) for key in keys]
+        # one encode per distinct missing text
+        missing = list(dict.fromkeys(key for key, row in zip(keys, rows) if row is None))
+        if missing:
+            first = {}
+            for key, text in zip(keys, texts):
+                first.setdefault(key, text)
+            encoded = np.asarray(encode_fn([first[key] for key in missing]), dtype=DTYPE)
+            self._append(missing, encoded)
+            with self._lock:
+                rows = [self.row_of[key] for key in keys]
+
+        vectors = np.asarray(self._mapped()[rows]) if rows else np.empty((0, self.dimension or 0), dtype=DTYPE)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return vectors
+
+    def _append(self, keys, vectors):
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the cache's {self.dimension}")
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._vectors_path(), 'ab') as f:
+                # rows past the indexed count (a previous run's unsaved appends) are overwritten
+                f.truncate(len(self.keys) * self.dimension * DTYPE().itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+            for key in keys:
+                self.row_of[key] = len(self.keys)
+                self.keys.append(key)
+
+    def save(self):
+        """Make appended rows durable and write the index atomically."""
+        if self.dimension is None:
+            return
+        with self._lock:
+            with open(self._vectors_path(), 'ab') as f:
+                os.fsync(f.fileno())
+            index_path = os.path.join(self.path, INDEX_FILE)
+            with open(f"{index_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump({"model": self.model_name, "dimension": self.dimension,
+                           "generation": self.generation, "keys": self.keys}, f)
+            os.replace(f"{index_path}.tmp", index_path)
+
+    def evict(self, referenced_texts):
+        """Drop vectors of texts not in referenced_texts (a new generation); returns how many were dropped."""
+        referenced = {text_key(text) for text in referenced_texts}
+        with self._lock:
+            keep = [row for row, key in enumerate(self.keys) if key in referenced]
+            if len(keep) == len(self.keys):
+                return 0
+            removed = len(self.keys) - len(keep)
+            old_path = self._vectors_path()
+            vectors = self._mapped()
+            generation = self.generation + 1
+            with open(self._vectors_path(generation), 'wb') as f:
+                for start in range(0, len(keep), 4096):
+                    f.write(np.asarray(vectors[keep[start:start + 4096]]).tobytes())
+            self.generation = generation
+            self.keys = [self.keys[row] for row in keep]
+            self.row_of = {key: row for row, key in enumerate(self.keys)}
+            self._vectors = None
+        self.save()
+        os.remove(old_path)
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.keys)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+# Process-wide cache (lazy load)
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
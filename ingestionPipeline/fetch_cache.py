@@ -0,0 +1,121 @@
+"""
+On-disk cache for Wikipedia fetch results, keyed by page title and revision id.
+
+Payloads (article text, ...) are stored content-addressed as
+blobs/<sha256[:2]>/<sha256>.json; index.json maps each (kind, title) to the
+lastrevid it was fetched at and the blob holding it. A cached payload is
+only returned for the same revision, so a page edited on Wikipedia since the
+last run is fetched again while unchanged pages cost nothing but the bulk
+revision check (see wiki_fetch.fetch_revisions).
+
+    fetch_cache/
+        index.json                {kind: {title: {"revid": ..., "digest": ...}}}
+        blobs/ab/ab12....json     payload
+
+index.json is rewritten atomically by save(); prune() drops blobs no entry
+refers to any more.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+INDEX_FILE = "index.json"
+
+
+class FetchCache:
+
+    def __init__(self, path=config.FETCH_CACHE_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def _blob_path(self, digest):
+        return os.path.join(self.path, "blobs", digest[:2], f"{digest}.json")
+
+    def revision(self, kind, title):
+        """lastrevid the cached payload was fetched at (None if not cached)."""
+        entry = self.index.get(kind, {}).get(title)
+        return entry["revid"] if entry else None
+
+    def get(self, kind, title, revid):
+        """Cached payload for title at revision revid, or None."""
+        entry = self.index.get(kind, {}).get(title)
+        payload = None
+        if entry and revid is not None and entry["revid"] == revid:
+            try:
+                with open(self._blob_path(entry["digest"]), 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                payload = None
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    def put(self, kind, title, revid, payload):
+        if revid is None:
+            return
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with open(f"{blob_path}.{threading.get_ident()}.tmp", 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(f"{blob_path}.{threading.get_ident()}.tmp", blob_path)
+        with self._lock:
+            self.index.setdefault(kind, {})[title] = {"revid": revid, "digest": digest}
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with self._lock:
+            with open(f"{index_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            os.replace(f"{index_path}.tmp", index_path)
+
+    def prune(self):
+        """Delete blobs no index entry refers to; returns how many were removed."""
+        with self._lock:
+            live = {entry["digest"] for entries in self.index.values() for entry in entries.values()}
+        removed = 0
+        blob_dir = os.path.join(self.path, "blobs")
+        if not os.path.isdir(blob_dir):
+            return 0
+        for prefix in os.listdir(blob_dir):
+            for name in os.listdir(os.path.join(blob_dir, prefix)):
+                if name.endswith(".json") and name[:-len(".json")] not in live:
+                    os.remove(os.path.join(blob_dir, prefix, name))
+                    removed += 1
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+# Process-wide cache (lazy load)
+_fetch_cache = None
+_fetch_cache_lock = threading.Lock()
+
+def get_fetch_cache():
+    global _fetch_cache
+    if _fetch_cache is None:
+        with _fetch_cache_lock:
+            if _fetch_cache is None:
+                _fetch_cache = FetchCache()
+    return _fetch_cache
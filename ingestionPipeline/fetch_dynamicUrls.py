@@ -1,133 +1,179 @@
-from bs4 import BeautifulSoup
-import wikipediaapi
+"""
+Dynamic URL discovery: a breadth-first crawl of Wikipedia categories.
+
+Each category is listed with generator=categorymembers + prop=info, which
+returns up to 500 members per request together with their page length and
+URL, so articles are filtered on size without downloading their text
+(page length in wikitext bytes / WIKITEXT_BYTES_PER_WORD estimates the word
+count). Every level of the crawl is listed concurrently through the shared
+WikiClient, category listings are kept for the whole run (a category shared
+by two seed categories is requested once), the total number of API requests
+is capped by CRAWL_REQUEST_BUDGET, and members are ordered with a seeded
+RNG so the same categories yield the same URLs on every run.
+"""
 import json
 import os
-import sys
 import random
+import sys
+import threading
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
 import utils
 
-HEADERS = {
-    'User-Agent': 'BIT-User-Agent/1.0 (acedamic research;)'
-}
-
-def fetch_from_category(cat, wiki, fixedURls, skipped_titles, min_words, target, current_urls, depth=0, max_depth=5):
-    if depth > max_depth:
-        return
-
-    try:
-        members_list = list(cat.categorymembers.values())
-    except Exception as e:
-        print(f"Error fetching members for {cat.title}: {e}")
-        return
-
-    random.shuffle(members_list)
-
-    # Separate pages and subcats
-    pages = [m for m in members_list if m.ns == wikipediaapi.Namespace.MAIN]
-    subcats = [m for m in members_list if m.ns == wikipediaapi.Namespace.CATEGORY]
-
-    # Collect from pages first
-    for member in pages:
-        if len(current_urls) >= target:
-            return
-        if member.title in fixedURls or member.title in skipped_titles:
-            continue  # Skip if in fixed URLs or already collected globally
+try:
+    from wiki_fetch import get_wiki_client
+except ImportError:
+    from ingestionPipeline.wiki_fetch import get_wiki_client
+
+NS_MAIN = 0
+NS_CATEGORY = 14
+
+
+class RequestBudget:
+    """Thread-safe cap on API requests (None = unlimited)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Reserve one request; False once the budget is spent."""
+        with self._lock:
+            if self.limit is not None and self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+    @property
+    def exhausted(self):
+        return self.limit is not None and self.used >= self.limit
+
+
+def fetch_category_members(category, client, budget):
+    """
+    (pages, subcategories) of a category: pages as {"title", "length", "url"} sorted
+    by title, subcategory titles sorted. Partial when a request fails or the budget runs out.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "generator": "categorymembers",
+        "gcmtitle": category,
+        "gcmtype": "page|subcat",
+        "gcmlimit": "max",
+        "prop": "info",
+        "inprop": "url"
+    }
+    pages, subcats = [], []
+    while budget.take():
         try:
-            page = wiki.page(member.title)
-            words = len(page.text.split())
-            if words >= min_words:
-                current_urls[member.title] = page.fullurl
-                print(f"[{len(current_urls)}] Collected: {member.title} (Depth: {depth})")
+            data = client.get(params)
         except Exception as e:
-            print(f"Error processing page {member.title}: {e}")
-
-    # Then recurse into subcats
-    for sub_member in subcats:
-        if len(current_urls) >= target:
-            return
-        if sub_member.title in fixedURls or sub_member.title in skipped_titles:
-            continue  # Skip if in fixed or already collected (though for cats, maybe not necessary)
-        try:
-            sub_cat = wiki.page(sub_member.title)
-            fetch_from_category(sub_cat, wiki, fixedURls, skipped_titles, min_words, target, current_urls, depth + 1, max_depth)
-        except Exception as e:
-            print(f"Error processing subcategory {sub_member.title}: {e}")
-
-def get_dynamic_urls(category_list, target=200, min_words=200):
+            utils.print_error(f"Error fetching members for {category}: {e}")
+            break
+        for member in data.get('query', {}).get('pages', {}).values():
+            if member.get('ns') == NS_MAIN and 'missing' not in member:
+                pages.append({"title": member['title'], "length": member.get('length', 0), "url": member.get('fullurl')})
+            elif member.get('ns') == NS_CATEGORY:
+                subcats.append(member['title'])
+        if 'continue' not in data:
+            break
+        params = {**params, **data['continue']}
+    return sorted(pages, key=lambda page: page['title']), sorted(subcats)
+
+
+class CategoryCrawler:
+    """Breadth-first category crawler; listings are shared across crawl() calls."""
+
+    def __init__(self, client=None, request_budget=config.CRAWL_REQUEST_BUDGET,
+                 max_depth=config.CRAWL_MAX_DEPTH, seed=config.CRAWL_SEED):
+        self.client = client or get_wiki_client()
+        self.budget = RequestBudget(request_budget)
+        self.max_depth = max_depth
+        self.seed = seed
+        self._members = {}  # category -> (pages, subcats)
+
+    def _list(self, categories):
+        # Listings of a window of categories, fetched concurrently; cached ones cost nothing
+        missing = [cat for cat in categories if cat not in self._members]
+        for cat, members in zip(missing, self.client.executor.map(
+                lambda cat: fetch_category_members(cat, self.client, self.budget), missing)):
+            self._members[cat] = members
+        return [self._members[cat] for cat in categories]
+
+    def _ordered(self, category, items):
+        # Seeded per category, so the order does not depend on which thread finished first
+        items = list(items)
+        random.Random(f"{self.seed}:{category}").shuffle(items)
+        return items
+
+    def crawl(self, category, quota, excluded=(), min_words=config.MIN_WORDS):
+        """Up to `quota` {title: url} of pages with >= min_words (estimated) under a category."""
+        min_length = min_words * config.WIKITEXT_BYTES_PER_WORD
+        collected = {}
+        visited = {category}
+        level = [category]
+        depth = 0
+        while level and depth <= self.max_depth and len(collected) < quota:
+            next_level = []
+            for start in range(0, len(level), self.client.concurrency):
+                window = level[start:start + self.client.concurrency]
+                for cat, (pages, subcats) in zip(window, self._list(window)):
+                    for page in self._ordered(cat, pages):
+                        if len(collected) >= quota:
+                            return collected
+                        title = page['title']
+                        if title in excluded or title in collected or not page['url']:
+                            continue
+                        if page['length'] >= min_length:
+                            collected[title] = page['url']
+                            print(f"[{len(collected)}] Collected: {title} (Depth: {depth})")
+                    for sub in self._ordered(cat, subcats):
+                        if sub not in visited:
+                            visited.add(sub)
+                            next_level.append(sub)
+                if self.budget.exhausted:
+                    print(f"Request budget of {self.budget.limit} spent while crawling {category}")
+                    return collected
+            level = next_level
+            depth += 1
+        return collected
+
+
+def get_dynamic_urls(category_list, target=200, min_words=200, client=None, request_budget=config.CRAWL_REQUEST_BUDGET):
     urls = {}
-    wiki = wikipediaapi.Wikipedia(user_agent='BITS-CAI-Assignment2/1.0 (2024AA05522@wilp.bits-pilani.ac.in)', 
-                                  language='en', extract_format=wikipediaapi.ExtractFormat.WIKI)
-
+    crawler = CategoryCrawler(client=client, request_budget=request_budget)
     fixedURls = set(utils.fetch_fixed_urls())
 
     no_of_urls_by_category = target // len(category_list)
-    global_count = 0
-
     for cat_name in category_list:
+        if len(urls) >= target:
+            break
         print(f"Expanding: {cat_name}")
-        per_cat_urls = {}
-        skipped_titles = set(urls.keys())
-        try:
-            cat = wiki.page(cat_name)
-            if not cat.exists():
-                print(f"Category {cat_name} does not exist. Skipping.")
-                continue
-            fetch_from_category(cat, wiki, fixedURls, skipped_titles, min_words, no_of_urls_by_category, per_cat_urls)
-        except Exception as e:
-            print(f"Error with category {cat_name}: {e}")
-            continue
-
-      
-
-        # If still less, retry with higher max_depth
-        if len(per_cat_urls) < no_of_urls_by_category:
-            print(f"Retrying {cat_name} with higher max_depth (10)")
-            remaining = no_of_urls_by_category - len(per_cat_urls)
-            fetch_from_category(cat, wiki, fixedURls, skipped_titles, min_words, remaining, per_cat_urls, max_depth=10)
-
+        per_cat_urls = crawler.crawl(cat_name, no_of_urls_by_category, fixedURls | set(urls), min_words)
         urls.update(per_cat_urls)
-        global_count += len(per_cat_urls)
         print(f"Completed {cat_name}: {len(per_cat_urls)} URLs collected for this category")
 
-        if global_count >= target:
-            break
-
-    # If total is still less than target, fetch additional from Cryptography
-    if len(urls) < target:
-        print("Fetching additional from Category:Cryptography")
-        cat_name = "Category:Cryptography"
-        try:
-            cat = wiki.page(cat_name)
-            if cat.exists():
-                remaining = target - len(urls)
-                skipped_titles = set(urls.keys())
-                fetch_from_category(cat, wiki, fixedURls, skipped_titles, min_words, remaining, urls, max_depth=10)
-        except Exception as e:
-            print(f"Error fetching additional from {cat_name}: {e}")
-
-    # If still less, retry additional with lower min_words
-    if len(urls) < target:
-        print("Retrying additional from Category:Cryptography with lower min_words (100)")
-        remaining = target - len(urls)
-        skipped_titles = set(urls.keys())
-        fetch_from_category(cat, wiki, fixedURls, skipped_titles, 100, remaining, urls, max_depth=10)
-
+    # Top up from the same categories, then with a lower min_words; listings already
+    # fetched are reused, so this only requests categories the first pass did not reach
+    for threshold in (min_words, config.FALLBACK_MIN_WORDS):
+        for cat_name in category_list:
+            if len(urls) >= target:
+                break
+            print(f"Fetching additional from {cat_name} (min_words {threshold})")
+            urls.update(crawler.crawl(cat_name, target - len(urls), fixedURls | set(urls), threshold))
+
+    print(f"Category crawl: {len(urls)} URLs, {crawler.budget.used} API requests, "
+          f"{len(crawler._members)} categories listed")
     return urls
 
 if __name__ == "__main__":
-    categories = [
-        "Category:Computer security",
-        "Category:Cryptography",
-        "Category:Information privacy",
-        "Category:Information sensitivity",
-        "Category:Cybersecurity engineering"
-    ]
-    collected_urls = get_dynamic_urls(categories, target=300, min_words=200)
+    collected_urls = get_dynamic_urls(config.CATEGORIES, target=config.TARGET_DYNAMIC_URLS, min_words=config.MIN_WORDS)
     output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "files", "dynamic_urls.json")
     with open(output_path, "w") as f:
         json.dump(collected_urls, f, indent=2)
 
-    print(f"Total URLs collected: {len(collected_urls)}")
\ No newline at end of file
+    print(f"Total URLs collected: {len(collected_urls)}")
@@ -1,139 +1,151 @@
 import sys
-from bs4 import BeautifulSoup
-import requests
 import os
-import re
-import uuid
+import hashlib
 
-from transformers import AutoTokenizer
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import config
+from model_registry import auto_tokenizer
 
-HEADERS = {
-    'User-Agent': config.USER_AGENT
-}
-
-tokenizer = AutoTokenizer.from_pretrained(config.TOKENIZER_MODEL)
+# Article fetching (pooled session, concurrency, retries) lives in wiki_fetch
+try:
+    from wiki_fetch import fetch_text_title
+except ImportError:
+    from ingestionPipeline.wiki_fetch import fetch_text_title
 
+def get_tokenizer():
+    # Loaded on first use (model registry), so importing the module stays cheap
+    return auto_tokenizer(config.TOKENIZER_MODEL)
 
 
 def get_token_length(text):
-    return len(tokenizer.encode(text)) # encoding the text to get token length based on the length we will do chunking
+    return len(get_tokenizer().encode(text)) # encoding the text to get token length based on the length we will do chunking
+
 
+# Split points in order of preference ("" = anywhere between two tokens)
+SEPARATORS = ["\n\n", "\n", " ", ""]
 
 text_splitter = RecursiveCharacterTextSplitter(
     chunk_size= config.CHUNK_SIZE,
     chunk_overlap= config.CHUNK_OVERLAP,
     length_function=get_token_length,
     add_start_index=True,
-    separators=["\n\n", "\n", " ", ""]
+    separators=SEPARATORS
 )
 
 
-def fetch_text_title(title):
-    try:
-        url = config.WIKIPEDIA_API_URL
-        
-        # 1. Fetch Infobox (using action=parse for HTML)
-        infobox_text = ""
-        try:
-            parse_params = {
-                "action": "parse",
-                "page": title,
-                "prop": "text",
-                "format": "json"
-            }
-            response = requests.get(url, headers=HEADERS, params=parse_params)
-            data = response.json()
-            if 'parse' in data and 'text' in data['parse']:
-                raw_html = data['parse']['text']['*']
-                soup = BeautifulSoup(raw_html, 'html.parser')
-                infobox = soup.find('table', {'class': 'infobox'})
-                if infobox:
-                    extracted_data = []
-                    for tr in infobox.find_all('tr'):
-                        th = tr.find('th')
-                        td = tr.find('td')
-                        if th and td:
-                            key = th.get_text(" ", strip=True)
-                            value = td.get_text(" ", strip=True)
-                            value = re.sub(r'\[\d+\]', '', value) # clean refs
-                            extracted_data.append(f"{key}: {value}")
-                    if extracted_data:
-                         infobox_text = "Infobox:\n" + "\n".join(extracted_data) + "\n\n"
-        except Exception as e:
-            utils.print_error(f"Error fetching infobox for {title}: {e}")
-
-        # 2. Fetch Content (using action=query for clean text)
-        params = {
-            "action": "query",
-            "format": "json",
-            "titles": title,
-            "prop": "extracts",
-            "explaintext": True,
-            "redirects": 1
-        }
-        
-        # api call to fetch text
-        response = requests.get(url, headers=HEADERS, params= params)
-
-        #getting raw html from json response
-        data = response.json()
-        if 'error' in data:
-            utils.print_error(f"API Error: {data['error']}")
-            return ""
-            
-        page = next(iter(data['query']['pages'].values()))
-        text = page.get('extract', '')
-
-        if not text:
-            utils.print_error(f"No text found for title: {title}")
-            return ""
-        
-        # Combine infobox and main text
-        return infobox_text + text
-
-
-        
-    except Exception as e:
-        print(f"Error fetching URL {url}: {e}")
-        return None
-
+def _boundary_levels(text, offsets):
+    # levels[i]: best separator (index into SEPARATORS) in the text between token i-1 and token i;
+    # levels[n] = -1 marks the end of the document
+    n = len(offsets)
+    levels = np.full(n + 1, len(SEPARATORS) - 1, dtype=np.int8)
+    levels[n] = -1
+    spans = np.asarray(offsets, dtype=np.int64)
+    starts, ends = spans[:, 0], spans[:, 1]
+    # only gaps with text in them can hold a separator
+    for i in (np.flatnonzero(starts[1:] > ends[:-1]) + 1).tolist():
+        gap = text[ends[i - 1]:starts[i]]
+        for level, separator in enumerate(SEPARATORS[:-1]):
+            if separator in gap:
+                levels[i] = level
+                break
+    return levels
+
+
+def _split_long_tokens(offsets, max_chars):
+    # A token spanning more than max_chars characters (an [UNK] for a very long word)
+    # becomes pieces of max_chars characters, each counted as one token
+    if all(end - start <= max_chars for start, end in offsets):
+        return offsets
+    pieces = []
+    for start, end in offsets:
+        pieces.extend((i, min(i + max_chars, end)) for i in range(start, end, max_chars))
+    return pieces
+
+
+def split_document(text, chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP,
+                   max_chars=config.CHUNK_MAX_CHARS):
+    """
+    (chunks, token_lengths) for one document, tokenized once.
+
+    Chunks are sliced on the token/offset arrays: each takes up to chunk_size tokens
+    (special tokens included, as get_token_length counts them) and at most max_chars
+    characters, and ends at the last split point of the best separator level in reach,
+    like the recursive splitter. The next chunk starts at most chunk_overlap tokens
+    earlier, on a split point of the same level. Token lengths come from the document
+    tokenization (a chunk cut inside a word may tokenize slightly differently on its own).
+    """
+    if text is None or text.strip() == "":
+        return [], []
+    tokenizer = get_tokenizer()
+    if config.CHUNKER != "token" or not tokenizer.is_fast:
+        # Offsets need a fast (Rust) tokenizer
+        chunks = text_splitter.split_text(text)
+        return chunks, [get_token_length(chunk) for chunk in chunks]
+
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    offsets = _split_long_tokens(offsets, max_chars)
+    n = len(offsets)
+    if n == 0:
+        return [], []
+    special = tokenizer.num_special_tokens_to_add()
+    budget = max(1, chunk_size - special)
+    levels = _boundary_levels(text, offsets)
+    spans = np.asarray(offsets, dtype=np.int64)
+
+    chunks, token_lengths = [], []
+    start = 0
+    while start < n:
+        # tokens that end within max_chars of the chunk start (at least one: no token is longer)
+        in_chars = max(start + 1, int(np.searchsorted(spans[:, 1], spans[start, 0] + max_chars, side='right')))
+        window = levels[start + 1:min(n, start + budget, in_chars) + 1]
+        best = window.min()
+        end = start + 1 + int(np.flatnonzero(window == best)[-1])
+        chunks.append(text[offsets[start][0]:offsets[end - 1][1]])
+        token_lengths.append(end - start + special)
+        if end == n:
+            break
+        # overlap: back up to the earliest split point of the same level within chunk_overlap tokens,
+        # leaving room in max_chars for the next chunk to get past this one
+        low = max(start + 1, end - chunk_overlap,
+                  int(np.searchsorted(spans[:, 0], spans[end, 1] - max_chars, side='left')))
+        candidates = np.flatnonzero(levels[low:end] <= best)
+        start = low + int(candidates[0]) if len(candidates) else end
+    return chunks, token_lengths
 
 
+def chunk_text(text):
+    return split_document(text)[0]
 
 
-    words = text.split()
-    chunks = []
-    start = 0
-    while start < len(words):
-        end = min(start + chunk_size, len(words))
-        chunk = ' '.join(words[start:end])
-        chunks.append(chunk)
-        start += chunk_size - overlap
-    return chunks
+def make_chunk_id(title, content, occurrence=0):
+    # Same title and text -> same id on every run, so re-ingesting only touches what changed
+    # (occurrence tells apart identical chunks within one article)
+    digest = hashlib.sha256(f"{title}\0{content}\0{occurrence}".encode('utf-8')).hexdigest()
+    return f"chunk_{digest[:16]}"
 
-def chunk_text(text):
-    if text is None or text.strip() == "":
-        return []
-    return text_splitter.split_text(text) 
-# Using Langchain's RecursiveCharacterTextSplitter for chunking it will split the text based on token length configured in config.py
 
-def prepareMetaData(title, url, chunks: list):
+def prepareMetaData(title, url, chunks: list, token_lengths=None):
+    # token_lengths from split_document saves tokenizing every chunk again
+    if token_lengths is None:
+        token_lengths = [get_token_length(chunk) for chunk in chunks]
     metadata_list = []
-    # Prepare metadata for each chunk this will be saved into a json file as metadata
+    seen = {}
+    # Prepare metadata for each chunk this will be saved into the chunk store
     for i, chunk in enumerate(chunks):
+        occurrence = seen.get(chunk, 0)
+        seen[chunk] = occurrence + 1
         metadata = {
-            "chunk_id":f"chunk_{uuid.uuid4().hex[:8]}",
+            "chunk_id": make_chunk_id(title, chunk, occurrence),
             "title": title,
             "url": url,
             "chunk_index": i,
             "content": chunk,
             "metadata":{
-                "token_length": get_token_length(chunk),
+                "token_length": token_lengths[i],
                 "chunk_index": i
             }
         }
@@ -141,6 +153,12 @@ def prepareMetaData(title, url, chunks: list):
     return metadata_list
 
 
+def chunk_article(title, url, text):
+    """Chunk metadata for one article; a module-level function so process pools can run it."""
+    chunks, token_lengths = split_document(text)
+    return prepareMetaData(title, url, chunks, token_lengths)
+
+
 def fetch_text_camelia():
     text = fetch_text_title("Camellia_(cipher)")
     print(text)
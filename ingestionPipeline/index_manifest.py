@@ -0,0 +1,126 @@
+"""
+Manifest of what the last ingestion indexed (files/index_manifest.json).
+
+For every chunk pushed to the vector store and the BM25 index it records a
+digest of the fields that end up there, plus the settings the indexes were
+built with (embedding model, vector store, chunking). Incremental ingestion
+diffs the new chunk list against it: only new or changed chunks are embedded
+and indexed, and chunk ids that disappeared are deleted from the indexes.
+
+    {"settings": {...}, "chunks": {chunk_id: digest}}
+
+The manifest is written (atomically) only after the indexes were updated, so
+an interrupted ingest is diffed against the last state that completed.
+"""
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from embedding_service import embedding_model_id
+
+
+def chunker_settings():
+    # Chunks of an unchanged page can only be reused when they were cut the same way
+    return {
+        "chunker": config.CHUNKER,
+        "tokenizer_model": config.TOKENIZER_MODEL,
+        "chunk_size": config.CHUNK_SIZE,
+        "chunk_overlap": config.CHUNK_OVERLAP,
+        "chunk_max_chars": config.CHUNK_MAX_CHARS,
+    }
+
+
+def index_settings():
+    # Any change here means the existing vectors cannot be reused
+    return {
+        "embedding_model": embedding_model_id(),
+        "vector_store": config.VECTOR_STORE,
+        "index": config.PINECONE_INDEX_NAME if config.VECTOR_STORE == "pinecone" else os.path.abspath(config.LOCAL_VECTOR_DIR),
+        "chunker": chunker_settings(),
+        "metadata_text": config.VECTOR_METADATA_TEXT,
+    }
+
+
+def chunk_digest(chunk):
+    """Digest of the chunk fields stored in the indexes (text and vector metadata)."""
+    fields = [chunk['title'], chunk['url'], str(chunk['chunk_index']), chunk['content']]
+    return hashlib.sha256("\0".join(fields).encode('utf-8')).hexdigest()[:16]
+
+
+def load_manifest(path=config.INDEX_MANIFEST_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def resolve_manifest(incremental=config.INCREMENTAL_INGEST):
+    """
+    (previous_manifest, manifest, reuse_chunks) for an ingestion run: the manifest to diff
+    against (None means re-index everything) and whether chunks of unchanged pages can be kept.
+    """
+    previous_manifest = load_manifest()
+    manifest = previous_manifest if incremental else None
+    if manifest is not None and manifest["settings"] != index_settings():
+        print("Embedding model, vector store or chunking changed since the last ingestion: re-indexing all chunks")
+        manifest = None
+    # chunks of unchanged pages can only be reused if they were cut with the current settings
+    reuse_chunks = previous_manifest is not None and previous_manifest["settings"]["chunker"] == chunker_settings()
+    return previous_manifest, manifest, reuse_chunks
+
+
+def reusable_chunks(title, url, text, unchanged, old_chunks, reuse_chunks):
+    """Previous chunks to keep for an article instead of chunking its text again (None: chunk it)."""
+    if not old_chunks:
+        return None
+    if reuse_chunks and unchanged and old_chunks[0]['url'] == url:
+        # same revision as last run: keep its chunks (and chunk ids) as they are
+        return old_chunks
+    if text is None:
+        # fetch failed: keep the previous chunks rather than dropping the article from the indexes
+        return old_chunks
+    return None
+
+
+def diff_chunks(old_metadata, new_metadata):
+    """
+    Chunks that are new or changed in any field, and chunk ids that disappeared,
+    between two metadata lists.
+    """
+    old_by_id = {item['chunk_id']: item for item in old_metadata}
+    new_ids = {item['chunk_id'] for item in new_metadata}
+    changed = [item for item in new_metadata if old_by_id.get(item['chunk_id']) != item]
+    removed = [chunk_id for chunk_id in old_by_id if chunk_id not in new_ids]
+    return changed, removed
+
+
+def save_manifest(chunks, path=config.INDEX_MANIFEST_PATH):
+    write_manifest({chunk['chunk_id']: chunk_digest(chunk) for chunk in chunks}, path)
+
+
+def write_manifest(digests, path=config.INDEX_MANIFEST_PATH):
+    """Write the manifest from {chunk_id: chunk_digest} of the indexed chunks."""
+    manifest = {
+        "settings": index_settings(),
+        "chunks": digests,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def diff_manifest(manifest, chunks):
+    """(added_or_changed_chunks, removed_chunk_ids) of a chunk list against the manifest."""
+    indexed = manifest["chunks"]
+    new_ids = set()
+    changed = []
+    for chunk in chunks:
+        new_ids.add(chunk['chunk_id'])
+        if indexed.get(chunk['chunk_id']) != chunk_digest(chunk):
+            changed.append(chunk)
+    removed = [chunk_id for chunk_id in indexed if chunk_id not in new_ids]
+    return changed, removed
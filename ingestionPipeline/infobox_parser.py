@@ -0,0 +1,133 @@
+"""
+Infobox extraction from rendered article HTML without parsing the whole page.
+
+The first <table> whose class list contains "infobox" is located with a
+string search, and only that table is run through the stdlib HTMLParser
+(the parser BeautifulSoup's 'html.parser' builder uses) into a small tree,
+stopping as soon as the table is closed. The rows are then read the way the
+BeautifulSoup version did: every <tr> below the table, its first <th> and
+first <td>, text joined with spaces from stripped strings (comments, <style>
+and <script> excluded), [n] reference marks removed.
+"""
+import re
+from html.parser import HTMLParser
+
+_TABLE_START = re.compile(r'<table\b', re.IGNORECASE)
+# Elements that never have children or an end tag
+_VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+# Elements whose text get_text() leaves out
+_NO_TEXT = {"style", "script", "template"}
+_REF = re.compile(r'\[\d+\]')
+_FEED_SIZE = 2048  # HTMLParser tokenizes all it is fed, so feed small steps and stop once the table closes
+
+
+class _Node:
+    __slots__ = ("tag", "children")
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.children = []  # _Node or str
+
+    def find_all(self, tag):
+        for child in self.children:
+            if isinstance(child, _Node):
+                if child.tag == tag:
+                    yield child
+                yield from child.find_all(tag)
+
+    def find(self, tag):
+        return next(self.find_all(tag), None)
+
+    def strings(self):
+        for child in self.children:
+            if isinstance(child, str):
+                yield child
+            elif child.tag not in _NO_TEXT:
+                yield from child.strings()
+
+    def get_text(self):
+        return " ".join(s for s in (string.strip() for string in self.strings()) if s)
+
+
+class _TableParser(HTMLParser):
+    """Builds the tree of the table starting at the beginning of the input; done once it is closed."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = None
+        self.is_infobox = False
+        self.done = False
+        self._stack = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self.root is None:
+            classes = " ".join(value or "" for name, value in attrs if name == "class").split()
+            self.is_infobox = tag == "table" and "infobox" in classes
+            if not self.is_infobox:
+                self.done = True
+                return
+            self.root = _Node(tag)
+            self._stack.append(self.root)
+            return
+        node = _Node(tag)
+        self._stack[-1].children.append(node)
+        if tag not in _VOID:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.done and self._stack:
+            self._stack[-1].children.append(_Node(tag))
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        # close the most recent open element with this name; stray end tags are ignored
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                break
+        if not self._stack:
+            self.done = True
+
+    def handle_data(self, data):
+        if self.done or not self._stack:
+            return
+        children = self._stack[-1].children
+        # adjacent text (split by feed chunks or entities) is one string
+        if children and isinstance(children[-1], str):
+            children[-1] += data
+        else:
+            children.append(data)
+
+
+def find_infobox(raw_html):
+    """Tree of the first table with class "infobox" in the HTML, or None."""
+    for match in _TABLE_START.finditer(raw_html):
+        parser = _TableParser()
+        start = match.start()
+        while not parser.done and start < len(raw_html):
+            parser.feed(raw_html[start:start + _FEED_SIZE])
+            start += _FEED_SIZE
+        if parser.is_infobox:
+            return parser.root
+    return None
+
+
+def parse_infobox(raw_html):
+    """'Infobox:\\nkey: value\\n...\\n\\n' text from a parsed page's HTML ('' if it has no infobox)."""
+    infobox = find_infobox(raw_html)
+    if infobox is None:
+        return ""
+    extracted_data = []
+    for tr in infobox.find_all('tr'):
+        th = tr.find('th')
+        td = tr.find('td')
+        if th and td:
+            key = th.get_text()
+            value = _REF.sub('', td.get_text())  # clean refs
+            extracted_data.append(f"{key}: {value}")
+    if not extracted_data:
+        return ""
+    return "Infobox:\n" + "\n".join(extracted_data) + "\n\n"
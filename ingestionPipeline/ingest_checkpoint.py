@@ -0,0 +1,114 @@
+"""
+Checkpoints of an ingestion run, so a re-run after a crash resumes where it stopped.
+
+Fetched pages are already persisted by the fetch cache and chunks by the
+chunk store (both written as the run goes). What is left is the index side,
+kept under files/ingest_checkpoint/ until the run completes:
+
+    run.json              index settings the checkpoint belongs to
+    vectors.log           "chunk_id digest" per line, appended after each upsert
+    bm25.log              same, appended after each BM25 commit
+    embedded/*.npz        embedded batches not upserted yet (ids, digests, vectors)
+
+A re-run with the same settings skips chunks whose current digest is already
+logged, upserts leftover embedded batches without encoding them again, and
+reuses the chunks stored for unchanged pages. Upserts are by deterministic
+chunk id, so writing a chunk twice (e.g. the batch in flight at the crash)
+only overwrites it. The directory is cleared once the index manifest is
+written.
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+try:
+    from index_manifest import index_settings
+except ImportError:
+    from ingestionPipeline.index_manifest import index_settings
+
+RUN_FILE = "run.json"
+EMBEDDED_DIR = "embedded"
+
+
+class IngestCheckpoint:
+
+    def __init__(self, path=config.INGEST_CHECKPOINT_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self._next_batch = 0
+
+    def start(self):
+        """Open the checkpoint for a run; True when resuming an interrupted run with the same settings."""
+        run_path = os.path.join(self.path, RUN_FILE)
+        resuming = False
+        if os.path.exists(run_path):
+            with open(run_path, 'r', encoding='utf-8') as f:
+                resuming = json.load(f).get("settings") == index_settings()
+            if not resuming:
+                print("Discarding the ingestion checkpoint: index settings changed since it was written")
+                self.clear()
+        os.makedirs(os.path.join(self.path, EMBEDDED_DIR), exist_ok=True)
+        if not resuming:
+            with open(f"{run_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump({"settings": index_settings()}, f)
+            os.replace(f"{run_path}.tmp", run_path)
+        existing = [int(name[len("batch_"):-len(".npz")]) for name in os.listdir(os.path.join(self.path, EMBEDDED_DIR))
+                    if name.startswith("batch_") and name.endswith(".npz")]
+        self._next_batch = max(existing, default=-1) + 1
+        return resuming
+
+    def done(self, sink):
+        """{chunk_id: digest} logged for a sink ("vectors" or "bm25")."""
+        digests = {}
+        log_path = os.path.join(self.path, f"{sink}.log")
+        if os.path.exists(log_path):
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    # a line cut short by the crash is ignored
+                    if len(parts) == 2:
+                        digests[parts[0]] = parts[1]
+        return digests
+
+    def record(self, sink, digests):
+        """Append {chunk_id: digest} to a sink's log and make it durable."""
+        with self._lock:
+            with open(os.path.join(self.path, f"{sink}.log"), 'a', encoding='utf-8') as f:
+                f.writelines(f"{chunk_id} {digest}\n" for chunk_id, digest in digests.items())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def save_embedded(self, ids, digests, vectors):
+        """Persist an embedded batch until it is upserted; returns its path."""
+        with self._lock:
+            batch_no = self._next_batch
+            self._next_batch += 1
+        path = os.path.join(self.path, EMBEDDED_DIR, f"batch_{batch_no:08d}.npz")
+        with open(f"{path}.tmp", 'wb') as f:
+            np.savez(f, ids=np.array(ids), digests=np.array(digests), vectors=np.asarray(vectors, dtype=np.float32))
+        os.replace(f"{path}.tmp", path)
+        return path
+
+    def pending_embedded(self):
+        """(path, ids, digests, vectors) of embedded batches left by an interrupted run."""
+        directory = os.path.join(self.path, EMBEDDED_DIR)
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(directory, name)
+            with np.load(path) as data:
+                yield path, data["ids"].tolist(), data["digests"].tolist(), data["vectors"]
+
+    def drop_embedded(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
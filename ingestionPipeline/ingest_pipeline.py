@@ -1,25 +1,33 @@
 import sys
 import os
-import json
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import config as CONFIG
+from chunk_store import get_chunk_store
 
 try:
-    from vectorize_chunks import vectorize_data
-    from fetch_text_chunking import chunk_text, fetch_text_title, prepareMetaData
+    from vectorize_chunks import update_vectors
+    from index_manifest import diff_chunks, diff_manifest, resolve_manifest, reusable_chunks, save_manifest
+    from fetch_text_chunking import chunk_article
+    from wiki_fetch import fetch_texts, fetch_texts_cached
     from fetch_dynamicUrls import get_dynamic_urls
-    from build_bm25model import build_bm25_index
+    from build_bm25model import build_bm25_index, update_bm25_index
+    from streaming_ingest import StreamingIngest
+    from ingest_checkpoint import IngestCheckpoint
 except ImportError:
     # When imported from root (app.py), these need to be package relative or absolute
-    from ingestionPipeline.vectorize_chunks import vectorize_data
-    from ingestionPipeline.fetch_text_chunking import chunk_text, fetch_text_title, prepareMetaData
+    from ingestionPipeline.vectorize_chunks import update_vectors
+    from ingestionPipeline.index_manifest import diff_chunks, diff_manifest, resolve_manifest, reusable_chunks, save_manifest
+    from ingestionPipeline.fetch_text_chunking import chunk_article
+    from ingestionPipeline.wiki_fetch import fetch_texts, fetch_texts_cached
     from ingestionPipeline.fetch_dynamicUrls import get_dynamic_urls
-    from ingestionPipeline.build_bm25model import build_bm25_index
+    from ingestionPipeline.build_bm25model import build_bm25_index, update_bm25_index
+    from ingestionPipeline.streaming_ingest import StreamingIngest
+    from ingestionPipeline.ingest_checkpoint import IngestCheckpoint
 
 
-def ingest_pipeline():
+def ingest_pipeline(incremental=CONFIG.INCREMENTAL_INGEST):
 
     # fetching dynamic and fixed urls combing all 
     
@@ -31,33 +39,68 @@ def ingest_pipeline():
 
     print(f"Total URLs to process: {len(all_urls)}")
 
+    if CONFIG.STREAMING_INGEST:
+        # fetch -> chunk -> embed -> upsert as overlapping stages (same result as below)
+        StreamingIngest(all_urls, incremental).run()
+        return
+
+    # what the indexes held after the last completed ingestion
+    previous_manifest, manifest, reuse_chunks = resolve_manifest(incremental)
+
     metadata_list = []
 
-    # loop through all urls fetch text chunk and prepare metadata
+    # fetch all articles concurrently (pooled session, rate limited, retried);
+    # with the fetch cache only pages edited since the last run are downloaded
+    if CONFIG.FETCH_CACHE:
+        texts, unchanged = fetch_texts_cached(all_urls)
+    else:
+        texts, unchanged = fetch_texts(all_urls), set()
+
+    store = get_chunk_store()
+
+    # keep the previous metadata so only the changes are written
+    old_metadata = list(store.iter_chunks())
+    old_chunks_by_title = {}
+    for item in old_metadata:
+        old_chunks_by_title.setdefault(item['title'], []).append(item)
+
+    # loop through all urls chunk the fetched text and prepare metadata
     for idx, (title, url) in enumerate(all_urls.items()):
+        text = texts[title]
+        kept = reusable_chunks(title, url, text, title in unchanged, old_chunks_by_title.get(title), reuse_chunks)
+        if kept is not None:
+            print(f"{idx+1}. {title} - keeping {len(kept)} previous chunks")
+            metadata_list.extend(kept)
+            continue
         print(f"{idx+1}. {title} - {url}")
-        text = fetch_text_title(title)
-        chunks = chunk_text(text)
-        metadata = prepareMetaData(title, url, chunks)
+        metadata = chunk_article(title, url, text)
         metadata_list.extend(metadata)
         
-    # saving the metadata to a json file
-    # Ensure correct path for metadata file
-    metadata_path = os.path.join("files", "metadata.json")
-    # If running from inside ingestionPipeline, adjust path or assume run from root
-    if not os.path.exists("files") and os.path.exists("../files"):
-         metadata_path = os.path.join("../files", "metadata.json")
-
-    with open(metadata_path, 'w') as f:
-        json.dump(metadata_list, f, indent=4)
-    print(f"Metadata for {len(metadata_list)} chunks saved to '{metadata_path}'")
+    # saving only the changed chunks to the chunk store
+    changed_chunks, removed_chunk_ids = diff_chunks(old_metadata, metadata_list)
+    store.apply(changed_chunks, removed_chunk_ids)
+    print(f"Chunk store '{store.path}': {len(metadata_list)} chunks, "
+          f"{len(changed_chunks)} added or changed, {len(removed_chunk_ids)} removed")
 
-    # finally vectorizing the chunks and storing into chromadb
-    vectorize_data()
+    if manifest is not None:
+        # incremental: only the delta against what was indexed goes to the indexes
+        index_changed, index_removed = diff_manifest(manifest, metadata_list)
+        failed_ids = update_vectors(index_changed, index_removed)
+        update_bm25_index(index_changed, index_removed)
+    else:
+        # full re-index; vectors of chunks that no longer exist (including ids
+        # from before chunk ids were stable) are deleted as well
+        previous_ids = previous_manifest["chunks"] if previous_manifest else [item['chunk_id'] for item in old_metadata]
+        new_ids = {item['chunk_id'] for item in metadata_list}
+        failed_ids = update_vectors(metadata_list, [chunk_id for chunk_id in previous_ids if chunk_id not in new_ids])
+        build_bm25_index()
 
-    # building BM25 index
-    
-    build_bm25_index()
+    # chunks whose upsert failed stay out of the manifest and are retried next run
+    failed_ids = set(failed_ids)
+    save_manifest([item for item in metadata_list if item['chunk_id'] not in failed_ids])
+    print(f"Index manifest saved to '{CONFIG.INDEX_MANIFEST_PATH}'")
+    # progress of an interrupted streaming run is superseded by the manifest
+    IngestCheckpoint().clear()
 
 
 if __name__ == "__main__":
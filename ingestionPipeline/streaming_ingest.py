@@ -0,0 +1,400 @@
+"""
+Streaming ingestion: fetch -> chunk -> embed -> upsert as overlapping stages.
+
+Each stage runs in its own thread and hands its output to the next one through
+a bounded queue, so a fast stage waits for the slower one downstream instead
+of piling up the whole corpus in memory:
+
+    fetch    FETCH_BATCH_TITLES articles at a time (fetch cache, concurrent requests)
+      | queue: 2 fetch batches of articles
+    chunk    articles chunked in a process pool (CHUNK_WORKERS); the chunk store
+             delta is written per article and chunks missing from the index
+             manifest move on (BM25 gets them in BM25_BUILD_BATCH segments)
+      | queue: 2 embedding batches of chunks
+    embed    EMBED_BATCH_SIZE chunks per encode call
+      | queue: 4 vector store batches
+    upsert   vector store writes, UPSERT_MAX_IN_FLIGHT requests at a time
+
+Only chunk ids and digests are kept for the whole run. Chunks and articles that
+are no longer produced are removed once every stage finished, and the index
+manifest is written last; if a stage fails nothing is removed and the manifest
+is left as it was, so the next run retries. The result matches the sequential
+ingest_pipeline. run() prints per-stage throughput and queue depths.
+
+Progress is checkpointed as it happens (see ingest_checkpoint): embedded
+batches until they are upserted, upserted and BM25-committed chunk ids, so a
+re-run after a crash continues with what was not indexed yet.
+
+The chunk workers and the BM25 preprocessing workers are started with
+forkserver or spawn, never fork (see process_pool): the stages, the upsert
+engine, the HTTP pools and the model preload all run threads by then.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+
+try:
+    import resource  # peak memory in the report (not on Windows)
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import utils
+from bm25_segments import BM25IndexWriter, read_manifest
+from chunk_store import get_chunk_store
+from process_pool import process_pool
+from upsert_engine import UpsertEngine
+
+try:
+    from fetch_text_chunking import chunk_article, get_tokenizer
+    from wiki_fetch import fetch_texts, fetch_texts_cached
+    from vectorize_chunks import (BATCH_SIZE, embedding_encoder, embedding_texts, finish_embedding_cache,
+                                  open_vector_store, vector_metadata)
+    from build_bm25model import build_bm25_index, corpus_hash, tokenize_chunks
+    from index_manifest import chunk_digest, diff_chunks, resolve_manifest, reusable_chunks, write_manifest
+    from ingest_checkpoint import IngestCheckpoint
+except ImportError:
+    from ingestionPipeline.fetch_text_chunking import chunk_article, get_tokenizer
+    from ingestionPipeline.wiki_fetch import fetch_texts, fetch_texts_cached
+    from ingestionPipeline.vectorize_chunks import (BATCH_SIZE, embedding_encoder, embedding_texts,
+                                                    finish_embedding_cache, open_vector_store, vector_metadata)
+    from ingestionPipeline.build_bm25model import build_bm25_index, corpus_hash, tokenize_chunks
+    from ingestionPipeline.index_manifest import chunk_digest, diff_chunks, resolve_manifest, reusable_chunks, write_manifest
+    from ingestionPipeline.ingest_checkpoint import IngestCheckpoint
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+class StageStats:
+    """Items handled, active time and input queue depth of one stage."""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.wall = 0.0
+        self.waiting = 0.0  # blocked on an empty input queue
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def sample_depth(self, depth):
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    @property
+    def mean_depth(self):
+        return self._depth_total / self._depth_samples if self._depth_samples else 0.0
+
+    @property
+    def throughput(self):
+        active = self.wall - self.waiting
+        return self.items / active if active > 0 else 0.0
+
+
+class StageQueue(queue.Queue):
+    """Bounded queue in front of a stage; records its depth and the stage's waiting time."""
+
+    def __init__(self, stats, maxsize):
+        super().__init__(maxsize)
+        self.stats = stats
+        self.finished = False  # end-of-stream marker consumed
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self.stats.sample_depth(self.qsize())
+
+    def drain(self):
+        """Items until the end-of-stream marker."""
+        while True:
+            start = time.perf_counter()
+            item = self.get()
+            self.stats.waiting += time.perf_counter() - start
+            if item is _DONE:
+                self.finished = True
+                return
+            yield item
+
+
+class StreamingIngest:
+
+    def __init__(self, all_urls, incremental=config.INCREMENTAL_INGEST, chunk_workers=config.CHUNK_WORKERS,
+                 embed_batch_size=config.EMBED_BATCH_SIZE):
+        self.all_urls = dict(all_urls)
+        self.chunk_workers = chunk_workers
+        self.embed_batch_size = embed_batch_size
+
+        self.stats = {
+            "fetch": StageStats("fetch", "articles"),
+            "chunk": StageStats("chunk", "articles"),
+            "embed": StageStats("embed", "chunks"),
+            "upsert": StageStats("upsert", "vectors"),
+        }
+        self.fetched = StageQueue(self.stats["chunk"], 2 * config.FETCH_BATCH_TITLES)
+        self.to_embed = StageQueue(self.stats["embed"], 2 * embed_batch_size)
+        self.to_upsert = StageQueue(self.stats["upsert"], 4)
+        self.errors = []
+
+        self.chunk_store = get_chunk_store()
+        self.old_store_ids = set(self.chunk_store.ids())
+        # what the indexes held after the last completed ingestion
+        self.previous_manifest, self.manifest, self.reuse_chunks = resolve_manifest(incremental)
+
+        # progress of an interrupted run with the same settings
+        self.checkpoint = IngestCheckpoint()
+        self.resuming = self.checkpoint.start()
+        self.vectors_done = self.checkpoint.done("vectors")
+        self.bm25_done = self.checkpoint.done("bm25")
+        # the stored chunks were cut with the current settings by the interrupted run
+        self.reuse_chunks = self.reuse_chunks or self.resuming
+
+        self.seen = {}  # chunk_id -> digest of every chunk produced this run
+        self.failed_ids = set()
+        self.store_changed = 0
+        self.store_removed = 0
+
+        # BM25 takes the delta as it streams by, unless the index has to be rebuilt anyway
+        bm25_manifest = read_manifest(config.BM25_INDEX_DIR)
+        incremental_bm25 = (self.manifest is not None and bm25_manifest is not None
+                            and bm25_manifest.get("tokenizer", "nltk") == config.BM25_TOKENIZER)
+        self.bm25_writer = BM25IndexWriter(config.BM25_INDEX_DIR) if incremental_bm25 else None
+        self.bm25_pending = []
+        # upserts a buffering vector store has not made durable yet: (ids, digests, path)
+        self.unflushed = []
+        self.upserter = None  # UpsertEngine, opened with the first batch
+
+    # --- stages ---
+
+    def _run_stage(self, name, work, inbox, outbox):
+        start = time.perf_counter()
+        try:
+            work()
+        except Exception as e:
+            utils.print_error(f"Streaming ingestion stage '{name}' failed: {e}")
+            traceback.print_exc()
+            self.errors.append((name, e))
+            # keep draining so the stage upstream never blocks on a full queue
+            if inbox is not None and not inbox.finished:
+                for _ in inbox.drain():
+                    pass
+        finally:
+            self.stats[name].wall = time.perf_counter() - start
+            if outbox is not None:
+                outbox.put(_DONE)
+
+    def _fetch(self):
+        titles = list(self.all_urls)
+        for i in range(0, len(titles), config.FETCH_BATCH_TITLES):
+            batch = titles[i:i + config.FETCH_BATCH_TITLES]
+            if config.FETCH_CACHE:
+                texts, unchanged = fetch_texts_cached(batch)
+            else:
+                texts, unchanged = fetch_texts(batch), set()
+            self.stats["fetch"].items += len(batch)
+            for title in batch:
+                self.fetched.put((title, self.all_urls[title], texts[title], title in unchanged))
+
+    def _chunk(self):
+        # Results are handled in input order; at most 2 articles per worker are in flight
+        pending = deque()
+        # each worker loads the tokenizer once
+        with process_pool(self.chunk_workers, initializer=get_tokenizer) as pool:
+            for title, url, text, unchanged in self.fetched.drain():
+                old_chunks = self.chunk_store.get_by_title(title)
+                kept = reusable_chunks(title, url, text, unchanged, old_chunks, self.reuse_chunks)
+                if kept is not None:
+                    future = Future()
+                    future.set_result(kept)
+                else:
+                    future = pool.submit(chunk_article, title, url, text)
+                pending.append((old_chunks, future))
+                if len(pending) >= 2 * self.chunk_workers:
+                    self._store_article(*pending.popleft())
+            while pending:
+                self._store_article(*pending.popleft())
+
+    def _store_article(self, old_chunks, future):
+        chunks = future.result()
+        changed, removed = diff_chunks(old_chunks, chunks)
+        if changed or removed:
+            self.chunk_store.apply(changed, removed)
+            self.store_changed += len(changed)
+            self.store_removed += len(removed)
+        for chunk in chunks:
+            digest = chunk_digest(chunk)
+            self.seen[chunk['chunk_id']] = digest
+            if self.manifest is not None and self.manifest["chunks"].get(chunk['chunk_id']) == digest:
+                continue
+            if self.vectors_done.get(chunk['chunk_id']) != digest:
+                self.to_embed.put(chunk)
+            if self.bm25_writer is not None and self.bm25_done.get(chunk['chunk_id']) != digest:
+                self.bm25_pending.append(chunk)
+                if len(self.bm25_pending) >= config.BM25_BUILD_BATCH:
+                    self._flush_bm25()
+        self.stats["chunk"].items += 1
+
+    def _flush_bm25(self):
+        # Committed per batch so the checkpoint can record it
+        batch, self.bm25_pending = self.bm25_pending, []
+        if batch:
+            self.bm25_writer.add([item['chunk_id'] for item in batch], tokenize_chunks(batch), corpus_hash(batch))
+            self.bm25_writer.commit()
+            self.checkpoint.record("bm25", {item['chunk_id']: chunk_digest(item) for item in batch})
+
+    def _embed(self):
+        encode = embedding_encoder()
+        batch = []
+        for chunk in self.to_embed.drain():
+            batch.append(chunk)
+            if len(batch) >= self.embed_batch_size:
+                self._encode(encode, batch)
+                batch = []
+        if batch:
+            self._encode(encode, batch)
+
+    def _encode(self, encode, batch):
+        texts = embedding_texts(batch)
+        vectors = encode(texts)
+        self.stats["embed"].items += len(batch)
+        for start in range(0, len(batch), BATCH_SIZE):
+            part = batch[start:start + BATCH_SIZE]
+            ids = [item['chunk_id'] for item in part]
+            digests = [chunk_digest(item) for item in part]
+            part_vectors = vectors[start:start + BATCH_SIZE]
+            # kept on disk until upserted, so a crash does not cost the embedding work
+            path = self.checkpoint.save_embedded(ids, digests, part_vectors)
+            self.to_upsert.put((ids, digests, part_vectors, vector_metadata(part, texts[start:start + BATCH_SIZE]), path))
+
+    def _upsert(self):
+        try:
+            for ids, digests, vectors, metadata, path in self.to_upsert.drain():
+                self._upsert_batch(ids, digests, vectors, metadata, path)
+        finally:
+            # waits for the batches still in flight
+            if self.upserter is not None:
+                self.upserter.close()
+
+    def _upsert_batch(self, ids, digests, vectors, metadata, path):
+        # Blocks only while UPSERT_MAX_IN_FLIGHT requests are in flight
+        if self.upserter is None:
+            self.upserter = UpsertEngine(open_vector_store())
+        self.upserter.submit(ids, vectors, metadata,
+                             on_done=lambda upserted, failed: self._upserted(ids, digests, path, upserted, failed))
+
+    def _upserted(self, ids, digests, path, upserted, failed):
+        # Called by the upsert engine once every vector of the batch was sent
+        self.stats["upsert"].items += len(upserted)
+        if failed:
+            # the embedded batch stays on disk, so the next run sends it again
+            self.failed_ids.update(failed)
+        elif self.upserter.store.writes_through:
+            self._checkpoint_upserted(ids, digests, path)
+        else:
+            # the local store only persists on flush; until then the embedded batch stays on disk
+            self.unflushed.append((ids, digests, path))
+
+    def _checkpoint_upserted(self, ids, digests, path):
+        self.checkpoint.record("vectors", dict(zip(ids, digests)))
+        self.checkpoint.drop_embedded(path)
+
+    def _resume_embedded(self):
+        # Batches embedded but not upserted when the previous run stopped
+        for path, ids, digests, vectors in self.checkpoint.pending_embedded():
+            chunks = self.chunk_store.get_many(ids)
+            keep = [i for i, (chunk_id, digest) in enumerate(zip(ids, digests))
+                    if chunk_id in chunks and chunk_digest(chunks[chunk_id]) == digest]
+            if keep:
+                part = [chunks[ids[i]] for i in keep]
+                kept_ids = [ids[i] for i in keep]
+                kept_digests = [digests[i] for i in keep]
+                self._upsert_batch(kept_ids, kept_digests, vectors[keep], vector_metadata(part, embedding_texts(part)), path)
+                self.vectors_done.update(zip(kept_ids, kept_digests))
+            else:
+                self.checkpoint.drop_embedded(path)
+
+    # --- run ---
+
+    def run(self):
+        print(f"Streaming ingestion of {len(self.all_urls)} articles "
+              f"({'incremental' if self.manifest is not None else 'full re-index'})")
+        start = time.perf_counter()
+        if self.resuming:
+            print(f"Resuming an interrupted ingestion: {len(self.vectors_done)} vectors and "
+                  f"{len(self.bm25_done)} BM25 chunks already indexed")
+            self._resume_embedded()
+        stages = [
+            ("fetch", self._fetch, None, self.fetched),
+            ("chunk", self._chunk, self.fetched, self.to_embed),
+            ("embed", self._embed, self.to_embed, self.to_upsert),
+            ("upsert", self._upsert, self.to_upsert, None),
+        ]
+        threads = [threading.Thread(target=self._run_stage, args=stage, name=f"ingest-{stage[0]}") for stage in stages]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.errors:
+            names = ", ".join(name for name, _ in self.errors)
+            raise RuntimeError(f"Streaming ingestion failed in stage(s) {names}; "
+                               "nothing was removed and the index manifest was not updated") from self.errors[0][1]
+
+        self._finish()
+        self.report(time.perf_counter() - start)
+
+    def _finish(self):
+        # Chunks (and whole articles) not produced this run
+        stale_store_ids = [chunk_id for chunk_id in self.chunk_store.ids() if chunk_id not in self.seen]
+        self.chunk_store.delete(stale_store_ids)
+        self.store_removed += len(stale_store_ids)
+
+        if self.manifest is not None:
+            previous_ids = self.manifest["chunks"]
+        elif self.previous_manifest is not None:
+            previous_ids = self.previous_manifest["chunks"]
+        else:
+            previous_ids = self.old_store_ids
+        removed_ids = [chunk_id for chunk_id in previous_ids if chunk_id not in self.seen]
+
+        if removed_ids or self.stats["upsert"].items:
+            store = open_vector_store()
+            store.delete(removed_ids)
+            # The local store writes its new generation here; Pinecone writes through
+            store.flush()
+            for upserted in self.unflushed:
+                self._checkpoint_upserted(*upserted)
+
+        if self.bm25_writer is None:
+            build_bm25_index()
+        elif removed_ids:
+            self.bm25_writer.delete(removed_ids)
+            self.bm25_writer.commit()
+        self._flush_bm25()
+
+        finish_embedding_cache()
+
+        # chunks whose upsert failed stay out of the manifest and are retried next run
+        write_manifest({chunk_id: digest for chunk_id, digest in self.seen.items() if chunk_id not in self.failed_ids})
+        print(f"Chunk store: {len(self.seen)} chunks, {self.store_changed} added or changed, "
+              f"{self.store_removed} removed; indexes: {len(removed_ids)} chunks removed, "
+              f"{len(self.failed_ids)} upserts failed")
+        self.checkpoint.clear()
+
+    def report(self, elapsed):
+        print(f"\nStreaming ingestion finished in {elapsed:.1f}s")
+        print(f"  {'stage':<8} {'items':>16} {'active s':>9} {'items/s':>9} {'queue max':>10} {'queue mean':>11}")
+        for stats in self.stats.values():
+            active = stats.wall - stats.waiting
+            print(f"  {stats.name:<8} {stats.items:>7} {stats.unit:<8} {active:9.1f} {stats.throughput:9.1f}"
+                  f" {stats.max_depth:>10} {stats.mean_depth:11.1f}")
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux
+            print(f"  peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
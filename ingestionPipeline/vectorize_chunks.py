@@ -1,94 +1,141 @@
 import os
 import sys
-import time
-from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
-import utils
+from chunk_store import get_chunk_store
+from embedding_service import get_embedding_service
+from upsert_engine import UpsertEngine
+from vector_store import get_vector_store
+
+try:
+    from embedding_cache import get_embedding_cache
+except ImportError:
+    from ingestionPipeline.embedding_cache import get_embedding_cache
+
+# Pinecone recommends smaller batches than Chroma
+BATCH_SIZE = 100
+
+
+def open_vector_store():
+    # Initialize the vector store (Pinecone or local, see config.VECTOR_STORE)
+    print(f"Initializing vector store: {config.VECTOR_STORE}")
+    store = get_vector_store()
+    store.ensure_index(config.EMBEDDING_DIMENSION)
+    return store
+
+
+def embedding_texts(batch):
+    # Title is prepended so chunks carry their article context
+    return [f"{item['title']} {item['content']}" for item in batch]
+
+
+def embedding_encoder():
+    """
+    texts -> vectors with the shared embedding service, through the embedding cache
+    when EMBEDDING_CACHE is on. The model is only loaded once a text is not cached.
+    """
+    service = get_embedding_service()
+    if not config.EMBEDDING_CACHE:
+        return service.encode
+    cache = get_embedding_cache()
+    return lambda texts: cache.encode(texts, service.encode)
+
+
+def finish_embedding_cache():
+    """Evict cached vectors no chunk in the chunk store uses any more, save the cache and report its hit rate."""
+    if not config.EMBEDDING_CACHE:
+        return
+    cache = get_embedding_cache()
+    texts = (text for batch in get_chunk_store().iter_batches(BATCH_SIZE) for text in embedding_texts(batch))
+    evicted = cache.evict(texts)
+    cache.save()
+    stats = cache.stats()
+    print(f"Embedding cache: {stats['hits']}/{stats['hits'] + stats['misses']} chunks reused "
+          f"({stats['hit_rate']:.0%}), {evicted} evicted, {stats['entries']} cached")
+    cache.reset_stats()
+
+
+def vector_metadata(batch, texts):
+    # Pinecone metadata values must be strings, numbers, booleans, or lists of strings
+    # Only the filterable fields by default: retrieval reads chunk text from the chunk store by id
+    metadata = []
+    for j, item in enumerate(batch):
+        meta = {
+            "title": item['title'],
+            "url": item['url'],
+            "chunk_index": float(item['metadata']['chunk_index']), # Pinecone handles numbers
+        }
+        if config.VECTOR_METADATA_TEXT:
+            meta["text"] = texts[j] # Store the actual text for retrieval
+        metadata.append(meta)
+    return metadata
+
+
+def _upsert_batches(store, encode, batches):
+    # (vectors upserted, chunk ids that failed); embedding a batch overlaps the upload of the previous ones
+    engine = UpsertEngine(store)
+
+    for batch_no, batch in enumerate(batches):
 
-def vectorize_data():
-    print("Fetching corpus data...")
-    corpus_data = utils.fetch_metadata()
-    print(f"Fetched {len(corpus_data)} chunks.")
-
-    # Initialize Sentence Transformer for embedding generation
-    print(f"Loading embedding model: {config.EMBEDDING_MODEL}")
-    model = SentenceTransformer(config.EMBEDDING_MODEL)
-
-    # Initialize Pinecone
-    print("Initializing Pinecone...")
-    pc = Pinecone(api_key=config.PINECONE_API_KEY)
-
-    index_name = config.PINECONE_INDEX_NAME
-
-    # Check if index exists, if not create it (Serverless spec examples, adjust if using Pods)
-    # Note: Free tier often allows 1 starter index. We assume it exists or we try to create it.
-    existing_indexes = [index_info.name for index_info in pc.list_indexes()]
-    
-    if index_name not in existing_indexes:
-        print(f"Index '{index_name}' not found. Creating it...")
-        try:
-            pc.create_index(
-                name=index_name,
-                dimension=768, # Dimension for all-mpnet-base-v2
-                metric="cosine",
-                spec=ServerlessSpec(
-                    cloud="aws",
-                    region="us-east-1"
-                )
-            )
-            # Wait for index to be ready
-            while not pc.describe_index(index_name).status['ready']:
-                time.sleep(1)
-        except Exception as e:
-            print(f"Error creating index (might already exist or limit reached): {e}")
-            print("Attempting to proceed with existing index if available...")
-    
-    index = pc.Index(index_name)
-    print(f"Connected to index: {index_name}")
-
-    # Prepare data for upsert
-    batch_size = 100 # Pinecone recommends smaller batches than Chroma
-    
-    total_vectors = 0
-    
-    for i in range(0, len(corpus_data), batch_size):
-        batch = corpus_data[i:i + batch_size]
-        
         # Prepare batch data
         ids = [item['chunk_id'] for item in batch]
-        texts = [f"{item['title']} {item['content']}" for item in batch]
-        
+        texts = embedding_texts(batch)
+
         # Generate embeddings
-        embeddings = model.encode(texts).tolist()
-        
+        embeddings = encode(texts)
+
         # Prepare metadata
-        # Pinecone metadata values must be strings, numbers, booleans, or lists of strings
-        vectors_to_upsert = []
-        for j, item in enumerate(batch):
-            metadata = {
-                "title": item['title'],
-                "url": item['url'],
-                "chunk_index": float(item['metadata']['chunk_index']), # Pinecone handles numbers
-                "text": texts[j] # Store the actual text for retrieval
-            }
-            vectors_to_upsert.append({
-                "id": ids[j],
-                "values": embeddings[j],
-                "metadata": metadata
-            })
-        
-        # Upsert
-        try:
-            index.upsert(vectors=vectors_to_upsert)
-            print(f"Upserted batch {i // batch_size + 1}: {len(batch)} vectors")
-            total_vectors += len(batch)
-        except Exception as e:
-            print(f"Error upserting batch {i}: {e}")
-
-    print(f"Pinecone index populated with {total_vectors} total documents.")
+        metadata = vector_metadata(batch, texts)
+
+        # Upsert (blocks while UPSERT_MAX_IN_FLIGHT requests are in flight)
+        def report(upserted, failed, batch_no=batch_no):
+            if failed:
+                print(f"Error upserting batch {batch_no + 1}: {len(failed)} vectors failed")
+            else:
+                print(f"Upserted batch {batch_no + 1}: {len(upserted)} vectors")
+        engine.submit(ids, embeddings, metadata, on_done=report)
+
+    return engine.close()
+
+
+def vectorize_data():
+    # Chunks are streamed from the chunk store one batch at a time
+    chunk_store = get_chunk_store()
+    print(f"Vectorizing {len(chunk_store)} chunks...")
+
+    store = open_vector_store()
+    total_vectors, _ = _upsert_batches(store, embedding_encoder(), chunk_store.iter_batches(BATCH_SIZE))
+
+    # The local store writes its new generation here; Pinecone writes through
+    store.flush()
+    finish_embedding_cache()
+    print(f"Vector store populated with {total_vectors} total documents.")
+    return total_vectors
+
+
+def update_vectors(changed_chunks, removed_chunk_ids=()):
+    """
+    Apply an ingestion delta to the vector store: embed and upsert only the new/changed
+    chunks and delete the vectors of removed chunk ids.
+    Returns the chunk ids whose upsert failed (they stay out of the index manifest).
+    """
+    print(f"Updating vector store: {len(changed_chunks)} changed, {len(removed_chunk_ids)} removed chunks...")
+    if not changed_chunks and not removed_chunk_ids:
+        return []
+    store = open_vector_store()
+    if removed_chunk_ids:
+        store.delete(list(removed_chunk_ids))
+
+    total_vectors, failed_ids = 0, []
+    if changed_chunks:
+        batches = (changed_chunks[i:i + BATCH_SIZE] for i in range(0, len(changed_chunks), BATCH_SIZE))
+        total_vectors, failed_ids = _upsert_batches(store, embedding_encoder(), batches)
+
+    store.flush()
+    finish_embedding_cache()
+    print(f"Vector store updated: {total_vectors} vectors upserted, {len(removed_chunk_ids)} deleted.")
+    return failed_ids
 
 
 if __name__ == "__main__":
@@ -0,0 +1,275 @@
+"""
+Wikipedia article fetching for the ingestion pipeline.
+
+Every request goes through one WikiClient per process: a requests.Session
+whose keep-alive connection pool is sized for the fetch concurrency, a
+timeout on every call, a rate limit shared by all threads and MAX_RETRIES
+retries with exponential backoff (RETRY_DELAY, 2x, 4x, ...) on connection
+errors, timeouts, 429 and 5xx responses.
+
+fetch_texts() fetches many titles over a bounded thread pool. For each
+title the infobox (action=parse) and the plain-text extract (action=query)
+are requested in parallel. Extracts are requested one title at a time:
+Wikipedia returns one whole-article extract per response, so multi-title
+extract queries save no requests. With INFOBOX_LEAD_SECTION only the lead
+section is rendered for the infobox, and infobox_parser reads just the
+infobox table out of it.
+
+fetch_texts_cached() puts the on-disk FetchCache in front of fetch_texts():
+one bulk lastrevid check per FETCH_BATCH_TITLES titles, and only titles
+whose revision changed since they were cached are fetched again.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import config
+
+try:
+    from fetch_cache import get_fetch_cache
+    from infobox_parser import parse_infobox
+except ImportError:
+    from ingestionPipeline.fetch_cache import get_fetch_cache
+    from ingestionPipeline.infobox_parser import parse_infobox
+
+HEADERS = {
+    'User-Agent': config.USER_AGENT
+}
+# FetchCache kind for fetch_text_title results
+TEXT_KIND = "text"
+# Responses worth retrying: rate limited or a transient server error
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across all threads (rate=None: no limit)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class WikiClient:
+    """Pooled, rate-limited MediaWiki API client with retries."""
+
+    def __init__(self, api_url=config.WIKIPEDIA_API_URL, concurrency=config.FETCH_CONCURRENCY,
+                 rate_limit=config.FETCH_RATE_LIMIT, timeout=config.REQUEST_TIMEOUT,
+                 max_retries=config.MAX_RETRIES, retry_delay=config.RETRY_DELAY):
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.limiter = RateLimiter(rate_limit)
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        # Two requests in flight per title (parse + extract)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2 * concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Side pool for the second request of each title
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        self.requests_made = 0
+        self.retries = 0
+        self._count_lock = threading.Lock()
+
+    def get(self, params):
+        """GET the API and return the decoded JSON, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            with self._count_lock:
+                self.requests_made += 1
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                response = getattr(e, "response", None)
+                retryable = response is None or response.status_code in _RETRY_STATUS
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                with self._count_lock:
+                    self.retries += 1
+                print(f"Retrying {params.get('action')} request for {params.get('page') or params.get('titles')} in {delay}s: {e}")
+                time.sleep(delay)
+
+
+def fetch_infobox(title, client):
+    # Infobox comes from the rendered HTML (action=parse)
+    params = {
+        "action": "parse",
+        "page": title,
+        "prop": "text",
+        "format": "json"
+    }
+    if config.INFOBOX_LEAD_SECTION:
+        # infoboxes sit in the lead; the rest of the article is neither rendered nor sent
+        params.update({"section": 0, "disableeditsection": 1, "disablelimitreport": 1})
+    try:
+        data = client.get(params)
+        if 'parse' in data and 'text' in data['parse']:
+            return parse_infobox(data['parse']['text']['*'])
+    except Exception as e:
+        utils.print_error(f"Error fetching infobox for {title}: {e}")
+    return ""
+
+
+def fetch_extract(title, client):
+    # Clean text comes from action=query (raises on network errors after retries)
+    data = client.get({
+        "action": "query",
+        "format": "json",
+        "titles": title,
+        "prop": "extracts",
+        "explaintext": True,
+        "redirects": 1
+    })
+    if 'error' in data:
+        utils.print_error(f"API Error: {data['error']}")
+        return ""
+
+    page = next(iter(data['query']['pages'].values()))
+    return page.get('extract', '')
+
+
+def _resolve_title(title, mapping):
+    # Follow normalization and redirects (bounded: redirect loops exist)
+    for _ in range(len(mapping) + 1):
+        if title not in mapping:
+            return title
+        title = mapping[title]
+    return title
+
+
+def _combine(title, infobox_text, text):
+    if not text:
+        utils.print_error(f"No text found for title: {title}")
+        return ""
+
+    # Combine infobox and main text
+    return infobox_text + text
+
+
+def fetch_text_title(title, client=None, cache=None):
+    client = client or get_wiki_client()
+    if cache is not None:
+        texts, _ = fetch_texts_cached([title], client=client, cache=cache)
+        return texts[title]
+    try:
+        # 1. Fetch Infobox and 2. Content in parallel
+        infobox_future = client.executor.submit(fetch_infobox, title, client)
+        text = fetch_extract(title, client)
+        return _combine(title, infobox_future.result(), text)
+
+    except Exception as e:
+        print(f"Error fetching title {title}: {e}")
+        return None
+
+
+def fetch_texts(titles, client=None, workers=config.FETCH_CONCURRENCY):
+    """{title: text} for many titles, fetched concurrently (same values as fetch_text_title)."""
+    client = client or get_wiki_client()
+    titles = list(titles)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(lambda title: fetch_text_title(title, client), titles))
+    return dict(zip(titles, texts))
+
+
+def fetch_revisions(titles, client=None):
+    """
+    {title: lastrevid} from bulk prop=info checks, FETCH_BATCH_TITLES titles per request.
+    Redirects are followed; None for missing pages and titles whose check failed.
+    """
+    client = client or get_wiki_client()
+    titles = list(titles)
+
+    def check(batch):
+        try:
+            data = client.get({
+                "action": "query",
+                "format": "json",
+                "titles": "|".join(batch),
+                "prop": "info",
+                "redirects": 1
+            })
+        except Exception as e:
+            utils.print_error(f"Revision check failed for {len(batch)} titles: {e}")
+            return {}
+        query = data.get('query', {})
+        mapping = {entry['from']: entry['to'] for entry in query.get('normalized', []) + query.get('redirects', [])}
+        revisions = {page.get('title'): page.get('lastrevid') for page in query.get('pages', {}).values()}
+        return {title: revisions.get(_resolve_title(title, mapping)) for title in batch}
+
+    batches = [titles[i:i + config.FETCH_BATCH_TITLES] for i in range(0, len(titles), config.FETCH_BATCH_TITLES)]
+    revisions = dict.fromkeys(titles)
+    for checked in client.executor.map(check, batches):
+        revisions.update(checked)
+    return revisions
+
+
+def fetch_texts_cached(titles, client=None, cache=None, **fetch_kwargs):
+    """
+    (texts, unchanged): fetch_texts() through the on-disk fetch cache.
+    Titles cached at their current lastrevid are served from disk and returned in
+    `unchanged`; the rest are fetched with fetch_texts(**fetch_kwargs) and cached.
+    """
+    client = client or get_wiki_client()
+    cache = cache or get_fetch_cache()
+    titles = list(titles)
+
+    revisions = fetch_revisions(titles, client)
+    texts, unchanged = {}, set()
+    for title in titles:
+        payload = cache.get(TEXT_KIND, title, revisions[title])
+        if payload is not None:
+            texts[title] = payload["text"]
+            unchanged.add(title)
+
+    fetched = fetch_texts([title for title in titles if title not in texts], client=client, **fetch_kwargs)
+    for title, text in fetched.items():
+        # Failures and empty pages are retried next run
+        if text:
+            cache.put(TEXT_KIND, title, revisions[title], {"text": text})
+    texts.update(fetched)
+    cache.save()
+
+    print(f"Fetch cache: {len(unchanged)}/{len(titles)} titles unchanged since they were cached, "
+          f"{len(fetched)} fetched")
+    return {title: texts[title] for title in titles}, unchanged
+
+
+# Process-wide client (lazy load)
+_wiki_client = None
+_wiki_client_lock = threading.Lock()
+
+def get_wiki_client():
+    global _wiki_client
+    if _wiki_client is None:
+        with _wiki_client_lock:
+            if _wiki_client is None:
+                _wiki_client = WikiClient()
+    return _wiki_client
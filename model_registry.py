@@ -0,0 +1,161 @@
+"""
+Process-wide registry of the NLP models: each one is loaded on first use and
+shared by every module that asks for the same model.
+
+Importing a pipeline module loads nothing (transformers and
+sentence-transformers themselves are only imported by the loaders), so paths
+that never run a model, like the sparse-only ablation, do not pay for it.
+The answer generator, the LLM judge and the QA generator share one Flan-T5;
+the embedding service and the semantic-similarity metric share one
+SentenceTransformer.
+
+    registry.get(key, load)     the model under key, load() runs once (concurrent callers wait for it)
+    preload(loaders)            call the loaders now, by default in a background thread
+    preload_response_models()   what a query needs, e.g. at server start
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+import utils
+
+
+class ModelRegistry:
+
+    def __init__(self):
+        self._models = {}
+        # one lock per key, so different models can load at the same time
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, load):
+        """The model registered under key, loaded with load() on first use."""
+        model = self._models.get(key)
+        if model is None:
+            with self._key_lock(key):
+                model = self._models.get(key)
+                if model is None:
+                    start = time.perf_counter()
+                    model = load()
+                    self.load_seconds[key] = time.perf_counter() - start
+                    self._models[key] = model
+        return model
+
+    def loaded(self, key):
+        return key in self._models
+
+    def preload(self, loaders, background=True):
+        """
+        Call each loader (a no-argument function returning a model) now.
+        In a daemon thread when background; returns the thread (None otherwise).
+        A model asked for while it is still loading is waited for, not loaded twice.
+        """
+        def run():
+            for load in loaders:
+                try:
+                    load()
+                except Exception as e:
+                    utils.print_error(f"Preloading a model failed: {e}")
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Load time in seconds of every model loaded so far."""
+        return dict(self.load_seconds)
+
+
+# Process-wide registry
+_model_registry = None
+_model_registry_lock = threading.Lock()
+
+def get_model_registry():
+    global _model_registry
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                _model_registry = ModelRegistry()
+    return _model_registry
+
+
+def _device():
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def seq2seq_model(name=config.LLM_RAG_MODEL_NAME):
+    """
+    (tokenizer, model) of a seq2seq LLM such as Flan-T5, on the GPU when there is one.
+    The judge and QA generator always did this; the answer generator, which shares the instance, ran on CPU.
+    """
+    def load():
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+        print(f"Loading model: {name}")
+        model = AutoModelForSeq2SeqLM.from_pretrained(name)
+        model.to(_device())
+        return AutoTokenizer.from_pretrained(name), model
+    return get_model_registry().get(f"seq2seq:{name}", load)
+
+
+def cross_encoder(name, max_length=512):
+    def load():
+        from sentence_transformers import CrossEncoder
+
+        print(f"Loading cross-encoder: {name}")
+        return CrossEncoder(name, max_length=max_length)
+    return get_model_registry().get(f"cross-encoder:{name}:{max_length}", load)
+
+
+def sentence_transformer(name=config.EMBEDDING_MODEL):
+    def load():
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Loading embedding model: {name}")
+        return SentenceTransformer(name)
+    return get_model_registry().get(f"sentence-transformer:{name}", load)
+
+
+def auto_tokenizer(name=config.TOKENIZER_MODEL):
+    def load():
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(name)
+    return get_model_registry().get(f"tokenizer:{name}", load)
+
+
+_response_preload = None
+_response_preload_lock = threading.Lock()
+
+def preload_response_models(background=True):
+    """
+    Load the models a query goes through: query embedding, re-ranker and answer LLM.
+    The background preload starts once per process (Streamlit re-runs app.py on every interaction).
+    """
+    global _response_preload
+    from embedding_service import get_embedding_service
+
+    loaders = [
+        get_embedding_service().get_model,
+        lambda: cross_encoder(config.RERANK_MODEL),
+        lambda: seq2seq_model(config.LLM_RAG_MODEL_NAME),
+    ]
+    if not background:
+        return get_model_registry().preload(loaders, background=False)
+    with _response_preload_lock:
+        if _response_preload is None:
+            _response_preload = get_model_registry().preload(loaders)
+    return _response_preload
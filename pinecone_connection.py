@@ -0,0 +1,188 @@
+"""
+Process-wide Pinecone connection manager.
+
+One Pinecone client per process and one index handle per index name; the
+handles keep their HTTP connection pools (keep-alive) for the life of the
+process, so a query no longer pays for a new client, a describe_index host
+lookup and a TLS handshake. Every data-plane call made through a handle is
+timed into a latency histogram per operation, and health() probes an index
+with describe_index_stats.
+
+Set PINECONE_HOST (index data plane) and optionally PINECONE_CONTROL_HOST to
+point the manager at a local HTTP stand-in such as Pinecone Local.
+"""
+import bisect
+import threading
+import time
+
+import config
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Data-plane calls that are timed (everything else on the handle is passed through)
+_INSTRUMENTED = {"query", "fetch", "upsert", "delete", "update", "describe_index_stats"}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (thread-safe)."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, elapsed_ms)] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (None if nothing was observed)."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(self.buckets_ms + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={b}ms" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+            return {
+                "count": self.count,
+                "mean_ms": self.total_ms / self.count if self.count else None,
+                "p50_ms": self.percentile(50),
+                "p95_ms": self.percentile(95),
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class InstrumentedIndex:
+    """Pinecone index handle whose data-plane calls are recorded by the manager."""
+
+    def __init__(self, manager, name, index):
+        self._manager = manager
+        self._name = name
+        self._index = index
+
+    def __getattr__(self, attr):
+        target = getattr(self._index, attr)
+        if attr not in _INSTRUMENTED or not callable(target):
+            return target
+
+        def timed(*args, **kwargs):
+            return self._manager._record(self._name, attr, target, args, kwargs)
+        return timed
+
+
+class PineconeConnectionManager:
+    """Owns the process's Pinecone client and one pooled index handle per index."""
+
+    def __init__(self, api_key=config.PINECONE_API_KEY, control_host=config.PINECONE_CONTROL_HOST,
+                 index_host=config.PINECONE_HOST, pool_threads=config.PINECONE_POOL_THREADS):
+        self.api_key = api_key
+        self.control_host = control_host
+        self.index_host = index_host
+        self.pool_threads = pool_threads
+        self._client = None
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+        self.latency = {}
+        self.requests = {}
+        self.errors = {}
+        self.in_flight = 0
+        self._metrics_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from pinecone import Pinecone
+
+                    kwargs = {"host": self.control_host} if self.control_host else {}
+                    self._client = Pinecone(api_key=self.api_key, **kwargs)
+        return self._client
+
+    def index(self, name=config.PINECONE_INDEX_NAME):
+        """Shared handle for an index; created (and its host resolved) once per process."""
+        handle = self._indexes.get(name)
+        if handle is None:
+            client = self.client
+            with self._lock:
+                handle = self._indexes.get(name)
+                if handle is None:
+                    # A known host skips the describe_index round trip
+                    host = self.index_host if name == config.PINECONE_INDEX_NAME and self.index_host else ""
+                    index = client.Index(name=name, host=host, pool_threads=self.pool_threads)
+                    handle = self._indexes[name] = InstrumentedIndex(self, name, index)
+        return handle
+
+    def _record(self, name, operation, fn, args, kwargs):
+        key = f"{name}.{operation}"
+        with self._metrics_lock:
+            self.in_flight += 1
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.setdefault(key, LatencyHistogram())
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._metrics_lock:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            raise
+        finally:
+            histogram.observe((time.perf_counter() - start) * 1000)
+            with self._metrics_lock:
+                self.in_flight -= 1
+
+    def health(self, name=config.PINECONE_INDEX_NAME):
+        """Probe an index with describe_index_stats; never raises."""
+        start = time.perf_counter()
+        try:
+            stats = self.index(name).describe_index_stats()
+            return {
+                "ok": True,
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "total_vector_count": getattr(stats, "total_vector_count", None),
+            }
+        except Exception as e:
+            return {"ok": False, "latency_ms": (time.perf_counter() - start) * 1000, "error": str(e)}
+
+    def metrics(self):
+        with self._metrics_lock:
+            return {
+                # Each handle holds one keep-alive connection pool
+                "open_connection_pools": len(self._indexes),
+                "in_flight": self.in_flight,
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "latency": {key: histogram.snapshot() for key, histogram in self.latency.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            for handle in self._indexes.values():
+                close = getattr(handle._index, "close", None)
+                if close is not None:
+                    close()
+            self._indexes = {}
+
+
+# Process-wide manager shared by every module that talks to Pinecone (lazy load)
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_connection_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = PineconeConnectionManager()
+    return _manager
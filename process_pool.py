@@ -0,0 +1,18 @@
+"""
+Process pools for the CPU-bound batch work (chunking, BM25 preprocessing).
+
+Workers are started with forkserver (spawn where it is not available), never
+with fork: the pipelines start pools from processes that already run threads
+(ingestion stages, HTTP pools, the model preload), and a forked child can
+inherit a lock another thread held and deadlock. Workers do not inherit the
+parent's loaded resources, so pass an initializer that loads them once per
+worker.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_pool(max_workers=None, initializer=None):
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=initializer)
@@ -1,43 +1,74 @@
 import os
-from rank_bm25 import BM25Okapi
 import sys
+import threading
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import utils
-import pickle
 import config
+from text_preprocessing import preprocess_text
+from bm25_segments import MANIFEST_FILE, SegmentedBM25
 
-from nltk.tokenize import word_tokenize
 
-def reponse_BM25(query, top_n=5):
-    
-    # Load the BM25 index from disk
-    with open(config.BM25_INDEX_PATH, 'rb') as f:
-        bm25 = pickle.load(f)
+class SparseRetriever:
+    """
+    Long-lived BM25 retriever.
+    Opens the segmented index (and its chunk-id tables) once and keeps it mapped;
+    the index is only re-opened when its manifest's mtime/size changes on disk.
+    """
+
+    def __init__(self, index_dir=config.BM25_INDEX_DIR, top_k_mode=config.BM25_TOPK_MODE):
+        self.index_dir = index_dir
+        self.top_k_mode = top_k_mode
+        self.bm25 = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        stat = os.stat(os.path.join(self.index_dir, MANIFEST_FILE))
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, version):
+        # mmap'd: arrays are views into the page cache shared by every process using the index
+        self.bm25 = SegmentedBM25.open(self.index_dir)
+        self.version = version
+        print(f"Loaded BM25 index from {self.index_dir} (generation {self.bm25.generation}, {len(self.bm25)} chunks)")
 
-    # Fetch documents from metadata json file
-    corpus_data = utils.fetch_metadata()
+    def ensure_loaded(self):
+        """Load the index on first use and reload it if the manifest changed since."""
+        version = self._current_version()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._load(version)
+        return self
 
-    # Tokenize the query
-    tokenized_query = utils.preprocess_text(query)
+    def search_tokens(self, tokenized_query, top_n=5):
+        bm25 = self.ensure_loaded().bm25
+        # Top-k by partial selection per segment (higher BM25 score = better match);
+        # chunk ids are resolved only for the winners
+        return bm25.search(tokenized_query, top_n, mode=self.top_k_mode)
 
-    # Get BM25 scores
-    scores = bm25.get_scores(tokenized_query)
+    def search(self, query, top_n=5):
+        bm25 = self.ensure_loaded().bm25
+        return self.search_tokens(preprocess_text(query, mode=bm25.tokenizer), top_n=top_n)
 
-    # Pair each document chunk with its BM25 score
-    scored_corpus = []
-    for idx, score in enumerate(scores):
-        scored_corpus.append((corpus_data[idx]['chunk_id'], score))
 
-    # Sort by score (descending) and return top-k results
-    # Higher BM25 score = better match
-    sparse_hits = sorted(scored_corpus, key=lambda x: x[1], reverse=True)[:top_n]
+# Process-wide retriever shared by rrf, the ablation study and the MRR evaluator (lazy load)
+_sparse_retriever = None
+_sparse_retriever_lock = threading.Lock()
 
-    return sparse_hits
+def get_sparse_retriever():
+    global _sparse_retriever
+    if _sparse_retriever is None:
+        with _sparse_retriever_lock:
+            if _sparse_retriever is None:
+                _sparse_retriever = SparseRetriever()
+    return _sparse_retriever
+
+
+def reponse_BM25(query, top_n=5):
+    return get_sparse_retriever().search(query, top_n=top_n)
 
 if __name__ == "__main__":
     sample_query = "What is data privacy?"
-    top_indices, scores = reponse_BM25(sample_query, top_n=3)
-    print(f"Top document indices for query '{sample_query}': {top_indices}")
-    print(f"Scores: {[scores[i] for i in top_indices]}")
-   
\ No newline at end of file
+    sparse_hits = reponse_BM25(sample_query, top_n=3)
+    print(f"Top chunks for query '{sample_query}': {sparse_hits}")
@@ -1,43 +1,113 @@
 import os
 import sys
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+import threading
+import unicodedata
+from collections import OrderedDict
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from embedding_service import get_embedding_service
+from vector_store import get_vector_store
+
+
+def normalize_query(query):
+    # Queries that differ only in Unicode form or whitespace share one embedding
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query embeddings keyed by normalized query text.
+    The evaluation pipeline (metrics, MRR, ablation) asks the same questions
+    several times per run; only the first one is encoded.
+    """
+
+    def __init__(self, max_size=config.QUERY_EMBEDDING_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def encode(self, queries):
+        """(len(queries), dim) vectors; the misses are encoded together in one embedding service call."""
+        keys = [normalize_query(query) for query in queries]
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            for key, vector in zip(missing, get_embedding_service().encode(missing)):
+                vector.setflags(write=False)  # shared with every later caller
+                found[key] = vector
+            self._store(missing, found)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return [found[key] for key in keys]
+
+    def _store(self, keys, vectors):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for key in keys:
+                self._entries[key] = vectors[key]
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions, "entries": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+# Process-wide cache (lazy load)
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+def get_query_cache():
+    global _query_cache
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                _query_cache = QueryEmbeddingCache()
+    return _query_cache
 
-# Initialize model once to avoid reloading on every call if possible effectively
-# But for script usage, it will load each time. 
-model = SentenceTransformer(config.EMBEDDING_MODEL)
 
 def dense_response(query, top_n=5):
-    # Initialize Pinecone client
-    pc = Pinecone(api_key=config.PINECONE_API_KEY)
-    index = pc.Index(config.PINECONE_INDEX_NAME)
-
-    # Generate embedding for the query
-    query_embedding = model.encode(query).tolist()
-
-    # Perform the query
-    results = index.query(
-        vector=query_embedding,
-        top_k=top_n,
-        include_metadata=False, # We only need IDs and scores here usually, but keeping false for speed unless needed
-        include_values=False
-    )
-    
-    # Process and format results
-    dense_hits = []
-    
-    # Pinecone results structure: {'matches': [{'id': '...', 'score': 0.9, ...}]}
-    for match in results['matches']:
-        chunk_id = match['id']
-        score = match['score'] # Cosine similarity
-        dense_hits.append((chunk_id, score))
-    
-    return dense_hits
+    # Generate embedding for the query (shared embedding service, loaded on first use; cached by query text)
+    query_embedding = get_query_cache().encode([query])[0]
+
+    # Cosine top-k from the configured vector store (Pinecone or local): [(chunk_id, score), ...]
+    return get_vector_store().query(query_embedding, top_k=top_n)
+
+
+def dense_response_batch(queries, top_n=5):
+    """
+    dense_response for many queries: uncached queries are encoded in one call and
+    the vector store searches all of them at once. Returns one result list per query.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    return get_vector_store().query_many(get_query_cache().encode(queries), top_k=top_n)
 
 if __name__ == "__main__":
     sample_query = "What is data privacy?"
     results = dense_response(sample_query, top_n=3)
-    print(f"Top document indices for query '{sample_query}': {results}")
\ No newline at end of file
+    print(f"Top document indices for query '{sample_query}': {results}")
@@ -1,89 +1,45 @@
+import math
 import re
-import re
-from pinecone import Pinecone
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
 import sys
 import os
 try:
     from rrf import fuse_responses
+    from retrieval_result import RetrievalResult
 except ImportError:
     from reponsePipeline.rrf import fuse_responses
+    from reponsePipeline.retrieval_result import RetrievalResult
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from model_registry import seq2seq_model
 
-model_name= config.LLM_RAG_MODEL_NAME
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+def as_retrieval_result(fused_results):
+    # fuse_responses already returns a RetrievalResult; plain (id, score) lists are resolved from the chunk store
+    if isinstance(fused_results, RetrievalResult):
+        return fused_results
+    return RetrievalResult.from_scores(None, fused_results)
 
 def get_context_from_ids(fused_results):
     """
-    Retrieves the actual text content for the given chunk IDs from Pinecone.
+    Returns the text content of the given chunks, joined in rank order.
+    No I/O when fused_results is a RetrievalResult.
     """
-    # Extract just the chunk IDs from the RRF results (which are tuples of (id, score))
-    chunk_ids = [result[0] for result in fused_results]
-    
-    if not chunk_ids:
-        return ""
-    
-    # Initialize Pinecone client
-    pc = Pinecone(api_key=config.PINECONE_API_KEY)
-    index = pc.Index(config.PINECONE_INDEX_NAME)
-    
-    # Fetch from Pinecone
-    response = index.fetch(ids=chunk_ids)
-    vectors = response.vectors
-    
-    # Construct the context string preserving the order from fused_results
-    context_parts = []
-    for chunk_id in chunk_ids:
-        if chunk_id in vectors:
-            # We stored text in metadata
-            text = vectors[chunk_id].metadata.get('text', '')
-            context_parts.append(text)
-    
-    return "\n\n".join(context_parts)
+    return as_retrieval_result(fused_results).context()
 
 def get_chunk_details(fused_results):
     """
     Retrieves detailed information (text, metadata) for the given chunk IDs.
     Returns a list of dictionaries.
     """
-    chunk_ids = [result[0] for result in fused_results]
-    rrf_scores = {result[0]: result[1] for result in fused_results}
-    
-    if not chunk_ids:
-        return []
-    
-    pc = Pinecone(api_key=config.PINECONE_API_KEY)
-    index = pc.Index(config.PINECONE_INDEX_NAME)
-    
-    response = index.fetch(ids=chunk_ids)
-    vectors = response.vectors
-    
-    details = []
-    
-    for chunk_id in chunk_ids:
-        if chunk_id in vectors:
-            vector_data = vectors[chunk_id]
-            metadata = vector_data.metadata
-            text = metadata.get('text', '')
-            
-            detail = {
-                "id": chunk_id,
-                "text": text,
-                "metadata": metadata,
-                "rrf_score": rrf_scores.get(chunk_id, 0.0)
-            }
-            details.append(detail)
-            
-    return details
+    return as_retrieval_result(fused_results).details()
 
 import time
 import numpy as np
 
 def llm_rag_response(context, query, max_length=config.MAX_NEW_TOKENS_LONG, return_metadata=False):
+     # Accept the retrieval result directly (its chunk text is already loaded)
+     if isinstance(context, RetrievalResult):
+         context = context.context()
 
      # Optimized prompt for Flan-T5 (Instruction -> Context -> Question)
      prompt = f"""Answer the following question using the context below.
@@ -97,6 +53,10 @@ Context:
 
 Answer:"""
       
+     # Flan-T5 from the model registry (loaded on first use, shared with the judge and QA generator;
+     # on the GPU when there is one, where the generator used to always run on CPU)
+     tokenizer, model = seq2seq_model(config.LLM_RAG_MODEL_NAME)
+
      # encdoing the given prompt which has context and query
      inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=2048)
 
@@ -131,7 +91,7 @@ Answer:"""
              # This is the log prob of the entire sequence. We can normalize by length or just use it.
              # Ideally we want average probability per token.
              # sequences_scores is sum of log probs (normalized by length if length_penalty used).
-             confidence = torch.exp(outputs.sequences_scores[0]).item()
+             confidence = math.exp(outputs.sequences_scores[0].item())
          else:
              confidence = 0.0 # Fallback
              
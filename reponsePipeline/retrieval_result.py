@@ -0,0 +1,90 @@
+import os
+import sys
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chunk_store import get_chunk_store
+
+
+@dataclass
+class RetrievedChunk:
+    chunk_id: str
+    score: float
+    title: str = ""
+    url: str = ""
+    content: str = ""
+    metadata: dict = field(default_factory=dict)
+    found: bool = True  # False if the chunk id is missing from the chunk store
+
+    @property
+    def text(self):
+        # Same "title content" text that was embedded
+        return f"{self.title} {self.content}" if self.found else ""
+
+
+class RetrievalResult:
+    """
+    Ranked chunks for one query, with text and metadata resolved once from the chunk store.
+    Iterates, indexes and slices like the plain [(chunk_id, score), ...] lists the retrievers return.
+    """
+
+    def __init__(self, query, chunks):
+        self.query = query
+        self.chunks = list(chunks)
+
+    @classmethod
+    def from_scores(cls, query, scored, store=None):
+        """Build from (chunk_id, score) pairs with a single batch lookup in the chunk store."""
+        scored = list(scored)
+        found = (store or get_chunk_store()).get_many([chunk_id for chunk_id, _ in scored])
+        chunks = []
+        for chunk_id, score in scored:
+            item = found.get(chunk_id)
+            if item is None:
+                chunks.append(RetrievedChunk(chunk_id, float(score), found=False))
+                continue
+            chunks.append(RetrievedChunk(
+                chunk_id, float(score),
+                title=item['title'],
+                url=item['url'],
+                content=item['content'],
+                metadata={"title": item['title'], "url": item['url'], **item.get('metadata', {})},
+            ))
+        return cls(query, chunks)
+
+    def rescored(self, scores, top_n=None):
+        """Same chunks re-ordered by new scores (e.g. from the re-ranker), best first."""
+        chunks = [RetrievedChunk(**{**chunk.__dict__, "score": float(score)}) for chunk, score in zip(self.chunks, scores)]
+        chunks.sort(key=lambda chunk: chunk.score, reverse=True)
+        return RetrievalResult(self.query, chunks[:top_n])
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __iter__(self):
+        return ((chunk.chunk_id, chunk.score) for chunk in self.chunks)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return RetrievalResult(self.query, self.chunks[i])
+        chunk = self.chunks[i]
+        return (chunk.chunk_id, chunk.score)
+
+    def ids(self):
+        return [chunk.chunk_id for chunk in self.chunks]
+
+    def context(self):
+        """Chunk texts joined for the LLM prompt, in rank order."""
+        return "\n\n".join(chunk.text for chunk in self.chunks if chunk.found)
+
+    def details(self):
+        """Per-chunk dicts for display: id, text, metadata, score."""
+        return [
+            {
+                "id": chunk.chunk_id,
+                "text": chunk.text,
+                "metadata": chunk.metadata,
+                "rrf_score": chunk.score,
+            }
+            for chunk in self.chunks if chunk.found
+        ]
@@ -4,24 +4,20 @@ import os
 try:
     from dense_response import dense_response
     from BM25_reponse import reponse_BM25
+    from retrieval_result import RetrievalResult
 except ImportError:
     from reponsePipeline.dense_response import dense_response
     from reponsePipeline.BM25_reponse import reponse_BM25
+    from reponsePipeline.retrieval_result import RetrievalResult
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 from collections import defaultdict
-from sentence_transformers import CrossEncoder
-
-# Global re-ranker model (lazy load)
-_reranker = None
+from model_registry import cross_encoder
 
 def get_reranker():
-    global _reranker
-    if _reranker is None:
-        print(f"Loading Re-ranker: {config.RERANK_MODEL}")
-        _reranker = CrossEncoder(config.RERANK_MODEL, max_length=512)
-    return _reranker
+    # Loaded on first use (model registry)
+    return cross_encoder(config.RERANK_MODEL, max_length=512)
 
 
 def reciprocal_rank_fusion(dense_results, sparse_results, k=60, top_n=5, weights=None):
@@ -73,52 +69,39 @@ def rerank_results(query, fused_results, top_n=5):
     """
     Re-ranks the top results from RRF using a Cross-Encoder.
     fused_results is a list of (chunk_id, rrf_score)
+    Returns a RetrievalResult whose chunks already carry their text and metadata.
     """
-    if not fused_results:
-        return []
+    # Get the text content for all candidates in one chunk-store lookup;
+    # the returned result carries it on so callers need no further fetches
+    candidates = RetrievalResult.from_scores(query, fused_results)
+    if not candidates:
+        return candidates
 
-    # Get the text content for the candidates
-    # We need to fetch the content from ChromaDB to pass to the CrossEncoder
     try:
-        from reponsePipeline.llm_rag_response import get_context_from_ids, get_chunk_details
-        
-        # Helper to fetch details efficiently
-        details = get_chunk_details(fused_results)
-        
         # Prepare pairs for (Query, Document)
-        pairs = []
-        valid_details = []
-        
-        for item in details:
-            pairs.append([query, item['text']])
-            valid_details.append(item)
+        valid = RetrievalResult(query, [chunk for chunk in candidates.chunks if chunk.found])
+        pairs = [[query, chunk.text] for chunk in valid.chunks]
             
         if not pairs:
-            return fused_results[:top_n]
+            return candidates[:top_n]
             
         # Predict scores
         model = get_reranker()
         scores = model.predict(pairs)
         
-        # Attach new scores
-        reranked = []
-        for i, score in enumerate(scores):
-            reranked.append((valid_details[i]['id'], float(score)))
-            
         # Sort by new Cross-Encoder score
-        reranked.sort(key=lambda x: x[1], reverse=True)
-        
-        return reranked[:top_n]
+        return valid.rescored(scores, top_n=top_n)
         
-    except ImportError:
-        print("Could not import helpers for re-ranking. Skipping.")
-        return fused_results[:top_n]
     except Exception as e:
         print(f"Error during re-ranking: {e}")
-        return fused_results[:top_n]
+        return candidates[:top_n]
 
 
 def fuse_responses(query, top_n=5):
+    """
+    Hybrid retrieval: dense + sparse, RRF fusion, cross-encoder re-ranking.
+    Returns a RetrievalResult (iterates as (chunk_id, score) pairs) with chunk text and metadata attached.
+    """
     # Fetch a larger pool for RRF
     retrieval_limit = 500
     dense_results = dense_response(query, top_n=retrieval_limit)
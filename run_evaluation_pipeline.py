@@ -10,6 +10,7 @@ from evaluationPipeline.ablation_study import run_ablation
 from evaluationPipeline.generate_plots import generate_visualizations
 from evaluationPipeline.generate_report import generate_report
 from evaluationPipeline.QA_generation import generate_qa_dataset
+from reponsePipeline.dense_response import get_query_cache
 import config as CONFIG
 
 def main():
@@ -45,6 +46,9 @@ def main():
     print("STEP: Running Ablation Studies (Dense vs Sparse vs Hybrid)")
     print(f"{'='*50}\n")
     run_ablation()
+    # metrics, MRR and ablation ask the same questions; their embeddings are computed once
+    stats = get_query_cache().stats()
+    print(f"Query embedding cache: {stats['hits']}/{stats['hits'] + stats['misses']} queries reused ({stats['hit_rate']:.0%})")
     
     # 4. Generate Visualizations
     print(f"\n{'='*50}")
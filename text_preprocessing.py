@@ -0,0 +1,120 @@
+"""
+Text preprocessing for BM25: tokenize, lowercase, remove stopwords, stem.
+
+Two tokenizer modes produce the tokens that are fed to the stopword filter:
+
+* "nltk": NLTK word_tokenize, the reference behaviour.
+* "fast": whitespace split plus a handful of regexes. Any whitespace-delimited
+  alphanumeric word yields exactly the tokens word_tokenize yields for it
+  (Treebank only splits such words for the fixed "cannot"/"gonna" style
+  contractions, reproduced here, and punkt only splits sentences at
+  whitespace). Words carrying punctuation follow the Treebank rules
+  approximately; the only known differences are periods after abbreviations,
+  which punkt resolves from sentence context.
+
+Stems are memoized in an LRU table because the same words repeat across the
+whole corpus, and preprocess_batch spreads large corpora over a process pool.
+"""
+import re
+from functools import lru_cache, partial
+
+import config
+from process_pool import process_pool
+
+# Preprocessing resources (lazy load to avoid slow startup if not needed)
+_stemmer = None
+_stop_words = None
+
+def get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem import PorterStemmer
+        _stemmer = PorterStemmer()
+    return _stemmer
+
+def get_stopwords():
+    global _stop_words
+    if _stop_words is None:
+        from nltk.corpus import stopwords
+        try:
+            _stop_words = set(stopwords.words('english'))
+        except LookupError:
+            import nltk
+            nltk.download('stopwords')
+            _stop_words = set(stopwords.words('english'))
+    return _stop_words
+
+
+@lru_cache(maxsize=config.STEM_CACHE_SIZE)
+def stem(token):
+    return get_stemmer().stem(token)
+
+
+def nltk_tokenize(text):
+    from nltk.tokenize import word_tokenize
+
+    # standard tokenization
+    try:
+        return word_tokenize(text.lower())
+    except LookupError:
+        import nltk
+        nltk.download('punkt')
+        return word_tokenize(text.lower())
+
+
+# Alphanumeric words the Treebank tokenizer splits (its CONTRACTIONS2 rules)
+_SPLIT_WORDS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+# Punctuation Treebank splits off as separate tokens (commas/colons only when not inside numbers)
+_PUNCTUATION = re.compile(r"""\.\.\.|--|[;@#$%&?!\[\](){}<>"`‘’“”–—]|[:,](?!\d)""")
+# Clitics split from the preceding word: don't -> do n't, it's -> it 's
+_CLITICS = re.compile(r"(?<=\w)(n't|'s|'m|'d|'ll|'re|'ve)\b")
+_CLITIC_TOKENS = {"n't", "'s", "'m", "'d", "'ll", "'re", "'ve"}
+
+
+def fast_tokenize(text):
+    tokens = []
+    for word in text.lower().split():
+        if word.isalnum():
+            tokens.extend(_SPLIT_WORDS.get(word, (word,)))
+            continue
+        for piece in _CLITICS.sub(r" \1", _PUNCTUATION.sub(" ", word)).split():
+            # Sentence-final period ("word."), but keep dotted tokens like "e.g." intact
+            if piece.endswith('.') and '.' not in piece[:-1]:
+                piece = piece[:-1]
+            # Quotes around a word are split off; clitics keep their apostrophe
+            if piece not in _CLITIC_TOKENS:
+                piece = piece.strip("'")
+            tokens.extend(_SPLIT_WORDS.get(piece, (piece,)))
+    return tokens
+
+
+def preprocess_text(text, mode=config.BM25_TOKENIZER):
+    """
+    Tokenize, lowercase, remove stopwords, and stem.
+    Returns a list of tokens.
+    """
+    tokens = fast_tokenize(text) if mode == "fast" else nltk_tokenize(text)
+    stops = get_stopwords()
+
+    # Filter and stem
+    # Remove non-alphanumeric tokens and stopwords
+    return [stem(t) for t in tokens if t.isalnum() and t not in stops]
+
+
+def preprocess_batch(texts, mode=config.BM25_TOKENIZER, workers=config.PREPROCESS_WORKERS, chunksize=256):
+    """preprocess_text over many texts, spread across a process pool for large batches."""
+    texts = list(texts)
+    if workers == 1 or len(texts) < 2 * chunksize:
+        return [preprocess_text(text, mode=mode) for text in texts]
+
+    # Downloaded here if missing, once; each worker then loads them (workers are not forked, see process_pool)
+    get_stopwords()
+    with process_pool(workers, initializer=get_stopwords) as pool:
+        return list(pool.map(partial(preprocess_text, mode=mode), texts, chunksize=chunksize))
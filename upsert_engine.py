@@ -0,0 +1,160 @@
+"""
+Concurrent vector upserts with a bounded in-flight window.
+
+submit() packs vectors into batches capped by estimated request payload
+(UPSERT_MAX_BATCH_BYTES; chunk text in the metadata makes vectors very
+different in size) and by count (UPSERT_MAX_BATCH_VECTORS), filled across
+submit() calls, and hands each full batch to UPSERT_MAX_IN_FLIGHT sender
+threads. Once that many batches are in flight submit() blocks, so the
+producer (the embedding loop) is held back instead of queueing vectors
+without bound, and embedding the next batch overlaps with uploading the
+previous ones.
+
+A batch whose upsert raises is retried MAX_RETRIES times with exponential
+backoff (RETRY_DELAY, 2x, 4x, ...); ids of batches that still fail are
+reported to the submitter and returned by close().
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+
+# Upper bound of one float in the JSON request ("-0.0123456789012345678, ")
+_BYTES_PER_VALUE = 24
+# {"id": "", "values": [], "metadata": } around each vector
+_VECTOR_OVERHEAD = 40
+
+
+def payload_bytes(chunk_id, vector, metadata):
+    """Estimated JSON size of one vector in an upsert request."""
+    return len(chunk_id) + len(vector) * _BYTES_PER_VALUE + len(json.dumps(metadata or {})) + _VECTOR_OVERHEAD
+
+
+class _Submission:
+    """Vectors of one submit() call; on_done runs once the last of them was sent."""
+
+    def __init__(self, count, on_done):
+        self.remaining = count
+        self.upserted = []
+        self.failed = []
+        self.on_done = on_done
+
+
+class UpsertEngine:
+
+    def __init__(self, store, max_in_flight=config.UPSERT_MAX_IN_FLIGHT, max_batch_bytes=config.UPSERT_MAX_BATCH_BYTES,
+                 max_batch_vectors=config.UPSERT_MAX_BATCH_VECTORS, max_retries=config.MAX_RETRIES,
+                 retry_delay=config.RETRY_DELAY):
+        self.store = store
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_vectors = max_batch_vectors
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._window = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="upsert")
+        self._lock = threading.Lock()
+        self._error = None
+        # vectors of the next batch: (chunk_id, vector, metadata, submission)
+        self._batch = []
+        self._batch_bytes = 0
+
+        self.vectors_upserted = 0
+        self.batches_sent = 0
+        self.bytes_sent = 0
+        self.retries = 0
+        self.failed_ids = []
+        self.blocked_s = 0.0  # submit() time spent waiting for a free slot
+        self._start = time.perf_counter()
+
+    def submit(self, ids, vectors, metadata=None, on_done=None):
+        """
+        Queue vectors for upsert; batches are cut across submit() calls, so requests stay full.
+        Blocks while the in-flight window is full. on_done(upserted_ids, failed_ids) is called
+        (from a sender thread) once all of these vectors were sent; flush() or close() sends the last batch.
+        """
+        metadata = metadata or [{}] * len(ids)
+        if not len(ids):
+            if on_done:
+                on_done([], [])
+            return
+        submission = _Submission(len(ids), on_done)
+        for chunk_id, vector, meta in zip(ids, vectors, metadata):
+            size = payload_bytes(chunk_id, vector, meta)
+            # a single vector over max_batch_bytes still goes out, alone
+            if self._batch and (self._batch_bytes + size > self.max_batch_bytes
+                                or len(self._batch) >= self.max_batch_vectors):
+                self.flush()
+            self._batch.append((chunk_id, vector, meta, submission))
+            self._batch_bytes += size
+
+    def flush(self):
+        """Send the vectors queued so far (does not wait for them)."""
+        if not self._batch:
+            return
+        batch, size = self._batch, self._batch_bytes
+        self._batch, self._batch_bytes = [], 0
+        waited = time.perf_counter()
+        self._window.acquire()
+        self.blocked_s += time.perf_counter() - waited
+        self._executor.submit(self._send, batch, size)
+
+    def _send(self, batch, size):
+        ids = [item[0] for item in batch]
+        try:
+            ok = self._upsert_with_retries(ids, np.stack([item[1] for item in batch]), [item[2] for item in batch])
+            with self._lock:
+                self.batches_sent += 1
+                if ok:
+                    self.vectors_upserted += len(ids)
+                    self.bytes_sent += size
+                else:
+                    self.failed_ids.extend(ids)
+                for chunk_id, _, _, submission in batch:
+                    (submission.upserted if ok else submission.failed).append(chunk_id)
+                    submission.remaining -= 1
+                    # callbacks run one at a time, so they need no locking of their own
+                    if submission.remaining == 0 and submission.on_done:
+                        submission.on_done(submission.upserted, submission.failed)
+        except Exception as e:
+            # a failing callback is re-raised by close()
+            self._error = self._error or e
+        finally:
+            self._window.release()
+
+    def _upsert_with_retries(self, ids, vectors, metadata):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.store.upsert(ids, vectors, metadata)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Error upserting {len(ids)} vectors (gave up after {attempt + 1} attempts): {e}")
+                    return False
+                delay = self.retry_delay * 2 ** attempt
+                print(f"Upsert of {len(ids)} vectors failed ({e}), retrying in {delay}s")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._start
+        return {"vectors": self.vectors_upserted, "batches": self.batches_sent, "bytes": self.bytes_sent,
+                "retries": self.retries, "failed": len(self.failed_ids), "seconds": elapsed,
+                "vectors_per_sec": self.vectors_upserted / elapsed if elapsed else 0.0,
+                "blocked_seconds": self.blocked_s}
+
+    def close(self):
+        """Send the last batch and wait for every batch; returns (vectors upserted, ids that failed) and prints the throughput."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+        stats = self.stats()
+        print(f"Upserted {stats['vectors']} vectors in {stats['batches']} batches "
+              f"({stats['bytes'] / 1e6:.1f} MB) in {stats['seconds']:.1f}s: {stats['vectors_per_sec']:.0f} vectors/s, "
+              f"{stats['retries']} retries, {stats['failed']} failed")
+        return self.vectors_upserted, list(self.failed_ids)
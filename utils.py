@@ -8,56 +8,8 @@ class Colors:
     BLUE = '\033[94m'
     RESET = '\033[0m'
 
-# Preprocessing resources (lazy load to avoid slow startup if not needed)
-_stemmer = None
-_stop_words = None
-
-def get_stemmer():
-    global _stemmer
-    if _stemmer is None:
-        from nltk.stem import PorterStemmer
-        _stemmer = PorterStemmer()
-    return _stemmer
-
-def get_stopwords():
-    global _stop_words
-    if _stop_words is None:
-        from nltk.corpus import stopwords
-        try:
-            _stop_words = set(stopwords.words('english'))
-        except LookupError:
-            import nltk
-            nltk.download('stopwords')
-            _stop_words = set(stopwords.words('english'))
-    return _stop_words
-
-def preprocess_text(text):
-    """
-    Tokenize, lowercase, remove stopwords, and stem.
-    Returns a list of tokens.
-    """
-    from nltk.tokenize import word_tokenize
-    
-    # standard tokenization
-    try:
-        tokens = word_tokenize(text.lower())
-    except LookupError:
-        import nltk
-        nltk.download('punkt')
-        tokens = word_tokenize(text.lower())
-        
-    stemmer = get_stemmer()
-    stops = get_stopwords()
-    
-    # Filter and stem
-    # Remove non-alphanumeric tokens and stopwords
-    processed = [
-        stemmer.stem(t) 
-        for t in tokens 
-        if t.isalnum() and t not in stops
-    ]
-    
-    return processed
+# BM25 preprocessing lives in text_preprocessing (stem cache, fast tokenizer, batch API)
+from text_preprocessing import get_stemmer, get_stopwords, preprocess_text
 
 
 def fetch_fixed_urls():
@@ -87,11 +39,9 @@ def delete_if_exists_dynamic_urls_file():
 
 
 def fetch_metadata():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, "files", "metadata.json")
-    with open(file_path, 'r') as f:
-        metadata = json.load(f)
-    return metadata
+    # All chunks as a list; prefer chunk_store.get_chunk_store() lookups/streaming for large corpora
+    from chunk_store import get_chunk_store
+    return list(get_chunk_store().iter_chunks())
 
 
 def fetch_qa_pairs():
@@ -0,0 +1,407 @@
+"""
+Vector store backends for dense retrieval.
+
+Every backend implements the same small interface (ensure_index, upsert,
+delete, flush, query, query_many, fetch), and config.VECTOR_STORE selects the
+process-wide store returned by get_vector_store():
+
+* "pinecone": the hosted Pinecone index (one network round trip per call).
+* "local": an embedded store under LOCAL_VECTOR_DIR. Unit-normalized vectors
+  live in a memory-mapped float32/float16 .npy matrix; queries are either an
+  exact cosine top-k (one matrix-vector product) or an HNSW graph (hnswlib)
+  for large corpora.
+
+The local store is laid out like the segmented BM25 index: files are written
+per generation and a store.json manifest is replaced atomically, so readers
+keep their mapped view until the next query after a flush.
+
+    store.json                generation, dimension, dtype, index type, file names
+    vectors_00000004.npy      (n, dimension) unit vectors, row i belongs to rows[i]
+    rows_00000004.json        [[chunk_id, metadata], ...]
+    hnsw_00000004.bin         hnswlib graph over the rows (index type "hnsw" only)
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from bm25_index import select_top_k
+from pinecone_connection import get_connection_manager
+
+MANIFEST_FILE = "store.json"
+_STORE_FILE = re.compile(r"^(vectors|rows|hnsw)_\d{8}\.(npy|json|bin)$")
+# Rows converted to float32 at a time when scoring a float16 matrix (and when building HNSW)
+_SCORE_BLOCK = 4096
+# Queries scored per matrix product in query_many (bounds the (rows, queries) score matrix)
+_QUERY_BLOCK = 64
+
+
+class VectorStore:
+    """Interface shared by the vector store backends."""
+
+    # Upserts are durable when upsert() returns (otherwise only after flush())
+    writes_through = True
+
+    def ensure_index(self, dimension):
+        """Create the index if it does not exist yet."""
+
+    def upsert(self, ids, vectors, metadata=None):
+        """Add or replace vectors (and their metadata dicts) by id."""
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def flush(self):
+        """Make pending writes visible to queries (no-op for backends that write through)."""
+
+    def query(self, vector, top_k):
+        """Top-k (id, cosine similarity) pairs, best first."""
+        raise NotImplementedError
+
+    def query_many(self, vectors, top_k):
+        """query() for each of several vectors."""
+        return [self.query(vector, top_k) for vector in vectors]
+
+    def fetch(self, ids):
+        """{id: metadata} for the ids that exist."""
+        raise NotImplementedError
+
+
+class PineconeVectorStore(VectorStore):
+
+    def __init__(self, index_name=config.PINECONE_INDEX_NAME):
+        self.index_name = index_name
+        # Client and pooled index handle are shared process-wide
+        self.connections = get_connection_manager()
+
+    @property
+    def pc(self):
+        return self.connections.client
+
+    @property
+    def index(self):
+        return self.connections.index(self.index_name)
+
+    def ensure_index(self, dimension):
+        from pinecone import ServerlessSpec
+
+        # Note: Free tier often allows 1 starter index. We assume it exists or we try to create it.
+        existing_indexes = [index_info.name for index_info in self.pc.list_indexes()]
+        if self.index_name in existing_indexes:
+            return
+
+        print(f"Index '{self.index_name}' not found. Creating it...")
+        try:
+            self.pc.create_index(
+                name=self.index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud="aws",
+                    region="us-east-1"
+                )
+            )
+            # Wait for index to be ready
+            while not self.pc.describe_index(self.index_name).status['ready']:
+                time.sleep(1)
+        except Exception as e:
+            print(f"Error creating index (might already exist or limit reached): {e}")
+            print("Attempting to proceed with existing index if available...")
+
+    def upsert(self, ids, vectors, metadata=None):
+        metadata = metadata or [{}] * len(ids)
+        self.index.upsert(vectors=[
+            {"id": chunk_id, "values": np.asarray(vector, dtype=np.float32).tolist(), "metadata": meta}
+            for chunk_id, vector, meta in zip(ids, vectors, metadata)
+        ])
+
+    def delete(self, ids):
+        ids = list(ids)
+        if ids:
+            self.index.delete(ids=ids)
+
+    def query(self, vector, top_k):
+        results = self.index.query(
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
+            top_k=top_k,
+            include_metadata=False,
+            include_values=False
+        )
+        # Pinecone results structure: {'matches': [{'id': '...', 'score': 0.9, ...}]}
+        return [(match['id'], match['score']) for match in results['matches']]
+
+    def query_many(self, vectors, top_k):
+        # One request per vector, sent concurrently over the pooled connections
+        vectors = list(vectors)
+        if len(vectors) <= 1:
+            return [self.query(vector, top_k) for vector in vectors]
+        with ThreadPoolExecutor(max_workers=min(len(vectors), self.connections.pool_threads)) as pool:
+            return list(pool.map(lambda vector: self.query(vector, top_k), vectors))
+
+    def fetch(self, ids):
+        ids = list(ids)
+        if not ids:
+            return {}
+        vectors = self.index.fetch(ids=ids).vectors
+        return {chunk_id: vectors[chunk_id].metadata or {} for chunk_id in ids if chunk_id in vectors}
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def read_store_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class _Snapshot:
+    """
+    One loaded generation of a LocalVectorStore. Never modified: a reload swaps in
+    a new snapshot, so a query that took a reference sees one consistent generation.
+    """
+
+    def __init__(self, vectors, rows, hnsw=None, version=None, generation=0, dimension=None):
+        self.vectors = vectors
+        self.rows = rows
+        self.row_of = {chunk_id: i for i, (chunk_id, _) in enumerate(rows)}
+        self.hnsw = hnsw
+        self.version = version
+        self.generation = generation
+        self.dimension = dimension
+
+    def scores(self, vector):
+        """Cosine similarity of the query against every stored vector ((n, q) for a (q, dimension) matrix of queries)."""
+        query = _normalize(vector).T
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ query
+        # NumPy has no float16 BLAS; convert cache-sized blocks into a reused float32 buffer
+        scores = np.empty((len(self.vectors),) + query.shape[1:], dtype=np.float32)
+        buffer = np.empty((_SCORE_BLOCK, self.vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.vectors), _SCORE_BLOCK):
+            block = buffer[:len(self.vectors[start:start + _SCORE_BLOCK])]
+            block[...] = self.vectors[start:start + len(block)]
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Embedded vector store: memory-mapped unit vectors with exact or HNSW cosine search.
+    Upserts and deletes are buffered and written as a new generation by flush().
+    """
+
+    # Upserts are buffered in memory until flush()
+    writes_through = False
+
+    def __init__(self, directory=config.LOCAL_VECTOR_DIR, dtype=config.LOCAL_VECTOR_DTYPE,
+                 index_type=config.LOCAL_VECTOR_INDEX):
+        if index_type not in ("exact", "hnsw"):
+            raise ValueError(f"Unknown local vector index type: {index_type}")
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.index_type = index_type
+
+        # the loaded generation, replaced as a whole by _load
+        self.snapshot = _Snapshot(np.zeros((0, 0), dtype=self.dtype), [])
+        self.dimension = None
+
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ensure_loaded().snapshot.rows)
+
+    def _current_version(self):
+        try:
+            stat = os.stat(os.path.join(self.directory, MANIFEST_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, version):
+        manifest = read_store_manifest(self.directory)
+        # mmap'd: the matrix is shared through the page cache by every process using the store
+        vectors = np.load(os.path.join(self.directory, manifest["vectors"]), mmap_mode='r')
+        with open(os.path.join(self.directory, manifest["rows"]), 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        hnsw = None
+        if manifest["hnsw"] and self.index_type == "hnsw":
+            hnsw = self._load_hnsw(os.path.join(self.directory, manifest["hnsw"]), manifest["dimension"], len(rows))
+        # one reference swap: queries in flight keep the snapshot they started with
+        self.snapshot = _Snapshot(vectors, rows, hnsw, version, manifest["generation"], manifest["dimension"])
+        self.dimension = manifest["dimension"]
+        print(f"Loaded local vector store from {self.directory} (generation {manifest['generation']}, {len(rows)} vectors)")
+
+    def ensure_loaded(self):
+        """Load the store on first use and reload it if the manifest changed since."""
+        version = self._current_version()
+        if version is not None and version != self.snapshot.version:
+            with self._lock:
+                if version != self.snapshot.version:
+                    self._load(version)
+        return self
+
+    def ensure_index(self, dimension):
+        self.ensure_loaded()
+        if self.dimension is not None and self.dimension != dimension:
+            raise ValueError(f"Local vector store in {self.directory} has dimension {self.dimension}, not {dimension}")
+        self.dimension = dimension
+
+    def upsert(self, ids, vectors, metadata=None):
+        vectors = _normalize(vectors)
+        metadata = metadata or [{}] * len(ids)
+        for chunk_id, vector, meta in zip(ids, vectors, metadata):
+            self._pending[chunk_id] = (vector, meta)
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self._pending[chunk_id] = None
+
+    def flush(self):
+        """Write existing rows plus pending changes as a new generation."""
+        if not self._pending:
+            return
+        current = self.ensure_loaded().snapshot
+
+        keep = [i for i, (chunk_id, _) in enumerate(current.rows) if chunk_id not in self._pending]
+        added = [(chunk_id, change) for chunk_id, change in self._pending.items() if change is not None]
+        rows = [current.rows[i] for i in keep] + [[chunk_id, meta] for chunk_id, (_, meta) in added]
+
+        dimension = self.dimension or (len(added[0][1][0]) if added else 0)
+        vectors = np.empty((len(rows), dimension), dtype=self.dtype)
+        vectors[:len(keep)] = current.vectors[keep] if keep else 0
+        for i, (_, (vector, _)) in enumerate(added, start=len(keep)):
+            if len(vector) != dimension:
+                raise ValueError(f"Vector dimension {len(vector)} does not match the store's {dimension}")
+            vectors[i] = vector
+
+        generation = current.generation + 1
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = {
+            "generation": generation,
+            "dimension": dimension,
+            "dtype": self.dtype.name,
+            "count": len(rows),
+            "vectors": f"vectors_{generation:08d}.npy",
+            "rows": f"rows_{generation:08d}.json",
+            "hnsw": f"hnsw_{generation:08d}.bin" if self.index_type == "hnsw" and rows else None,
+        }
+        with open(os.path.join(self.directory, manifest["vectors"]), 'wb') as f:
+            np.save(f, vectors)
+        with open(os.path.join(self.directory, manifest["rows"]), 'w', encoding='utf-8') as f:
+            json.dump(rows, f)
+        if manifest["hnsw"]:
+            # Rows are renumbered on every flush, so the graph is rebuilt rather than patched
+            self._build_hnsw(vectors).save_index(os.path.join(self.directory, manifest["hnsw"]))
+
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        self._pending = {}
+        self._remove_unreferenced(manifest)
+        self.ensure_loaded()
+
+    def _build_hnsw(self, vectors):
+        import hnswlib
+
+        print(f"Building HNSW graph over {len(vectors)} vectors...")
+        graph = hnswlib.Index(space='ip', dim=vectors.shape[1])
+        graph.init_index(max_elements=len(vectors), ef_construction=config.HNSW_EF_CONSTRUCTION, M=config.HNSW_M)
+        for start in range(0, len(vectors), _SCORE_BLOCK):
+            block = np.asarray(vectors[start:start + _SCORE_BLOCK], dtype=np.float32)
+            graph.add_items(block, np.arange(start, start + len(block)))
+        return graph
+
+    def _load_hnsw(self, path, dimension, count):
+        import hnswlib
+
+        graph = hnswlib.Index(space='ip', dim=dimension)
+        graph.load_index(path, max_elements=count)
+        graph.set_ef(config.HNSW_EF_SEARCH)
+        return graph
+
+    def _remove_unreferenced(self, manifest):
+        referenced = {manifest["vectors"], manifest["rows"], manifest["hnsw"]}
+        for name in os.listdir(self.directory):
+            if _STORE_FILE.match(name) and name not in referenced:
+                # Readers that still map the file keep their view until they reload
+                os.remove(os.path.join(self.directory, name))
+
+    def scores(self, vector):
+        """Cosine similarity of the query against every stored vector (see _Snapshot.scores)."""
+        return self.ensure_loaded().snapshot.scores(vector)
+
+    def query(self, vector, top_k):
+        # one snapshot for the whole query, so a concurrent reload cannot mix generations
+        snapshot = self.ensure_loaded().snapshot
+        top_k = min(top_k, len(snapshot.rows))
+        if top_k <= 0:
+            return []
+
+        if snapshot.hnsw is not None:
+            snapshot.hnsw.set_ef(max(config.HNSW_EF_SEARCH, top_k))
+            labels, distances = snapshot.hnsw.knn_query(_normalize(vector), k=top_k)
+            # Inner-product distance is 1 - dot; vectors are unit length so dot is the cosine
+            return [(snapshot.rows[label][0], float(1.0 - distance)) for label, distance in zip(labels[0], distances[0])]
+
+        top, top_scores = select_top_k(snapshot.scores(vector), top_k)
+        return [(snapshot.rows[i][0], float(score)) for i, score in zip(top, top_scores)]
+
+    def query_many(self, vectors, top_k):
+        # One matrix product (or one batched HNSW search) for all the queries
+        snapshot = self.ensure_loaded().snapshot
+        vectors = np.asarray(vectors, dtype=np.float32)
+        top_k = min(top_k, len(snapshot.rows))
+        if top_k <= 0 or len(vectors) == 0:
+            return [[] for _ in range(len(vectors))]
+
+        if snapshot.hnsw is not None:
+            snapshot.hnsw.set_ef(max(config.HNSW_EF_SEARCH, top_k))
+            labels, distances = snapshot.hnsw.knn_query(_normalize(vectors), k=top_k)
+            return [[(snapshot.rows[label][0], float(1.0 - distance)) for label, distance in zip(row_labels, row_distances)]
+                    for row_labels, row_distances in zip(labels, distances)]
+
+        results = []
+        for start in range(0, len(vectors), _QUERY_BLOCK):
+            for column in np.ascontiguousarray(snapshot.scores(vectors[start:start + _QUERY_BLOCK]).T):
+                top, top_scores = select_top_k(column, top_k)
+                results.append([(snapshot.rows[i][0], float(score)) for i, score in zip(top, top_scores)])
+        return results
+
+    def fetch(self, ids):
+        snapshot = self.ensure_loaded().snapshot
+        return {chunk_id: snapshot.rows[snapshot.row_of[chunk_id]][1] for chunk_id in ids if chunk_id in snapshot.row_of}
+
+
+def create_vector_store(backend=config.VECTOR_STORE):
+    if backend == "pinecone":
+        return PineconeVectorStore()
+    if backend == "local":
+        return LocalVectorStore()
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+# Process-wide vector store shared by dense retrieval, context fetching and ingestion (lazy load)
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+def get_vector_store():
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = create_vector_store()
+    return _vector_store